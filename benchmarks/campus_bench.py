@@ -0,0 +1,262 @@
+"""Benchmark the core navigation functions on synthetic campuses
+
+Usage (from the repository root):
+
+    python -m benchmarks.campus_bench --sizes 100,1000,10000 --output bench.json
+    python -m benchmarks.campus_bench --compare bench.json
+
+No storage is touched: the core functions take nav_data directly, and the
+save benchmarks only serialize what would be uploaded.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import contraction
+import graph_integrity
+import nav_store
+import zones
+from benchmarks.synthetic_campus import assign_building_zones, generate_campus, random_pairs
+
+DEFAULT_SIZES = (100, 1000, 5000, 10000, 50000)
+REGRESSION_THRESHOLD = 1.2  # Flag results more than 20% slower than baseline
+
+
+def time_calls(func, repeats):
+    """Run func repeats times, returning the durations in seconds"""
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def summarize(size, name, durations, **extra):
+    return {
+        "size": size,
+        "function": name,
+        "repeats": len(durations),
+        "min_ms": round(min(durations) * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+        "extra": extra,
+    }
+
+
+def skipped(size, name, reason):
+    return {"size": size, "function": name, "skipped": reason}
+
+
+def bench_size(size, args):
+    """All benchmarks for one campus size"""
+    results = []
+    data, positions = generate_campus(size, seed=args.seed)
+    content = nav_store.encode_snapshot(data, 0)
+    image_count = sum(len(p.get("images", [])) for paths in data["nodes"].values()
+                      for p in paths.values())
+    shape = {"nodes": size, "connections": len(data["connections"]), "images": image_count}
+
+    # load_navigation_data: parse the snapshot text
+    results.append(summarize(size, "load_parse", time_calls(
+        lambda: nav_store.parse_snapshot(content), args.repeats),
+        snapshot_bytes=len(content), **shape))
+
+    # save_navigation_data: full snapshot vs. one-node delta record
+    results.append(summarize(size, "save_snapshot_serialize", time_calls(
+        lambda: nav_store.encode_snapshot(data, 0), args.repeats),
+        snapshot_bytes=len(content)))
+    base = nav_store.entry_fingerprints(data)
+    node = next(iter(data["nodes"]))
+    data["nodes"][node]["path_1"]["instruction"] += " (edited)"
+
+    def delta():
+        ops = nav_store.diff_navigation_data(base, data, [("nodes", node)])
+        return nav_store.encode_log_entry(1, ops, "benchmark")
+    results.append(summarize(size, "save_delta_serialize", time_calls(delta, args.repeats),
+                             record_bytes=len(delta())))
+
+    # show_system_stats aggregation
+    results.append(summarize(size, "show_system_stats", time_calls(
+        lambda: nav_store.navigation_statistics(data), args.repeats)))
+
+    # Graph integrity: full build vs. keeping it current across link edits
+    built = []
+    results.append(summarize(size, "integrity_build", time_calls(
+        lambda: built.append(graph_integrity.GraphIntegrity.build(data)), args.layout_repeats)))
+    analyzer = built[-1]
+    durations = []
+    for conn_key in list(data["connections"])[:args.queries]:
+        details = data["connections"][conn_key]
+        started = time.perf_counter()
+        analyzer.apply_operations([{"op": "delete", "section": "connections", "key": conn_key}])
+        analyzer.apply_operations([{"op": "set", "section": "connections", "key": conn_key,
+                                    "value": details}])
+        analyzer.report()
+        durations.append(time.perf_counter() - started)
+    results.append(summarize(size, "integrity_update", durations,
+                             components=analyzer.report()["components"]))
+
+    # find_path_with_weight, one sample per random pair
+    try:
+        import routing
+        pairs = random_pairs(data, args.queries, seed=args.seed)
+        durations = []
+        found = 0
+        for start, end in pairs:
+            started = time.perf_counter()
+            path, _, _ = routing.find_path_with_weight(data, start, end)
+            durations.append(time.perf_counter() - started)
+            found += bool(path)
+        results.append(summarize(size, "find_path_with_weight", durations, routes_found=found))
+    except ImportError as e:
+        results.append(skipped(size, "find_path_with_weight", str(e)))
+
+    # A* once every node has a position, against Dijkstra on the same pairs
+    try:
+        import routing
+        positioned = dict(data, node_meta={name: {"x": x, "y": y, "floor": floor}
+                                           for name, (x, y, floor) in positions.items()})
+        graphs = {"dijkstra": routing.RouteGraph(data), "astar": routing.RouteGraph(positioned)}
+        for algorithm, graph in graphs.items():
+            durations = []
+            expanded = []
+            for start, end in random_pairs(data, args.queries, seed=args.seed):
+                started = time.perf_counter()
+                _, _, count = graph.shortest_path(start, end)
+                durations.append(time.perf_counter() - started)
+                expanded.append(count)
+            results.append(summarize(size, f"route_search_{algorithm}", durations,
+                                     mean_expanded=round(statistics.fmean(expanded or [0]))))
+    except ImportError as e:
+        results.append(skipped(size, "route_search", str(e)))
+
+    # Contraction hierarchy: background preprocessing, then bidirectional queries
+    built = []
+    results.append(summarize(size, "route_hierarchy_build", time_calls(
+        lambda: built.append(contraction.ContractionHierarchy.build(data)), args.layout_repeats)))
+    hierarchy = built[-1]
+    durations = []
+    settled = []
+    for start, end in random_pairs(data, args.queries, seed=args.seed):
+        started = time.perf_counter()
+        _, _, count = hierarchy.route(start, end)
+        durations.append(time.perf_counter() - started)
+        settled.append(count)
+    results.append(summarize(size, "find_path_hierarchy", durations,
+                             shortcuts=hierarchy.shortcut_count, max_settled=max(settled, default=0)))
+
+    # Zone shards: build once, then route loading only the zones visited
+    zoned = assign_building_zones(json.loads(json.dumps(data)))
+    built = []
+    results.append(summarize(size, "zone_shards_build", time_calls(
+        lambda: built.append(zones.build_zone_files(zoned, 0)), args.repeats)))
+    index, files = built[-1]
+    durations = []
+    loaded = []
+    for start, end in random_pairs(zoned, args.queries, seed=args.seed):
+        campus = zones.ZonedCampus(index, lambda zone, info: json.loads(files[info['file']]))
+        started = time.perf_counter()
+        campus.route(start, end)
+        durations.append(time.perf_counter() - started)
+        loaded.append(len(campus.status()['loaded']))
+    results.append(summarize(size, "find_path_zoned", durations,
+                             zones=len(files), index_bytes=len(json.dumps(index)),
+                             mean_zones_loaded=round(statistics.fmean(loaded), 1)))
+
+    # show_full_graph: layout and figure building
+    if size > args.max_layout_nodes:
+        results.append(skipped(size, "show_full_graph_layout",
+                               f"larger than --max-layout-nodes={args.max_layout_nodes}"))
+    else:
+        try:
+            import campus_map
+            layouts = []
+            results.append(summarize(size, "show_full_graph_layout", time_calls(
+                lambda: layouts.append(campus_map.compute_network_layout(data)), args.layout_repeats)))
+            G, pos, edge_info = layouts[-1]
+            results.append(summarize(size, "show_full_graph_figure", time_calls(
+                lambda: campus_map.build_network_figure(G, pos, edge_info), args.layout_repeats)))
+        except ImportError as e:
+            results.append(skipped(size, "show_full_graph_layout", str(e)))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print median ratios against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["size"], r["function"]): r for r in json.load(f)["results"]
+                    if "median_ms" in r}
+    regressions = 0
+    print(f"\n{'size':>7}  {'function':<26} {'baseline':>11} {'current':>11}  ratio")
+    for result in results:
+        before = baseline.get((result["size"], result["function"]))
+        if not before or "median_ms" not in result:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+        regressions += bool(flag)
+        print(f"{result['size']:>7}  {result['function']:<26} {before['median_ms']:>9.2f}ms "
+              f"{result['median_ms']:>9.2f}ms  {ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated campus sizes (nodes)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=10, help="route queries per size")
+    parser.add_argument("--layout-repeats", type=int, default=1)
+    parser.add_argument("--max-layout-nodes", type=int, default=5000,
+                        help="skip the spring layout above this size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s]:
+        print(f"Benchmarking {size} nodes...", file=sys.stderr)
+        for result in bench_size(size, args):
+            results.append(result)
+            if "median_ms" in result:
+                print(f"  {result['function']:<26} median {result['median_ms']:10.3f} ms",
+                      file=sys.stderr)
+            else:
+                print(f"  {result['function']:<26} skipped ({result['skipped']})", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""Local stand-in for the GitHub contents API
+
+Serves /repos/<owner>/<repo>/contents/<path> from memory with the same
+status codes the app relies on (201 create, 409 SHA mismatch, 422 PUT to
+an existing file without a SHA), simulated latency and an X-RateLimit-*
+budget. The git trees/blobs API and zipball downloads used by snapshot
+sync and batch reads are served from the same files; `requests` counts
+calls by method and `endpoints` by API (contents, trees, blobs, ...).
+Batched commits go through refs, commits and trees like on GitHub, except
+that a new tree must be based on the tree of the branch head. Point the app at it with
+
+    python -m benchmarks.fake_github --nodes 1000 --port 8765
+    CAMPUS_NAV_GITHUB_API_URL=http://127.0.0.1:8765 streamlit run example.py
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import nav_store
+from benchmarks.synthetic_campus import generate_campus
+from blob_cache import blob_sha
+
+REPO_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)/?(.*)$")
+RATE_LIMIT_WINDOW = 3600  # seconds, like GitHub's hourly budget
+BRANCH = "main"
+
+
+def _endpoint_kind(endpoint):
+    if endpoint.startswith("git/"):
+        return endpoint.split("/")[1]
+    return endpoint.split("/", 1)[0] or "repo"
+
+
+class FakeGitHub:
+    """In-memory repository behind a threaded HTTP server"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0,
+                 rate_limit=5000, seed=0):
+        self.files = {}
+        self.blobs = {}  # SHA -> content; like git, blobs outlive their files
+        self._ids = itertools.count(1)
+        self._trees = {}  # tree SHA -> {path: content}, for trees made through the API
+        self._commits = {}  # commit SHA -> {"tree", "parents", "message"}
+        self._advance()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.requests = Counter()
+        self.endpoints = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._used = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-github",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Repository contents
+    def _advance(self):
+        """Move the branch head past a change made through the contents API"""
+        self.head = blob_sha(b"commit %d" % next(self._ids))
+        self.head_tree = blob_sha(b"tree %d" % next(self._ids))
+
+    def put_file(self, path, content):
+        if isinstance(content, str):
+            content = content.encode()
+        with self._lock:
+            self.files[path.strip("/")] = content
+            self.blobs[blob_sha(content)] = content
+            self._advance()
+
+    def _entry(self, path, content=None):
+        name = path.rsplit("/", 1)[-1]
+        if content is None:
+            return {"name": name, "path": path, "type": "dir", "sha": blob_sha(path.encode())}
+        return {"name": name, "path": path, "type": "file", "size": len(content),
+                "sha": blob_sha(content)}
+
+    def _listing(self, path):
+        prefix = f"{path}/" if path else ""
+        entries = {}
+        for file_path, content in self.files.items():
+            if not file_path.startswith(prefix):
+                continue
+            child, _, rest = file_path[len(prefix):].partition("/")
+            child_path = prefix + child
+            entries[child] = self._entry(child_path, None if rest else content)
+        return [entries[name] for name in sorted(entries)]
+
+    # Rate limiting
+    def _take_token(self):
+        """Spend one request from the budget; returns (allowed, headers, delay)"""
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= RATE_LIMIT_WINDOW:
+                self._window_start, self._used = now, 0
+            allowed = self._used < self.rate_limit
+            if allowed:
+                self._used += 1
+            headers = {
+                "X-RateLimit-Limit": self.rate_limit,
+                "X-RateLimit-Remaining": self.rate_limit - self._used,
+                "X-RateLimit-Used": self._used,
+                "X-RateLimit-Reset": int(self._window_start + RATE_LIMIT_WINDOW),
+                "X-RateLimit-Resource": "core",
+            }
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+        return allowed, headers, delay / 1000
+
+    # Request handling
+    def handle(self, method, url_path, body):
+        """Return (status, payload) for one API request; bytes payloads are sent raw"""
+        match = REPO_PATH.match(url_path.split("?", 1)[0])
+        if not match:
+            return 404, {"message": "Not Found"}
+        owner, repo, endpoint = match.groups()
+        endpoint = endpoint.strip("/")
+        with self._lock:
+            self.requests[method] += 1
+            self.endpoints[_endpoint_kind(endpoint)] += 1
+            if endpoint == "contents" or endpoint.startswith("contents/"):
+                return self._contents(method, endpoint[len("contents"):].strip("/"), body)
+            if endpoint.startswith("git/"):
+                return self._git(method, endpoint[len("git/"):], body)
+            if method != "GET":
+                return 405, {"message": "Method Not Allowed"}
+            if not endpoint:
+                return 200, {"full_name": f"{owner}/{repo}", "default_branch": BRANCH}
+            if endpoint.startswith("zipball"):
+                return 200, self._zipball(f"{owner}-{repo}-{BRANCH}")
+        return 404, {"message": "Not Found"}
+
+    def _tree(self):
+        entries, folders = [], set()
+        for path in sorted(self.files):
+            parts = path.split("/")
+            for depth in range(1, len(parts)):
+                folders.add("/".join(parts[:depth]))
+            content = self.files[path]
+            entries.append({"path": path, "mode": "100644", "type": "blob",
+                            "sha": blob_sha(content), "size": len(content)})
+        entries += [{"path": folder, "mode": "040000", "type": "tree",
+                     "sha": blob_sha(folder.encode())} for folder in sorted(folders)]
+        return {"sha": self.head_tree, "tree": entries, "truncated": False}
+
+    def _git(self, method, endpoint, body):
+        kind, _, name = endpoint.partition("/")
+        if method == "GET" and kind == "trees":
+            return 200, self._tree()
+        if method == "GET" and kind == "blobs":
+            content = self.blobs.get(name)
+            if content is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"sha": name, "size": len(content), "encoding": "base64",
+                         "content": base64.b64encode(content).decode()}
+        if method == "GET" and kind in ("ref", "refs"):
+            if name != f"heads/{BRANCH}":
+                return 404, {"message": "Not Found"}
+            return 200, {"ref": f"refs/{name}", "object": {"sha": self.head, "type": "commit"}}
+        if method == "GET" and kind == "commits":
+            commit = self._commits.get(name)
+            if name == self.head:
+                commit = {"tree": self.head_tree, "parents": [], "message": ""}
+            if commit is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"sha": name, "tree": {"sha": commit['tree']},
+                         "parents": [{"sha": sha} for sha in commit['parents']],
+                         "message": commit['message']}
+        if method == "POST" and kind == "trees":
+            return self._make_tree(body)
+        if method == "POST" and kind == "commits":
+            tree = body.get("tree")
+            if tree != self.head_tree and tree not in self._trees:
+                return 422, {"message": "Tree SHA does not exist"}
+            sha = blob_sha(b"commit %d" % next(self._ids))
+            self._commits[sha] = {"tree": tree, "parents": list(body.get("parents", [])),
+                                  "message": body.get("message", "")}
+            return 201, {"sha": sha, "tree": {"sha": tree}}
+        if method == "PATCH" and kind == "refs":
+            commit = self._commits.get(body.get("sha"))
+            if name != f"heads/{BRANCH}" or commit is None:
+                return 422, {"message": "Reference update failed"}
+            if not body.get("force") and self.head not in commit['parents']:
+                return 422, {"message": "Update is not a fast forward"}
+            if commit['tree'] != self.head_tree:
+                self.files = dict(self._trees[commit['tree']])
+            self.head, self.head_tree = body["sha"], commit['tree']
+            return 200, {"ref": f"refs/{name}", "object": {"sha": self.head, "type": "commit"}}
+        return 404, {"message": "Not Found"}
+
+    def _make_tree(self, body):
+        if body.get("base_tree") != self.head_tree:
+            return 422, {"message": "base_tree must be the tree of the branch head on this fake"}
+        files = dict(self.files)
+        for entry in body.get("tree", []):
+            path = entry['path']
+            if "content" in entry:
+                content = entry['content'].encode()
+                self.blobs[blob_sha(content)] = content
+            elif entry.get("sha") is None:
+                if files.pop(path, None) is None:
+                    return 422, {"message": f"{path} does not exist"}
+                continue
+            else:
+                content = self.blobs.get(entry['sha'])
+                if content is None:
+                    return 422, {"message": f"blob {entry['sha']} does not exist"}
+            files[path] = content
+        sha = blob_sha(b"tree %d" % next(self._ids))
+        self._trees[sha] = files
+        return 201, {"sha": sha, "truncated": False}
+
+    def _zipball(self, root):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for path, content in sorted(self.files.items()):
+                archive.writestr(f"{root}/{path}", content)
+        return buffer.getvalue()
+
+    def _contents(self, method, path, body):
+        content = self.files.get(path)
+        if method == "GET":
+            if content is not None:
+                entry = self._entry(path, content)
+                entry.update(content=base64.b64encode(content).decode(), encoding="base64")
+                return 200, entry
+            listing = self._listing(path)
+            return (200, listing) if listing else (404, {"message": "Not Found"})
+        if method == "PUT":
+            sha = body.get("sha")
+            if content is not None and not sha:
+                return 422, {"message": "Invalid request.\n\n\"sha\" wasn't supplied."}
+            if content is not None and sha != blob_sha(content):
+                return 409, {"message": f"{path} does not match {sha}"}
+            if content is None and sha:
+                return 404, {"message": "Not Found"}
+            new_content = base64.b64decode(body.get("content", ""))
+            self.files[path] = new_content
+            self.blobs[blob_sha(new_content)] = new_content
+            self._advance()
+            return (200 if content is not None else 201), {
+                "content": self._entry(path, new_content),
+                "commit": {"message": body.get("message", "")},
+            }
+        if method == "DELETE":
+            if content is None:
+                return 404, {"message": "Not Found"}
+            if body.get("sha") != blob_sha(content):
+                return 409, {"message": f"{path} does not match {body.get('sha')}"}
+            del self.files[path]
+            self._advance()
+            return 200, {"content": None, "commit": {"message": body.get("message", "")}}
+        return 405, {"message": "Method Not Allowed"}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                allowed, headers, delay = fake._take_token()
+                if delay:
+                    time.sleep(delay)
+                if allowed:
+                    status, payload = fake.handle(self.command, self.path, body)
+                else:
+                    status, payload = 403, {"message": "API rate limit exceeded"}
+                if isinstance(payload, bytes):
+                    data, content_type = payload, "application/zip"
+                else:
+                    data, content_type = json.dumps(payload).encode(), "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_PUT = do_DELETE = do_POST = do_PATCH = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def placeholder_image(size=(640, 480), format="JPEG"):
+    """A step-photo-sized noisy JPEG (or a two-tone PNG), or dummy bytes without Pillow"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff" + bytes(1024)
+    if format == "PNG":
+        img = Image.effect_noise(size, 64).point(lambda v: 255 if v > 128 else 0).convert("1")
+    else:
+        img = Image.effect_noise(size, 48).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def seed_campus(fake, nav_data, base_path="campus_navigator", image_size=(640, 480)):
+    """Store nav_data, every referenced image and a QR code per node"""
+    fake.put_file(f"{base_path}/nav_data.json", nav_store.encode_snapshot(nav_data, 0))
+    fake.put_file(f"{base_path}/{nav_store.LOG_DIR}/.gitkeep", "")
+    image = placeholder_image(image_size)
+    qr = placeholder_image((290, 290), "PNG")
+    for node, paths in nav_data['nodes'].items():
+        fake.put_file(f"{base_path}/qrcodes/{node}.png", qr)
+        for path_data in paths.values():
+            for image_path in path_data.get('images', []):
+                fake.put_file(image_path, image)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake GitHub contents API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--nodes", type=int, default=200, help="synthetic campus size")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fake = FakeGitHub(args.host, args.port, args.latency_ms, args.jitter_ms,
+                      args.rate_limit, args.seed)
+    nav_data, _ = generate_campus(args.nodes, seed=args.seed)
+    seed_campus(fake, nav_data)
+    print(f"Serving {len(fake.files)} files at {fake.url} (Ctrl+C to stop)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
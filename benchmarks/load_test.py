@@ -0,0 +1,189 @@
+"""Multi-session load test of the visitor flow against a fake GitHub API
+
+Each simulated session does what a visitor's Streamlit session does:
+load nav_data (snapshot plus operation log), scan a QR code (select the
+start node), find a route and load every step's primary image. Sessions
+run on threads in this one process, as Streamlit runs them.
+
+    python -m benchmarks.load_test --sessions 200 --concurrency 20 --latency-ms 80
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import routing
+from benchmarks.fake_github import FakeGitHub, seed_campus
+from benchmarks.synthetic_campus import generate_campus
+from github_store import GitHubStore
+
+PHASES = ("load", "scan", "route", "steps", "session")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def decode_image(content):
+    """Decode like st.image does with the bytes of a step image"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    Image.open(io.BytesIO(content)).load()
+
+
+def visit(store, rng, batch_images=True):
+    """The visitor flow; returns per-phase timings or an error"""
+    timings = {}
+    started = time.perf_counter()
+
+    phase = time.perf_counter()
+    loaded = store.read_navigation_data()
+    timings["load"] = time.perf_counter() - phase
+    if not loaded:
+        return {"ok": False, "error": "nav_data unavailable"}
+    nav_data = loaded[0]
+
+    # The scanner hands over the node name printed in the QR code
+    phase = time.perf_counter()
+    start, end = rng.sample(list(nav_data['nodes']), 2)
+    if start not in nav_data['nodes']:
+        return {"ok": False, "error": "scanned node missing"}
+    timings["scan"] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    path, _, _ = routing.find_path_with_weight(nav_data, start, end)
+    timings["route"] = time.perf_counter() - phase
+    if not path:
+        return {"ok": False, "error": "no route"}
+
+    phase = time.perf_counter()
+    steps = routing.route_steps(nav_data, path)
+    image_paths = [path_data['images'][0] for *_, path_data in steps if path_data.get('images')]
+    if batch_images:
+        images = store.get_files_many(image_paths)
+    else:
+        images = {image_path: store.get(image_path)[0] for image_path in image_paths}
+    missing = 0
+    for image_path in image_paths:
+        if images.get(image_path) is None:
+            missing += 1
+        else:
+            decode_image(images[image_path])
+    timings["steps"] = time.perf_counter() - phase
+    timings["session"] = time.perf_counter() - started
+
+    return {
+        "ok": missing == 0,
+        "error": f"{missing} step image(s) failed" if missing else None,
+        "timings": timings,
+        "steps": len(steps),
+    }
+
+
+def run_session(api_url, session_id, seed, batch_images=True):
+    """One visitor session with its own client, so API calls can be counted"""
+    registry = metrics.MetricsRegistry()
+    store = GitHubStore("load-test", "campus/load-test", api_url=api_url, registry=registry)
+    try:
+        result = visit(store, random.Random(seed * 100003 + session_id), batch_images)
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["api_calls"] = store.request_count
+    result["rate_limited"] = sum(
+        c["value"] for c in registry.snapshot()["counters"]
+        if c["metric"] == "github_responses" and c["labels"].get("status") == "403"
+    )
+    return result
+
+
+def summarize(results, wall_seconds):
+    completed = [r for r in results if r["ok"]]
+    report = {
+        "sessions": len(results),
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "errors": dict(Counter(r["error"] for r in results if r["error"])),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_sessions_per_s": round(len(completed) / wall_seconds, 2) if wall_seconds else 0.0,
+        "api_calls_per_session": {
+            "mean": round(statistics.fmean(r["api_calls"] for r in results), 2) if results else 0,
+            "max": max((r["api_calls"] for r in results), default=0),
+        },
+        "rate_limited_responses": sum(r["rate_limited"] for r in results),
+        "mean_steps": round(statistics.fmean(r["steps"] for r in completed), 2) if completed else 0,
+        "latency_ms": {},
+    }
+    for phase in PHASES:
+        values = [r["timings"][phase] for r in completed if phase in r.get("timings", {})]
+        report["latency_ms"][phase] = {
+            "p50": round(percentile(values, 0.50) * 1000, 2),
+            "p99": round(percentile(values, 0.99) * 1000, 2),
+            "max": round(max(values, default=0.0) * 1000, 2),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100, help="total visitor sessions")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions in flight")
+    parser.add_argument("--nodes", type=int, default=500, help="synthetic campus size")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake API latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="fake API requests per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-file-images", action="store_true",
+                        help="load step images with one contents call each instead of a batch read")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    print(f"Seeding a {args.nodes}-node campus...", file=sys.stderr)
+    fake = FakeGitHub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      rate_limit=args.rate_limit, seed=args.seed).start()
+    nav_data, _ = generate_campus(args.nodes, seed=args.seed)
+    seed_campus(fake, nav_data)
+
+    print(f"Running {args.sessions} sessions, {args.concurrency} at a time...", file=sys.stderr)
+    results = []
+    lock = threading.Lock()
+
+    def worker(session_id):
+        result = run_session(fake.url, session_id, args.seed, not args.per_file_images)
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(worker, range(args.sessions)))
+    finally:
+        wall = time.perf_counter() - started
+        fake.stop()
+
+    report = summarize(results, wall)
+    report["config"] = vars(args)
+    report["meta"] = {"python": platform.python_version(), "platform": platform.platform()}
+    report["fake_api_requests"] = dict(fake.requests)
+    report["fake_api_endpoints"] = dict(fake.endpoints)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
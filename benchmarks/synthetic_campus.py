@@ -0,0 +1,104 @@
+import math
+import random
+
+# Synthetic campuses in the exact nav_data schema, for benchmarks and load
+# tests. Nodes are spread over buildings and floors; every node's path_1
+# continues a ring through all nodes (so the campus is strongly connected)
+# and its other paths lead to nearby nodes on the same floor.
+
+PATH_COUNT_WEIGHTS = {1: 0.15, 2: 0.40, 3: 0.30, 4: 0.15}
+IMAGE_COUNT_WEIGHTS = {0: 0.30, 1: 0.40, 2: 0.20, 3: 0.10}
+NODES_PER_BUILDING = 200
+FLOOR_HEIGHT_FT = 12
+BUILDING_SPACING_FT = 1000
+BUILDING_SIZE_FT = 300
+NEIGHBOR_WINDOW = 8
+
+
+def _weighted_choice(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _distance(a, b):
+    (ax, ay, af), (bx, by, bf) = a, b
+    return max(5, round(math.hypot(ax - bx, ay - by) + abs(af - bf) * FLOOR_HEIGHT_FT))
+
+
+def generate_campus(num_nodes, seed=0, image_prefix="campus_navigator/images"):
+    """Build a nav_data dict with num_nodes nodes and realistic degree/images
+
+    Returns (nav_data, positions) where positions maps node name to
+    (x, y, floor) in feet.
+    """
+    rng = random.Random(seed)
+    buildings = max(1, math.ceil(num_nodes / NODES_PER_BUILDING))
+
+    names = []
+    positions = {}
+    for idx in range(num_nodes):
+        building = idx % buildings
+        floor = rng.randint(0, 4)
+        name = f"B{building:03d}-F{floor}-{idx:06d}"
+        origin_x = (building % 20) * BUILDING_SPACING_FT
+        origin_y = (building // 20) * BUILDING_SPACING_FT
+        positions[name] = (origin_x + rng.uniform(0, BUILDING_SIZE_FT),
+                           origin_y + rng.uniform(0, BUILDING_SIZE_FT),
+                           floor)
+        names.append(name)
+
+    # Ring order walks building by building, floor by floor
+    ring = sorted(names, key=lambda n: (n[:4], positions[n][2], positions[n][0]))
+
+    # Candidate neighbours: nodes close in x on the same building floor
+    groups = {}
+    for name in ring:
+        groups.setdefault((name[:4], positions[name][2]), []).append(name)
+    neighbors = {}
+    for members in groups.values():
+        for pos, name in enumerate(members):
+            window = members[max(0, pos - NEIGHBOR_WINDOW):pos] + \
+                members[pos + 1:pos + 1 + NEIGHBOR_WINDOW]
+            neighbors[name] = sorted(window, key=lambda other: _distance(positions[name], positions[other]))
+
+    nodes = {}
+    connections = {}
+    for pos, name in enumerate(ring):
+        path_count = _weighted_choice(rng, PATH_COUNT_WEIGHTS)
+        targets = [ring[(pos + 1) % len(ring)]] if len(ring) > 1 else []
+        targets += [n for n in neighbors.get(name, []) if n not in targets][:path_count - 1]
+
+        paths = {}
+        for path_idx, target in enumerate(targets, start=1):
+            path_key = f"path_{path_idx}"
+            image_count = _weighted_choice(rng, IMAGE_COUNT_WEIGHTS)
+            paths[path_key] = {
+                "label": f"Towards {target}",
+                "distance": _distance(positions[name], positions[target]),
+                "instruction": f"Walk from {name} towards {target}, keep the corridor on your left.",
+                "images": [f"{image_prefix}/{name}_{path_key}_{i}.jpg" for i in range(image_count)],
+                "landmark": rng.choice(["Notice board", "Water fountain", "Lift lobby",
+                                        "Stairwell", "Cafeteria", "Reception", ""]),
+            }
+            connections[f"{name}::{path_key}::{target}"] = {
+                "from": name,
+                "to": target,
+                "path_key": path_key,
+            }
+        nodes[name] = paths
+
+    return {"nodes": nodes, "connections": connections}, positions
+
+
+def random_pairs(nav_data, count, seed=0):
+    """Random (start, end) node pairs for route queries"""
+    rng = random.Random(seed)
+    names = list(nav_data["nodes"])
+    if len(names) < 2:
+        return []
+    return [tuple(rng.sample(names, 2)) for _ in range(count)]
+
+
+def assign_building_zones(nav_data):
+    """Put every node in a zone named after its building (B000, B001, ...)"""
+    nav_data["node_meta"] = {name: {"zone": name[:4]} for name in nav_data["nodes"]}
+    return nav_data
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+
+# Local copy of repository files, stored by git blob SHA. An index maps
+# each repository path to its blob, so files with identical content are
+# stored once and a sync only has to download blobs it has never seen.
+
+INDEX_FILE = "index.json"
+OBJECTS_DIR = "objects"
+
+
+def blob_sha(content):
+    """Git blob SHA of content, as GitHub reports it"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class BlobCache:
+    """Content-addressed file cache on local disk"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index = {}
+        os.makedirs(os.path.join(directory, OBJECTS_DIR), exist_ok=True)
+        self._load_index()
+
+    def _object_path(self, sha):
+        return os.path.join(self.directory, OBJECTS_DIR, sha[:2], sha[2:])
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # Index
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _save_index(self):
+        self._write_atomic(os.path.join(self.directory, INDEX_FILE),
+                           json.dumps(self._index, sort_keys=True).encode())
+
+    def index(self):
+        with self._lock:
+            return dict(self._index)
+
+    def sha_of(self, path):
+        with self._lock:
+            return self._index.get(path)
+
+    def set_index(self, mapping):
+        """Replace the path → SHA index, e.g. with a freshly listed tree"""
+        with self._lock:
+            self._index = dict(mapping)
+            self._save_index()
+
+    # Blobs
+    def has_blob(self, sha):
+        return os.path.exists(self._object_path(sha))
+
+    def store_blob(self, content, sha=None):
+        """Keep content under its blob SHA; returns the SHA"""
+        actual = blob_sha(content)
+        if sha and sha != actual:
+            raise ValueError(f"blob content does not match SHA {sha}")
+        if not self.has_blob(actual):
+            self._write_atomic(self._object_path(actual), content)
+        return actual
+
+    def read_blob(self, sha):
+        try:
+            with open(self._object_path(sha), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    # Files by repository path
+    def read(self, path):
+        """(content, sha) of a cached file, or (None, None)"""
+        sha = self.sha_of(path)
+        content = self.read_blob(sha) if sha else None
+        return (content, sha) if content is not None else (None, None)
+
+    def store(self, path, content, sha=None):
+        sha = self.store_blob(content, sha)
+        with self._lock:
+            if self._index.get(path) != sha:
+                self._index[path] = sha
+                self._save_index()
+        return sha
+
+    def forget(self, path):
+        with self._lock:
+            if self._index.pop(path, None) is not None:
+                self._save_index()
+
+    def prune(self):
+        """Delete blobs no path refers to any more; returns how many"""
+        with self._lock:
+            referenced = set(self._index.values())
+        removed = 0
+        objects = os.path.join(self.directory, OBJECTS_DIR)
+        for prefix in os.listdir(objects):
+            folder = os.path.join(objects, prefix)
+            for name in os.listdir(folder):
+                if prefix + name not in referenced and not name.endswith(".tmp"):
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+        return removed
+
+    def status(self):
+        with self._lock:
+            shas = set(self._index.values())
+            files = len(self._index)
+        present = [sha for sha in shas if self.has_blob(sha)]
+        return {
+            "files": files,
+            "blobs": len(present),
+            "bytes": sum(os.path.getsize(self._object_path(sha)) for sha in present),
+        }
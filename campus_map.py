@@ -0,0 +1,169 @@
+import time
+
+import metrics
+from lazy_imports import lazy_import
+
+# Layout and figure building for the full campus network view. Kept free of
+# Streamlit so it can be benchmarked and reused outside the app.
+
+
+def compute_network_layout(nav_data):
+    """Layout graph, node positions and edge distances for the campus network"""
+    nx = lazy_import("networkx")
+    
+    # Create NetworkX graph for layout calculation
+    G = nx.Graph()
+    
+    # Add nodes
+    for node_name in nav_data['nodes']:
+        G.add_node(node_name)
+    
+    # Add edges with weights
+    edge_info = {}
+    for conn, details in nav_data['connections'].items():
+        source = details['from']
+        target = details['to']
+        path_key = details['path_key']
+        
+        if path_key in nav_data['nodes'][source]:
+            distance = nav_data['nodes'][source][path_key]['distance']
+            G.add_edge(source, target, weight=distance)
+            edge_info[(source, target)] = distance
+    
+    # Calculate layout
+    with metrics.REGISTRY.timer("graph_layout"):
+        pos = nx.spring_layout(G, k=3, iterations=50)
+    
+    return G, pos, edge_info
+
+
+def build_network_figure(G, pos, edge_info):
+    """Plotly figure of the campus network for a computed layout"""
+    go = lazy_import("plotly.graph_objects")
+    figure_started = time.perf_counter()
+    
+    # Create edge traces
+    edge_x = []
+    edge_y = []
+    edge_info_text = []
+    
+    for edge in G.edges():
+        x0, y0 = pos[edge[0]]
+        x1, y1 = pos[edge[1]]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+        
+        # Add distance label at midpoint
+        mid_x, mid_y = (x0 + x1) / 2, (y0 + y1) / 2
+        distance = edge_info.get(edge, edge_info.get((edge[1], edge[0]), 0))
+        edge_info_text.append((mid_x, mid_y, f"{distance}ft"))
+    
+    edge_trace = go.Scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=2, color='#4CAF50'),
+        hoverinfo='none',
+        mode='lines'
+    )
+    
+    # Create node traces
+    node_x = []
+    node_y = []
+    node_text = []
+    node_info = []
+    
+    for node in G.nodes():
+        x, y = pos[node]
+        node_x.append(x)
+        node_y.append(y)
+        node_text.append(node)
+        
+        # Create hover info
+        adjacencies = list(G.neighbors(node))
+        node_info.append(f'Node: {node}<br>Connections: {len(adjacencies)}<br>Connected to: {", ".join(adjacencies)}')
+    
+    node_trace = go.Scatter(
+        x=node_x, y=node_y,
+        mode='markers+text',
+        hoverinfo='text',
+        text=node_text,
+        textposition="middle center",
+        hovertext=node_info,
+        marker=dict(
+            showscale=False,
+            color='#2196F3',
+            size=30,
+            line=dict(width=2, color='#1976D2')
+        )
+    )
+    
+    # Create distance label traces
+    label_traces = []
+    for mid_x, mid_y, label in edge_info_text:
+        label_trace = go.Scatter(
+            x=[mid_x], y=[mid_y],
+            mode='text',
+            text=[label],
+            textfont=dict(size=10, color='#333333'),
+            showlegend=False,
+            hoverinfo='none'
+        )
+        label_traces.append(label_trace)
+    
+    # Create figure
+    fig_data = [edge_trace, node_trace] + label_traces
+    
+    fig = go.Figure(
+        data=fig_data,
+        layout=go.Layout(
+            title=dict(
+                text="Campus Network Graph",
+                font=dict(size=20),
+                x=0.5
+            ),
+            showlegend=False,
+            hovermode='closest',
+            margin=dict(b=20, l=5, r=5, t=60),
+            annotations=[
+                dict(
+                    text="Campus Network Graph - Interactive View",
+                    showarrow=False,
+                    xref="paper", yref="paper",
+                    x=0.5, y=-0.05,
+                    xanchor='center',
+                    font=dict(size=12, color='#666666')
+                )
+            ],
+            xaxis=dict(
+                showgrid=False, 
+                zeroline=False, 
+                showticklabels=False,
+                scaleanchor="y",
+                scaleratio=1
+            ),
+            yaxis=dict(
+                showgrid=False, 
+                zeroline=False, 
+                showticklabels=False
+            ),
+            plot_bgcolor='#f8f9fa',
+            paper_bgcolor='white',
+            # Configure zoom limits
+            dragmode='pan',
+            # Set zoom range
+        )
+    )
+    
+    # Update layout with zoom constraints
+    fig.update_layout(
+        xaxis=dict(
+            range=[min(node_x) - 0.5, max(node_x) + 0.5],
+            fixedrange=False
+        ),
+        yaxis=dict(
+            range=[min(node_y) - 0.5, max(node_y) + 0.5],
+            fixedrange=False
+        )
+    )
+    
+    metrics.REGISTRY.observe("graph_figure", time.perf_counter() - figure_started)
+    return fig
@@ -0,0 +1,79 @@
+import json
+import time
+import uuid
+
+# Temporary closures of connections and nodes (events, repairs, locked
+# doors). They are stored in their own file, apart from nav_data, and only
+# act as a mask while routes are searched: closing or reopening something
+# rewrites no navigation data and invalidates no compiled graph,
+# contraction hierarchy or zone shard. Every closure expires on its own.
+
+FILE_NAME = "closures.json"
+KINDS = ("connection", "node")
+
+
+def new_closure(kind, key, until, reason="", now=None):
+    if kind not in KINDS:
+        raise ValueError(f"unknown closure kind: {kind}")
+    now = time.time() if now is None else now
+    if until <= now:
+        raise ValueError("closure must end in the future")
+    return {
+        "id": uuid.uuid4().hex[:12],
+        "kind": kind,
+        "key": key,
+        "until": float(until),
+        "reason": reason,
+        "created": now,
+    }
+
+
+def parse(content):
+    return json.loads(content).get('closures', []) if content else []
+
+
+def encode(closures):
+    return json.dumps({"closures": closures}, indent=2, sort_keys=True)
+
+
+def active(closures, now=None):
+    """Closures that have not expired yet"""
+    now = time.time() if now is None else now
+    return [closure for closure in closures if closure['until'] > now]
+
+
+class ClosureSet:
+    """Connection keys and node names closed at one moment"""
+
+    def __init__(self, closures=(), now=None):
+        self.connections = set()
+        self.nodes = set()
+        for closure in active(closures, now):
+            (self.connections if closure['kind'] == "connection" else self.nodes).add(closure['key'])
+        # Connection keys are "from::path_key::to"
+        self._pairs = {(key.split("::")[0], key.split("::")[-1]) for key in self.connections}
+
+    def __bool__(self):
+        return bool(self.connections or self.nodes)
+
+    @property
+    def key(self):
+        """Hashable identity, for caching results computed under these closures"""
+        return frozenset(self.connections), frozenset(self.nodes)
+
+    def __len__(self):
+        return len(self.connections) + len(self.nodes)
+
+    def closes(self, conn_key, details):
+        """Whether the connection is closed, directly or through one of its nodes"""
+        return conn_key in self.connections or details['from'] in self.nodes or details['to'] in self.nodes
+
+    def avoided_by(self, path):
+        """Whether a route found without closures is still open
+
+        Conservative: a pair of nodes joined by a closed connection counts as
+        blocked even if a parallel connection between them is open.
+        """
+        if any(node in self.nodes for node in path):
+            return False
+        return not any(pair in self._pairs for pair in zip(path, path[1:]))
@@ -0,0 +1,218 @@
+import heapq
+
+import metrics
+
+# Contraction hierarchy over the route graph. Preprocessing removes
+# ("contracts") nodes one at a time, least important first, and adds a
+# shortcut edge wherever that would break a shortest path; each shortcut
+# remembers the node it skips. A query then only runs two small Dijkstra
+# searches (forward from the start, backward from the end) that only move
+# towards more important nodes, and unpacks the shortcuts on the result
+# back into the original connections.
+
+WITNESS_SETTLE_LIMIT = 50  # Nodes a witness search may settle before giving up
+REORDER_TOLERANCE = 0  # Lazy updates: re-queue a node if its priority grew by more
+
+
+def compile_graph(nav_data):
+    """Node names and out-edges [{target: distance}], keeping the shortest parallel edge"""
+    names = list(nav_data['nodes'])
+    index = {name: idx for idx, name in enumerate(names)}
+    out_edges = [{} for _ in names]
+    for details in nav_data['connections'].values():
+        source, target = index.get(details['from']), index.get(details['to'])
+        path_data = nav_data['nodes'].get(details['from'], {}).get(details['path_key'])
+        if source is None or target is None or path_data is None or source == target:
+            continue
+        distance = float(path_data['distance'])
+        if distance < out_edges[source].get(target, float("inf")):
+            out_edges[source][target] = distance
+    return names, out_edges
+
+
+class _Contractor:
+    """Mutable graph state while the hierarchy is being built"""
+
+    def __init__(self, out_edges):
+        count = len(out_edges)
+        self.out = [dict(edges) for edges in out_edges]
+        self.inc = [{} for _ in range(count)]
+        for source, edges in enumerate(self.out):
+            for target, weight in edges.items():
+                self.inc[target][source] = weight
+        self.middle = {}
+        self.contracted = [False] * count
+        self.contracted_neighbours = [0] * count
+
+    def _witness(self, source, skip, limit):
+        """Distances from source without passing through skip, up to limit"""
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        while heap and settled < WITNESS_SETTLE_LIMIT:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            if d > limit:
+                break
+            settled += 1
+            for target, weight in self.out[node].items():
+                if target == skip or self.contracted[target]:
+                    continue
+                candidate = d + weight
+                if candidate < dist.get(target, float("inf")):
+                    dist[target] = candidate
+                    heapq.heappush(heap, (candidate, target))
+        return dist
+
+    def shortcuts(self, node):
+        """Shortcuts needed to contract node, as (source, target, weight)"""
+        incoming = [(s, w) for s, w in self.inc[node].items() if not self.contracted[s]]
+        outgoing = [(t, w) for t, w in self.out[node].items() if not self.contracted[t]]
+        if not incoming or not outgoing:
+            return []
+        max_out = max(w for _, w in outgoing)
+        needed = []
+        for source, in_weight in incoming:
+            dist = self._witness(source, node, in_weight + max_out)
+            for target, out_weight in outgoing:
+                if target == source:
+                    continue
+                via = in_weight + out_weight
+                if dist.get(target, float("inf")) > via:
+                    needed.append((source, target, via))
+        return needed
+
+    def priority(self, node):
+        degree = sum(not self.contracted[s] for s in self.inc[node]) + \
+            sum(not self.contracted[t] for t in self.out[node])
+        return len(self.shortcuts(node)) - degree + self.contracted_neighbours[node]
+
+    def contract(self, node):
+        for source, target, weight in self.shortcuts(node):
+            if weight < self.out[source].get(target, float("inf")):
+                self.out[source][target] = weight
+                self.inc[target][source] = weight
+                self.middle[(source, target)] = node
+        self.contracted[node] = True
+        for neighbour in set(self.inc[node]) | set(self.out[node]):
+            self.contracted_neighbours[neighbour] += 1
+
+
+class ContractionHierarchy:
+    """Preprocessed graph answering shortest-route queries between node names"""
+
+    def __init__(self, names, up_out, up_in, middle):
+        self.names = names
+        self._index = {name: idx for idx, name in enumerate(names)}
+        self._up_out = up_out
+        self._up_in = up_in
+        self._middle = middle
+
+    @classmethod
+    def build(cls, nav_data):
+        return cls.from_graph(*compile_graph(nav_data))
+
+    @classmethod
+    def from_graph(cls, names, out_edges):
+        """Contract a graph from compile_graph (slow; run it in the background)"""
+        with metrics.REGISTRY.timer("route_hierarchy_build"):
+            graph = _Contractor(out_edges)
+            heap = [(graph.priority(node), node) for node in range(len(names))]
+            heapq.heapify(heap)
+            rank = [0] * len(names)
+            order = 0
+            while heap:
+                _, node = heapq.heappop(heap)
+                if graph.contracted[node]:
+                    continue
+                # Priorities go stale as neighbours are contracted; re-check lazily
+                current = graph.priority(node)
+                if heap and current > heap[0][0] + REORDER_TOLERANCE:
+                    heapq.heappush(heap, (current, node))
+                    continue
+                graph.contract(node)
+                rank[node] = order
+                order += 1
+
+            up_out = [[] for _ in names]
+            up_in = [[] for _ in names]
+            for source, edges in enumerate(graph.out):
+                for target, weight in edges.items():
+                    if rank[target] > rank[source]:
+                        up_out[source].append((target, weight))
+                    else:
+                        up_in[target].append((source, weight))
+        metrics.REGISTRY.set_gauge("route_hierarchy_shortcuts", len(graph.middle))
+        return cls(names, up_out, up_in, graph.middle)
+
+    @property
+    def shortcut_count(self):
+        return len(self._middle)
+
+    def _unpack(self, source, target):
+        path = [source]
+        stack = [(source, target)]
+        while stack:
+            u, v = stack.pop()
+            middle = self._middle.get((u, v))
+            if middle is None:
+                path.append(v)
+            else:
+                stack.append((middle, v))
+                stack.append((u, middle))
+        return path
+
+    def route(self, start, end):
+        """Shortest route as (path of node names, distance, nodes settled)
+
+        The path is None if end cannot be reached.
+        """
+        source, target = self._index.get(start), self._index.get(end)
+        if source is None or target is None:
+            return None, 0, 0
+        if source == target:
+            return [start], 0.0, 0
+        with metrics.REGISTRY.timer("route_hierarchy_query"):
+            dist = ({source: 0.0}, {target: 0.0})
+            prev = ({}, {})
+            heaps = ([(0.0, source)], [(0.0, target)])
+            edges = (self._up_out, self._up_in)
+            best, meeting = float("inf"), None
+            settled = 0
+            while heaps[0] or heaps[1]:
+                for side in (0, 1):
+                    heap = heaps[side]
+                    if not heap:
+                        continue
+                    if heap[0][0] >= best:
+                        heap.clear()
+                        continue
+                    d, node = heapq.heappop(heap)
+                    if d > dist[side][node]:
+                        continue
+                    settled += 1
+                    other = dist[1 - side].get(node)
+                    if other is not None and d + other < best:
+                        best, meeting = d + other, node
+                    for neighbour, weight in edges[side][node]:
+                        candidate = d + weight
+                        if candidate < dist[side].get(neighbour, float("inf")):
+                            dist[side][neighbour] = candidate
+                            prev[side][neighbour] = node
+                            heapq.heappush(heap, (candidate, neighbour))
+            if meeting is None:
+                return None, 0, settled
+
+            # Hierarchy edges from start up to the meeting node and down to the end
+            up = [meeting]
+            while up[-1] != source:
+                up.append(prev[0][up[-1]])
+            down = [meeting]
+            while down[-1] != target:
+                down.append(prev[1][down[-1]])
+            hops = up[::-1] + down[1:]
+            path = [source]
+            for u, v in zip(hops, hops[1:]):
+                path.extend(self._unpack(u, v)[1:])
+        return [self.names[idx] for idx in path], best, settled
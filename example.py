@@ -1,53 +1,104 @@
 import streamlit as st
-import networkx as nx
 import json
 import base64
 import requests
-import qrcode
-from PIL import Image
 import io
+import hashlib
+import os
 import tempfile
+import threading
 import time
+from collections import deque
 
-from streamlit_agraph import agraph, Node, Edge, Config
-from streamlit_qrcode_scanner import qrcode_scanner
-
-import plotly.graph_objects as go
-
-import numpy as np
+import campus_map
+import closures
+import contraction
+import github_store
+import graph_integrity
+import metrics
+import nav_store
+import rate_limiter
+import repo_sweep
+import route_cache
+import routing
+import search_index
+import snapshot_sync
+import static_export
+import step_cards
+import zones
+from blob_cache import BlobCache
+from lazy_imports import lazy_import, import_report
+from write_queue import WriteBehindQueue
 
 # GitHub Configuration
 GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN", "")  # Set in Streamlit secrets
 GITHUB_REPO = st.secrets.get("GITHUB_REPO", "")   # Format: "username/repository"
 BASE_PATH = "campus_navigator"
+NAV_DATA_PATH = f"{BASE_PATH}/nav_data.json"
+NAV_LOG_PATH = f"{BASE_PATH}/{nav_store.LOG_DIR}"
+SAVE_RETRIES = 3
+LOG_HISTORY = 500  # Committed log records kept in memory for syncing sessions
+STRUCTURE_RETRY_SECONDS = 60
+STRUCTURE_MARKER_PATH = (
+    f"{tempfile.gettempdir()}/campus_navigator_structure_"
+    f"{hashlib.sha1(GITHUB_REPO.encode()).hexdigest()[:12]}.ok"
+)
+WRITE_SPOOL_PATH = f"{tempfile.gettempdir()}/campus_navigator_pending_writes.json"
+PREVIEW_CACHE_TTL = 3600
+PREVIEW_CACHE_ENTRIES = 500
+BLOB_CACHE_DIR = snapshot_sync.default_cache_dir(GITHUB_REPO)
+SNAPSHOT_SYNC_SECONDS = 300  # Tree listing interval; only changed blobs are downloaded
+SEARCH_RESULTS = 50  # Matches offered in a node picker
+ZONES_PATH = f"{BASE_PATH}/zones"
+ZONE_INDEX_PATH = f"{ZONES_PATH}/{zones.INDEX_FILE}"
+ZONE_REFRESH_SECONDS = 30  # How often visitor routing checks the log for new records
+ROUTE_HIERARCHY_MIN_NODES = 2000  # Smaller campuses route fast enough without preprocessing
+ALTERNATIVE_ROUTES = 3  # Routes offered when visitors ask for alternatives
+ROUTE_CACHE_ENTRIES = 2000  # Resolved routes kept for popular start/destination pairs
+STEP_CARD_ENTRIES = 1000  # Rendered direction steps (text plus image thumbnails) kept
+CLOSURES_PATH = f"{BASE_PATH}/{closures.FILE_NAME}"
+CLOSURE_REFRESH_SECONDS = 30  # How often routing re-reads the closure file
+INTEGRITY_REFRESH_SECONDS = 5  # How often the Statistics tab redraws the connectivity checks
+INTEGRITY_LIST_LIMIT = 100  # Rows shown per connectivity finding
+
+GITHUB_API_URL = st.secrets.get("GITHUB_API_URL", github_store.DEFAULT_API_URL)
 
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+# Partial reruns for independent parts of a page (st.experimental_fragment before 1.37)
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
 # Helper functions for GitHub API
+@st.cache_resource
+def get_github_store():
+    """Process-wide GitHub client (connection pools, local blob snapshot)"""
+    return github_store.GitHubStore(
+        GITHUB_TOKEN, GITHUB_REPO, BASE_PATH, GITHUB_API_URL,
+        blob_cache=BlobCache(BLOB_CACHE_DIR)
+    )
+
+GITHUB = get_github_store()
+
+@st.cache_resource
+def get_snapshot_syncer():
+    """Background sync of the repository snapshot into the local blob cache"""
+    return snapshot_sync.SnapshotSyncer(GITHUB, GITHUB.blob_cache, SNAPSHOT_SYNC_SECONDS)
+
+def github_contents_request(method, path, **kwargs):
+    """Call the GitHub contents API, recording latency and rate-limit headers"""
+    return GITHUB.request(method, path, **kwargs)
+
 def get_github_files(path):
     """Get list of files in a GitHub directory"""
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path}"
-    response = requests.get(url, headers=HEADERS)
+    response = github_contents_request("GET", path)
     return response.json() if response.status_code == 200 else []
 
+def put_file(file_path, content, message, is_binary=False, sha=None):
+    """Create or update a file in GitHub repository, returning the API response"""
+    return GITHUB.put(file_path, content, message, sha=sha)
+
 def create_file(file_path, content, message, is_binary=False):
     """Create a file in GitHub repository"""
     try:
-        if is_binary:
-            encoded_content = base64.b64encode(content).decode()
-        else:
-            encoded_content = base64.b64encode(content.encode()).decode()
-        
-        data = {
-            "message": message,
-            "content": encoded_content
-        }
-        response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            json=data,
-            headers=HEADERS
-        )
-        return response.status_code == 201
+        return put_file(file_path, content, message, is_binary).status_code == 201
     except Exception as e:
         st.error(f"Error creating file: {str(e)}")
         return False
@@ -56,93 +107,52 @@ def update_file(file_path, content, message, is_binary=False):
     """Update an existing file in GitHub repository"""
     try:
         # Get current file SHA
-        response = requests.get(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            headers=HEADERS
-        )
+        response = github_contents_request("GET", file_path)
         
         if response.status_code != 200:
             return create_file(file_path, content, message, is_binary)
         
         sha = response.json()['sha']
-        
-        if is_binary:
-            encoded_content = base64.b64encode(content).decode()
-        else:
-            encoded_content = base64.b64encode(content.encode()).decode()
-        
-        data = {
-            "message": message,
-            "content": encoded_content,
-            "sha": sha
-        }
-        response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            json=data,
-            headers=HEADERS
-        )
-        return response.status_code == 200
+        return put_file(file_path, content, message, is_binary, sha=sha).status_code == 200
     except Exception as e:
         st.error(f"Error updating file: {str(e)}")
         return False
 
 def get_file_content(file_path, is_binary=False):
-    """Get file content from GitHub repository"""
+    """Get file content from GitHub repository
+
+    Binary files come from the local snapshot when it has them. Falls back
+    to the last copy read by this process while the API budget is
+    exhausted, and returns None (without an error) if there is none.
+    """
     try:
-        response = requests.get(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            headers=HEADERS
-        )
-        if response.status_code == 200:
-            content = response.json()['content']
-            decoded = base64.b64decode(content)
-            return decoded if is_binary else decoded.decode()
+        content, _ = GITHUB.get_cached(file_path) if is_binary else GITHUB.get(file_path)
+        if content is None:
+            return None
+        return content if is_binary else content.decode()
+    except rate_limiter.RateLimited:
         return None
     except Exception as e:
         st.error(f"Error getting file content: {str(e)}")
         return None
 
-def delete_file(file_path):
+def delete_file(file_path, sha=None):
     """Delete a file from GitHub repository"""
     try:
-        # Get current file SHA
-        response = requests.get(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            headers=HEADERS
-        )
-        
-        if response.status_code != 200:
-            return True  # File doesn't exist, consider it deleted
-        
-        sha = response.json()['sha']
-        
-        data = {
-            "message": f"Delete {file_path}",
-            "sha": sha
-        }
-        response = requests.delete(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            json=data,
-            headers=HEADERS
-        )
-        return response.status_code == 200
+        return GITHUB.delete(file_path, sha)
     except Exception as e:
         st.error(f"Error deleting file: {str(e)}")
         return False
 
 def delete_folder_contents(folder_path):
-    """Delete all contents of a folder recursively"""
+    """Delete all contents of a folder, subfolders included, in one commit"""
     try:
-        contents = get_github_files(folder_path)
-        success = True
-        for item in contents:
-            if item['type'] == 'file':
-                if not delete_file(item['path']):
-                    success = False
-            elif item['type'] == 'dir':
-                if not delete_folder_contents(item['path']):
-                    success = False
-        return success
+        tree = GITHUB.get_tree()
+        if tree is None:
+            return False
+        prefix = f"{folder_path.rstrip('/')}/"
+        paths = [path for path in tree if path.startswith(prefix)]
+        return not paths or GITHUB.delete_many(paths, f"Delete contents of {folder_path}") is not None
     except Exception as e:
         st.error(f"Error deleting folder contents: {str(e)}")
         return False
@@ -150,26 +160,26 @@ def delete_folder_contents(folder_path):
 def initialize_github_structure():
     """Initialize the required folder structure on GitHub"""
     try:
-        # Check if base structure exists
+        # Check if base structure exists; one listing shows both files and folders
         base_files = get_github_files(BASE_PATH)
+        existing_dirs = {f['name'] for f in base_files if f['type'] == 'dir'}
         
         # Create nav_data.json if it doesn't exist
         nav_data_exists = any(f['name'] == 'nav_data.json' for f in base_files if f['type'] == 'file')
         if not nav_data_exists:
             initial_data = {"nodes": {}, "connections": {}}
-            create_file(f"{BASE_PATH}/nav_data.json", json.dumps(initial_data, indent=2), "Initialize navigation data")
+            create_file(NAV_DATA_PATH, json.dumps(initial_data, indent=2), "Initialize navigation data")
             st.info("Created initial nav_data.json")
         
         # Create placeholder files for directories (GitHub doesn't store empty directories)
         images_path = f"{BASE_PATH}/images/.gitkeep"
         qr_path = f"{BASE_PATH}/qrcodes/.gitkeep"
         
-        # Check if directories exist by trying to access them
-        if not get_github_files(f"{BASE_PATH}/images"):
+        if 'images' not in existing_dirs:
             create_file(images_path, "# Placeholder for images directory", "Create images directory")
             st.info("Created images directory")
             
-        if not get_github_files(f"{BASE_PATH}/qrcodes"):
+        if 'qrcodes' not in existing_dirs:
             create_file(qr_path, "# Placeholder for QR codes directory", "Create QR codes directory")
             st.info("Created QR codes directory")
             
@@ -178,40 +188,491 @@ def initialize_github_structure():
         st.error(f"Error initializing GitHub structure: {str(e)}")
         return False
 
+@st.cache_resource
+def get_structure_status():
+    """Process-wide result of the GitHub structure check"""
+    return {"ready": False, "checked_at": None, "lock": threading.Lock()}
+
+def ensure_github_structure(force=False):
+    """Verify the GitHub folder structure once per process (and per deploy)
+
+    The result is cached in the process and in a marker file, so new
+    sessions never spend API calls on it. A failed check is retried after
+    STRUCTURE_RETRY_SECONDS. `force` re-runs the check, e.g. when
+    nav_data.json turned out to be missing.
+    """
+    status = get_structure_status()
+    if status['ready'] and not force:
+        return True
+    with status['lock']:
+        if status['ready'] and not force:
+            return True
+        if not force and os.path.exists(STRUCTURE_MARKER_PATH):
+            status['ready'] = True
+            return True
+        if status['checked_at'] and time.time() - status['checked_at'] < STRUCTURE_RETRY_SECONDS:
+            return status['ready']
+        
+        status['ready'] = initialize_github_structure()
+        status['checked_at'] = time.time()
+        if status['ready']:
+            try:
+                with open(STRUCTURE_MARKER_PATH, "w") as f:
+                    f.write(time.strftime("%Y-%m-%d %H:%M:%S"))
+            except OSError:
+                pass
+        return status['ready']
+
+def readiness_status():
+    """Health/ready report served at ?health=1"""
+    structure = get_structure_status()
+    writer = get_log_writer()
+    queue_status = get_write_queue().status()
+    campus = get_zone_view()['campus']
+    configured = bool(GITHUB_TOKEN and GITHUB_REPO)
+    ready = configured and (structure['ready'] or os.path.exists(STRUCTURE_MARKER_PATH))
+    return {
+        "status": "ready" if ready else "starting",
+        "github_configured": configured,
+        "structure_verified": ready,
+        "structure_checked_at": structure['checked_at'],
+        "nav_log_seq": writer['seq'] if writer['data'] is not None else None,
+        "pending_writes": queue_status['pending'],
+        "github_budget_remaining": GITHUB.scheduler.status()['remaining'],
+        "snapshot_files": len(GITHUB.blob_cache.index()),
+        "zone_shards_seq": campus.seq if campus else None,
+        "last_write_error": queue_status['last_error']
+    }
+
 # Data management functions
-def load_navigation_data():
-    """Load navigation data from GitHub"""
+def _set_sync_state(data, snapshot_seq, seq):
+    """Remember which persisted version the session copy of nav_data is based on"""
+    st.session_state.nav_sync = {
+        "snapshot_seq": snapshot_seq,
+        "seq": seq,
+        "base": nav_store.entry_fingerprints(data)
+    }
+
+def _get_sync_state():
+    if 'nav_sync' not in st.session_state:
+        _set_sync_state(nav_store.empty_navigation_data(), 0, 0)
+    return st.session_state.nav_sync
+
+def list_navigation_log(after_seq):
+    """List operation log records newer than after_seq, oldest first"""
+    return GITHUB.list_navigation_log(after_seq)
+
+def read_navigation_data():
+    """Read nav_data.json and replay its operation log
+
+    Returns (data, snapshot_seq, seq, snapshot_sha), or None if the
+    snapshot is missing.
+    """
+    return GITHUB.read_navigation_data()
+
+def load_navigation_data(refresh=False):
+    """Load navigation data for this session
+
+    Sessions start from a copy of this process's replica; GitHub (snapshot
+    plus operation log) is only read when there is no replica yet or
+    refresh is set. A failed read serves the replica if there is one and
+    otherwise stops the script, rather than returning empty data a later
+    save would be diffed against.
+    """
+    writer = get_log_writer()
+    if writer['data'] is not None and not refresh:
+        return _copy_log_replica(writer)
     try:
-        data_path = f"{BASE_PATH}/nav_data.json"
-        content = get_file_content(data_path)
-        if content:
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                st.error("Error parsing navigation data")
-                return {"nodes": {}, "connections": {}}
-        else:
-            # Try to initialize structure if data doesn't exist
-            st.warning("Navigation data not found. Initializing...")
-            if initialize_github_structure():
-                return {"nodes": {}, "connections": {}}
-            else:
-                st.error("Failed to initialize GitHub structure")
-                return {"nodes": {}, "connections": {}}
+        loaded = read_navigation_data()
+    except json.JSONDecodeError:
+        return _navigation_data_unavailable(writer, "Error parsing navigation data")
+    except rate_limiter.RateLimited as e:
+        return _navigation_data_unavailable(writer, f"⏳ {e}. Please try again shortly.")
     except Exception as e:
-        st.error(f"Error loading navigation data: {str(e)}")
-        return {"nodes": {}, "connections": {}}
+        return _navigation_data_unavailable(writer, f"Error loading navigation data: {str(e)}")
+    
+    if loaded:
+        if _install_log_replica(writer, loaded, replace=False):
+            return _copy_log_replica(writer)
+        data, snapshot_seq, seq, _ = loaded
+        apply_pending_writes(data)
+        _set_sync_state(data, snapshot_seq, seq)
+        with writer['lock']:
+            if seq >= writer['seq']:
+                # At least as new as the replica: only later records need pulling in
+                st.session_state.nav_sync['epoch'] = writer['epoch']
+        return data
+    else:
+        # Try to initialize structure if data doesn't exist
+        st.warning("Navigation data not found. Initializing...")
+        if ensure_github_structure(force=True):
+            data = nav_store.empty_navigation_data()
+            _set_sync_state(data, 0, 0)
+            return data
+        return _navigation_data_unavailable(writer, "Failed to initialize GitHub structure")
 
-def save_navigation_data(data):
-    """Save navigation data to GitHub"""
+def _navigation_data_unavailable(writer, message):
+    """Fall back to the replica after a failed read, or stop the script"""
+    if writer['data'] is not None:
+        return _copy_log_replica(writer)
+    st.error(message)
+    st.stop()
+
+def save_navigation_data(data, changed=None):
+    """Save navigation data to GitHub
+
+    Only the entries that differ from the last loaded/saved version are
+    handed to the write-behind worker, which uploads them as one operation
+    log record. `changed` optionally lists the (section, key) pairs that
+    were touched so the rest of the data is not compared at all.
+    """
     try:
-        data_path = f"{BASE_PATH}/nav_data.json"
-        content = json.dumps(data, indent=2)
-        return update_file(data_path, content, "Update navigation data")
+        sync = _get_sync_state()
+        ops = nav_store.diff_navigation_data(sync['base'], data, changed)
+        if not ops:
+            return True
+        
+        queue = get_write_queue()
+        if len(ops) > nav_store.MAX_LOG_OPS:
+            # Replaces everything, so queued entry writes are superseded
+            for key, _ in queue.items():
+                if key[0] == "nav":
+                    queue.discard(key)
+            queue.submit(("snapshot",), {"data": json.loads(json.dumps(data))})
+            sync['base'] = nav_store.entry_fingerprints(data)
+        else:
+            for op in ops:
+                queue.submit(("nav", op['section'], op['key']), op)
+            nav_store.update_fingerprints(sync['base'], ops)
+        return True
     except Exception as e:
         st.error(f"Error saving navigation data: {str(e)}")
         return False
 
+# Write-behind persistence (runs on the background worker)
+@st.cache_resource
+def get_log_writer():
+    """Process-wide replica of the persisted navigation data at the log head
+
+    The write-behind worker rebases queued edits onto this replica before
+    appending them, and sessions pull committed changes from its history.
+    """
+    return {
+        "lock": threading.Lock(),
+        "data": None,
+        "seq": 0,
+        "snapshot_seq": 0,
+        "snapshot_sha": None,
+        "pruned_seq": 0,  # Log records up to here are known to be deleted
+        "epoch": 0,
+        "history": deque(maxlen=LOG_HISTORY),
+        "merged": 0,
+        "conflicts": 0
+    }
+
+def _install_log_replica(writer, loaded, replace=True):
+    """Make a read_navigation_data() result the replica; False if one was kept"""
+    data, snapshot_seq, seq, sha = loaded
+    with writer['lock']:
+        if not replace and writer['data'] is not None:
+            return False
+        writer['data'] = json.loads(json.dumps(data))
+        writer['snapshot_seq'] = snapshot_seq
+        writer['seq'] = seq
+        writer['snapshot_sha'] = sha
+        writer['pruned_seq'] = max(0, snapshot_seq - nav_store.COMPACT_EVERY)
+        writer['epoch'] += 1
+        writer['history'].clear()
+    get_route_cache().clear()
+    return True
+
+def _reload_log_replica(writer):
+    loaded = read_navigation_data()
+    return bool(loaded) and _install_log_replica(writer, loaded)
+
+def _copy_log_replica(writer):
+    """Session copy of the replica, with this process's queued edits applied"""
+    with writer['lock']:
+        data = json.loads(json.dumps(writer['data']))
+        seq, snapshot_seq, epoch = writer['seq'], writer['snapshot_seq'], writer['epoch']
+    apply_pending_writes(data)
+    _set_sync_state(data, snapshot_seq, seq)
+    st.session_state.nav_sync['epoch'] = epoch
+    return data
+
+def _catch_up_log_replica(writer):
+    """Apply records appended by other processes since the replica's head
+
+    Returns False when GitHub could not be read (or the budget is spent);
+    the queued edits then wait for the next batch.
+    """
+    try:
+        return _apply_new_log_records(writer)
+    except (requests.RequestException, rate_limiter.RateLimited, github_store.LogGap):
+        return False
+
+def _apply_new_log_records(writer):
+    if writer['data'] is None:
+        return _reload_log_replica(writer)
+    records = list_navigation_log(writer['seq'])
+    if records and records[0][0] != writer['seq'] + 1:
+        # Records we never saw were already compacted away
+        return _reload_log_replica(writer)
+    for seq, item in records:
+        if seq != writer['seq'] + 1:
+            return False  # The listing skips a record; try again later
+        content, _ = GITHUB.get(item['path'])
+        if content is None:
+            return False
+        ops = nav_store.parse_log_entry(content.decode())
+        with writer['lock']:
+            get_route_cache().apply_record(seq, ops, writer['data'])
+            nav_store.apply_operations(writer['data'], ops)
+            writer['seq'] = seq
+            writer['history'].append((seq, ops))
+        update_search_index(ops)
+        update_graph_integrity(ops)
+        update_zoned_campus(seq, ops)
+    return True
+
+def _prune_navigation_log(writer, seq):
+    """Delete log records up to seq, in one commit
+
+    Compaction passes the previous snapshot's seq, so the records it just
+    folded stay for one more round. A replica that fell behind the new
+    snapshot then still finds them (or a gap before them) when it catches
+    up, and its next append conflicts with a taken sequence number instead
+    of landing below the snapshot, where every reader would skip it.
+    """
+    if seq <= writer['pruned_seq']:
+        return
+    paths = [f"{NAV_LOG_PATH}/{nav_store.log_file_name(record_seq)}"
+             for record_seq in range(writer['pruned_seq'] + 1, seq + 1)]
+    message = f"Prune navigation log up to record {seq}"
+    if GITHUB.delete_many(paths, message) is None:
+        # Some record may be gone already; delete the ones still listed
+        listed = [item['path'] for record_seq, item in list_navigation_log(writer['pruned_seq'])
+                  if record_seq <= seq]
+        if listed and GITHUB.delete_many(listed, message) is None:
+            return
+    writer['pruned_seq'] = seq
+
+def _write_navigation_snapshot(data, writer, message):
+    """Write data as the snapshot at the replica's head, guarded by the snapshot SHA"""
+    response = put_file(
+        NAV_DATA_PATH,
+        nav_store.encode_snapshot(data, writer['seq']),
+        message,
+        sha=writer['snapshot_sha']
+    )
+    if response.status_code in (200, 201):
+        with writer['lock']:
+            folded = writer['snapshot_seq']
+            writer['snapshot_seq'] = writer['seq']
+            writer['snapshot_sha'] = response.json()['content']['sha']
+        write_zone_shards(data, writer['seq'])
+        _prune_navigation_log(writer, folded)
+        return True
+    if response.status_code in (409, 422):
+        # The snapshot changed since we read it; start over from GitHub
+        with writer['lock']:
+            writer['data'] = None
+    return False
+
+def compact_navigation_log(writer):
+    """Fold the operation log into nav_data.json"""
+    return _write_navigation_snapshot(writer['data'], writer, "Compact navigation data")
+
+def _commit_navigation_snapshot(data, writer):
+    for _ in range(SAVE_RETRIES):
+        if not _catch_up_log_replica(writer):
+            return False
+        if _write_navigation_snapshot(data, writer, "Replace navigation data"):
+            with writer['lock']:
+                writer['data'] = json.loads(json.dumps(data))
+                writer['epoch'] += 1
+                writer['history'].clear()
+            get_route_cache().clear()
+            return True
+    return False
+
+def _commit_navigation_ops(ops, writer):
+    for _ in range(SAVE_RETRIES):
+        if not _catch_up_log_replica(writer):
+            return False
+        
+        # Three-way merge each edit with whatever was committed since its base
+        record_ops = []
+        for op in ops:
+            current = writer['data'].get(op['section'], {}).get(op['key'])
+            rebased, conflicts = nav_store.rebase_operation(op, current)
+            writer['conflicts'] += conflicts
+            if rebased is not op:
+                writer['merged'] += 1
+            if rebased:
+                record_ops.append(rebased)
+        if not record_ops:
+            return True
+        
+        seq = writer['seq'] + 1
+        record = nav_store.encode_log_entry(seq, record_ops, time.strftime("%Y-%m-%d %H:%M:%S"))
+        response = put_file(
+            f"{NAV_LOG_PATH}/{nav_store.log_file_name(seq)}",
+            record,
+            f"Update navigation data ({len(record_ops)} changes)"
+        )
+        if response.status_code == 201:
+            record_ops = nav_store.parse_log_entry(record)
+            with writer['lock']:
+                get_route_cache().apply_record(seq, record_ops, writer['data'])
+                nav_store.apply_operations(writer['data'], record_ops)
+                writer['seq'] = seq
+                writer['history'].append((seq, record_ops))
+            update_search_index(record_ops)
+            update_graph_integrity(record_ops)
+            update_zoned_campus(seq, record_ops)
+            if seq - writer['snapshot_seq'] >= nav_store.COMPACT_EVERY:
+                compact_navigation_log(writer)
+            return True
+        if response.status_code != 422:
+            return False
+        # Another process appended this sequence number first; catch up and retry
+    return False
+
+def _commit_queued_file(path, content, message):
+    """Create or overwrite one file; returns None or the reason it failed
+
+    Runs on the write-behind worker, so failures are reported through the
+    queue status rather than st.error (there is no script run to show it).
+    """
+    try:
+        _, sha = GITHUB.get(path)
+        response = GITHUB.put(path, content, message, sha=sha)
+    except (requests.RequestException, rate_limiter.RateLimited) as e:
+        return f"{path}: {e}"
+    if response.status_code not in (200, 201):
+        return f"{path}: GitHub answered {response.status_code}"
+    return None
+
+def commit_pending_writes(batch, writer):
+    """Persist a batch of queued writes, returning {key: reason} for those that failed
+
+    Bulk uploads (e.g. regenerating every QR code) stay queued while the
+    API budget is low, so they never starve visitors of requests.
+    """
+    failed = {}
+    nav_keys, ops = [], []
+    with rate_limiter.priority(rate_limiter.ADMIN):
+        for key, payload in batch:
+            if key[0] == "snapshot":
+                if not _commit_navigation_snapshot(payload['data'], writer):
+                    failed[key] = "navigation snapshot not saved"
+            elif key[0] == "nav":
+                nav_keys.append(key)
+                ops.append(payload)
+            elif key[0] == "file":
+                level = rate_limiter.BULK if payload.get('bulk') else rate_limiter.ADMIN
+                if GITHUB.scheduler.budget_low(level):
+                    failed[key] = "uploads wait for the API budget"
+                    continue
+                content = base64.b64decode(payload['content'])
+                with rate_limiter.priority(level):
+                    reason = _commit_queued_file(key[1], content, payload['message'])
+                if reason:
+                    failed[key] = reason
+        if ops and not _commit_navigation_ops(ops, writer):
+            failed.update(dict.fromkeys(nav_keys, "navigation changes not saved"))
+    if writer['data'] is not None:
+        with writer['lock']:
+            schedule_route_hierarchy(writer['data'], (writer['epoch'], writer['seq']))
+    return failed
+
+def _coalesce_pending_writes(pending, new):
+    if new.get('op'):
+        return nav_store.coalesce_operations(pending, new)
+    return new
+
+@st.cache_resource
+def get_write_queue():
+    """Process-wide write-behind queue shared by all sessions"""
+    writer = get_log_writer()
+    return WriteBehindQueue(
+        lambda batch: commit_pending_writes(batch, writer),
+        spool_path=WRITE_SPOOL_PATH,
+        coalesce_fn=_coalesce_pending_writes
+    )
+
+def sync_session_with_log_writer():
+    """Pull edits committed by other sessions of this process into nav_data"""
+    writer = get_log_writer()
+    sync = _get_sync_state()
+    if writer['data'] is None:
+        return
+    
+    with writer['lock']:
+        if sync.get('epoch') == writer['epoch'] and writer['seq'] <= sync['seq']:
+            return
+        history = list(writer['history'])
+    
+    if sync.get('epoch') != writer['epoch'] or not history or history[0][0] > sync['seq'] + 1:
+        # Too far behind the in-process history: start from the replica
+        st.session_state.nav_data = _copy_log_replica(writer)
+        return
+    
+    queue = get_write_queue()
+    for seq, ops in history:
+        if seq <= sync['seq']:
+            continue
+        # Entries this process still has queued keep their newer local value
+        ops = [op for op in ops if queue.lookup(("nav", op['section'], op['key'])) is None]
+        ops = json.loads(json.dumps(ops))
+        nav_store.apply_operations(st.session_state.nav_data, ops)
+        nav_store.update_fingerprints(sync['base'], ops)
+        sync['seq'] = seq
+
+def apply_pending_writes(data):
+    """Overlay navigation changes that are queued but not yet durable"""
+    for key, payload in get_write_queue().items():
+        if key[0] == "snapshot":
+            data.clear()
+            data.update(json.loads(json.dumps(payload['data'])))
+        elif key[0] == "nav":
+            nav_store.apply_operations(data, [json.loads(json.dumps(payload))])
+
+def queue_file_write(file_path, content, message, bulk=False):
+    """Queue a binary file upload on the write-behind worker"""
+    payload = {"content": base64.b64encode(content).decode(), "message": message}
+    if bulk:
+        payload["bulk"] = True
+    get_write_queue().submit(("file", file_path), payload)
+
+def get_pending_file(file_path):
+    """Content of a queued file upload that is not yet durable, or None"""
+    payload = get_write_queue().lookup(("file", file_path))
+    return base64.b64decode(payload['content']) if payload else None
+
+def render_save_status():
+    """Show whether admin changes are durable or still pending"""
+    status = get_write_queue().status()
+    if status['pending']:
+        message = f"⏳ {status['pending']} change(s) pending upload"
+        if status['last_error']:
+            st.sidebar.warning(f"{message} — retrying ({status['last_error']})")
+        else:
+            st.sidebar.info(message)
+    elif status['last_commit_time']:
+        saved_at = time.strftime("%H:%M:%S", time.localtime(status['last_commit_time']))
+        st.sidebar.success(f"✅ All changes saved ({saved_at})")
+    
+    budget = GITHUB.scheduler.status()
+    if budget['deferring']:
+        reset_at = time.strftime("%H:%M", time.localtime(budget['reset_at']))
+        if "visitor" in budget['deferring']:
+            st.sidebar.warning(f"⏳ GitHub API budget exhausted — showing cached content until {reset_at}")
+        else:
+            st.sidebar.info(f"⏸️ GitHub API budget low ({budget['remaining']} left) — "
+                            f"{', '.join(budget['deferring'])} uploads wait until {reset_at}")
+
 def upload_image_to_github(uploaded_file, node_name, path_key):
     """Upload image to GitHub and return the path"""
     try:
@@ -227,23 +688,13 @@ def upload_image_to_github(uploaded_file, node_name, path_key):
         st.error(f"Error uploading image: {str(e)}")
         return None
 
-def get_image_from_github(image_path):
-    """Get image from GitHub repository"""
-    try:
-        image_data = get_file_content(image_path, is_binary=True)
-        if image_data:
-            return Image.open(io.BytesIO(image_data))
-        return None
-    except Exception as e:
-        st.error(f"Error loading image: {str(e)}")
-        return None
-
-def generate_and_save_qr(node_name):
+def generate_and_save_qr(node_name, bulk=False):
     """Generate QR code and save to GitHub"""
     try:
+        qrcode = lazy_import("qrcode")
         qr = qrcode.QRCode(
             version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            error_correction=lazy_import("qrcode.constants").ERROR_CORRECT_L,
             box_size=10,
             border=4,
         )
@@ -257,43 +708,89 @@ def generate_and_save_qr(node_name):
         img_bytes.seek(0)
         
         qr_path = f"{BASE_PATH}/qrcodes/{node_name}.png"
-        if create_file(qr_path, img_bytes.getvalue(), f"Generate QR code for {node_name}", is_binary=True) or \
-           update_file(qr_path, img_bytes.getvalue(), f"Update QR code for {node_name}", is_binary=True):
-            return qr_path
-        return None
+        queue_file_write(qr_path, img_bytes.getvalue(), f"Generate QR code for {node_name}", bulk=bulk)
+        return qr_path
     except Exception as e:
         st.error(f"Error generating QR code: {str(e)}")
         return None
 
-def get_qr_code_from_github(node_name):
-    """Get QR code image from GitHub"""
-    try:
-        qr_path = f"{BASE_PATH}/qrcodes/{node_name}.png"
-        image_data = get_file_content(qr_path, is_binary=True)
-        if image_data:
-            return Image.open(io.BytesIO(image_data))
-        return None
-    except Exception as e:
-        st.error(f"Error loading QR code: {str(e)}")
-        return None
+def get_files_bytes(file_paths):
+    """Bytes of many binary files from one batch read, keyed by path
+
+    Uploads that are still queued win over stored copies; files that could
+    not be loaded are left out.
+    """
+    files = {}
+    for file_path in file_paths:
+        pending = get_pending_file(file_path)
+        if pending:
+            files[file_path] = pending
+    missing = [file_path for file_path in dict.fromkeys(file_paths) if file_path not in files]
+    if missing:
+        try:
+            with metrics.REGISTRY.timer("image_load", source="batch"):
+                files.update(GITHUB.get_files_many(missing))
+        except Exception as e:
+            st.error(f"Error loading files: {str(e)}")
+    return files
+
+# Health/readiness probe: answers without loading any navigation data
+if st.query_params.get("health"):
+    st.json(readiness_status())
+    st.stop()
 
-# Initialize session state
-if 'nav_data' not in st.session_state:
-    st.session_state.nav_data = load_navigation_data()
+# Initialize session state (nav_data is loaded by the pages that need all of it)
 if 'selected_node' not in st.session_state:
     st.session_state.selected_node = None
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = True
+
+def ensure_navigation_data():
+    """Load the whole campus into this session and pull in committed edits"""
+    if 'nav_data' not in st.session_state:
+        st.session_state.nav_data = load_navigation_data()
+    sync_session_with_log_writer()
 
 # Refresh data function
 def refresh_data():
     """Refresh navigation data from GitHub"""
     with st.spinner("Refreshing data from GitHub..."):
-        st.session_state.nav_data = load_navigation_data()
+        st.session_state.nav_data = load_navigation_data(refresh=True)
     st.success("Data refreshed successfully!")
     st.rerun()
 
+# Cached previews for the editors
+@st.cache_data(ttl=PREVIEW_CACHE_TTL, max_entries=PREVIEW_CACHE_ENTRIES, show_spinner=False)
+def fetch_file_bytes(file_path):
+    """Download a binary file once per path and keep it for previews"""
+    metrics.REGISTRY.cache_miss("preview")
+    with metrics.REGISTRY.timer("image_load", source="preview"):
+        content = get_file_content(file_path, is_binary=True)
+    if content is None:
+        # Raising keeps misses out of the cache, e.g. a QR code not generated yet
+        raise FileNotFoundError(file_path)
+    return content
+
+def get_preview_bytes(file_path):
+    """Image bytes for previews, preferring uploads that are still queued"""
+    metrics.REGISTRY.cache_lookup("preview")
+    pending = get_pending_file(file_path)
+    if pending:
+        return pending
+    try:
+        return fetch_file_bytes(file_path)
+    except FileNotFoundError:
+        return None
+
 # Image Upload Handler (GitHub version)
+def _path_images_state(field_key, node_name, existing_images):
+    """Session copy of a path's image list, reset when the stored list changes"""
+    state_key = f"images_{field_key}_{node_name}"
+    source = list(existing_images or [])
+    state = st.session_state.get(state_key)
+    if state is None or state['source'] != source:
+        state = {"source": source, "images": list(source), "uploaded": set()}
+        st.session_state[state_key] = state
+    return state
+
 def handle_image_upload_github(field_key, node_name, existing_images):
     uploaded_files = st.file_uploader(
         f"Upload images for {field_key}", 
@@ -301,14 +798,18 @@ def handle_image_upload_github(field_key, node_name, existing_images):
         key=f"img_{field_key}_{node_name}",
         type=['png', 'jpg', 'jpeg', 'gif']
     )
-    img_paths = existing_images if existing_images else []
+    state = _path_images_state(field_key, node_name, existing_images)
+    img_paths = state['images']
     
-    if uploaded_files:
+    # The uploader keeps its files across reruns; upload each one only once
+    new_files = [f for f in uploaded_files or [] if (f.name, f.size) not in state['uploaded']]
+    if new_files:
         progress_bar = st.progress(0)
-        for idx, uploaded_file in enumerate(uploaded_files):
-            progress_bar.progress((idx + 1) / len(uploaded_files))
+        for idx, uploaded_file in enumerate(new_files):
+            progress_bar.progress((idx + 1) / len(new_files))
             with st.spinner(f"Uploading {uploaded_file.name}..."):
                 img_path = upload_image_to_github(uploaded_file, node_name, field_key)
+                state['uploaded'].add((uploaded_file.name, uploaded_file.size))
                 if img_path and img_path not in img_paths:
                     img_paths.append(img_path)
                     st.success(f"✅ Uploaded {uploaded_file.name}")
@@ -321,10 +822,11 @@ def handle_image_upload_github(field_key, node_name, existing_images):
     # Display existing images
     if img_paths:
         st.write("**Current Images:**")
+        previews = get_files_bytes(img_paths)
         cols = st.columns(min(len(img_paths), 3))
         for idx, img_path in enumerate(img_paths):
             with cols[idx % 3]:
-                img = get_image_from_github(img_path)
+                img = previews.get(img_path)
                 if img:
                     st.image(img, caption=img_path.split('/')[-1], width=150)
                 else:
@@ -333,6 +835,71 @@ def handle_image_upload_github(field_key, node_name, existing_images):
     return img_paths
 
 # Node Management (Enhanced GitHub version)
+@fragment
+def render_path_editor(field_key, node_name, path_data):
+    """Editor for one path; its widgets rerun only this fragment"""
+    st.text_input(
+        f"Label for {field_key}", 
+        value=path_data.get('label', ''), 
+        key=f"label_{field_key}_{node_name}"
+    )
+    st.number_input(
+        f"Distance (ft) for {field_key}", 
+        value=path_data.get('distance', 0), 
+        key=f"dist_{field_key}_{node_name}"
+    )
+    st.text_area(
+        f"Instruction for {field_key}", 
+        value=path_data.get('instruction', ''), 
+        key=f"instr_{field_key}_{node_name}"
+    )
+    handle_image_upload_github(field_key, node_name, path_data.get('images', []))
+    st.text_input(
+        f"Nearby Landmark for {field_key}", 
+        value=path_data.get('landmark', ''), 
+        key=f"landmark_{field_key}_{node_name}"
+    )
+    with st.expander("♿ Accessibility & walk time"):
+        attributes = routing.path_attributes({'distance': 0, **path_data})
+        st.number_input(
+            f"Walk time (s) for {field_key}",
+            value=None if path_data.get('walk_time') is None else float(path_data['walk_time']),
+            min_value=0.0,
+            placeholder="Estimated from distance",
+            key=f"walk_{field_key}_{node_name}"
+        )
+        cols = st.columns(4)
+        for col, flag, label in zip(cols, routing.FLAGS, ("🪜 Stairs", "🛗 Elevator", "🌳 Outdoor", "♿ Step-free")):
+            col.checkbox(label, value=attributes[flag], key=f"{flag}_{field_key}_{node_name}")
+
+def collect_path_fields(field_key, node_name, path_data):
+    """Read a path's values back from the editor widgets"""
+    state = st.session_state
+    fields = {
+        'label': state.get(f"label_{field_key}_{node_name}", path_data.get('label', '')),
+        'distance': state.get(f"dist_{field_key}_{node_name}", path_data.get('distance', 0)),
+        'instruction': state.get(f"instr_{field_key}_{node_name}", path_data.get('instruction', '')),
+        'images': list(_path_images_state(field_key, node_name, path_data.get('images', []))['images']),
+        'landmark': state.get(f"landmark_{field_key}_{node_name}", path_data.get('landmark', '')),
+        **{flag: bool(state.get(f"{flag}_{field_key}_{node_name}", path_data.get(flag, False)))
+           for flag in routing.FLAGS},
+    }
+    walk_time = state.get(f"walk_{field_key}_{node_name}", path_data.get('walk_time'))
+    if walk_time is not None:
+        fields['walk_time'] = walk_time
+    return fields
+
+@fragment
+def show_node_qr(node_name):
+    st.subheader(f"QR Code for {node_name}")
+    qr_img = get_preview_bytes(f"{BASE_PATH}/qrcodes/{node_name}.png")
+    if qr_img:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.image(qr_img, caption=f"QR Code for {node_name}", width=200)
+    else:
+        st.warning("QR code not found. It will be generated when you save the node.")
+
 def handle_node_creation():
     st.subheader("Node Editor")
     
@@ -346,53 +913,62 @@ def handle_node_creation():
     selected_node = st.selectbox("Select Node", [""] + existing_nodes)
     
     node_name = st.text_input("Node Name", value=selected_node or "")
+    node_meta = st.session_state.nav_data.get(zones.META_SECTION, {})
+    zone = st.text_input(
+        "🏢 Building / Zone",
+        value=node_meta.get(selected_node, {}).get('zone', "") if selected_node else "",
+        help=f"Routes only load the zones they pass through (default: {zones.DEFAULT_ZONE})"
+    ).strip()
+    position = node_meta.get(selected_node, {}) if selected_node else {}
+    with st.expander("📐 Position (optional, enables faster routing)"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            pos_x = st.number_input("X (ft)", value=position.get('x'), placeholder="—")
+        with col2:
+            pos_y = st.number_input("Y (ft)", value=position.get('y'), placeholder="—")
+        with col3:
+            floor = st.number_input("Floor", value=position.get('floor'), step=1, placeholder="—")
     num_fields = st.number_input(
         "Number of Paths", 1, 10,
         value=len(st.session_state.nav_data['nodes'].get(selected_node, {})) if selected_node else 1
     )
 
-    fields = {}
+    existing_fields = {}
     if selected_node:
-        fields = st.session_state.nav_data['nodes'][selected_node].copy()
+        existing_fields = st.session_state.nav_data['nodes'][selected_node]
     
     for i in range(1, int(num_fields)+1):
         field_key = f"path_{i}"
         with st.expander(f"Path {i}", expanded=True):
-            fields[field_key] = {
-                'label': st.text_input(
-                    f"Label for {field_key}", 
-                    value=fields.get(field_key, {}).get('label', ''), 
-                    key=f"label_{field_key}_{node_name}"
-                ),
-                'distance': st.number_input(
-                    f"Distance (ft) for {field_key}", 
-                    value=fields.get(field_key, {}).get('distance', 0), 
-                    key=f"dist_{field_key}_{node_name}"
-                ),
-                'instruction': st.text_area(
-                    f"Instruction for {field_key}", 
-                    value=fields.get(field_key, {}).get('instruction', ''), 
-                    key=f"instr_{field_key}_{node_name}"
-                ),
-                'images': handle_image_upload_github(
-                    field_key, 
-                    node_name, 
-                    fields.get(field_key, {}).get('images', [])
-                ),
-                'landmark': st.text_input(
-                    f"Nearby Landmark for {field_key}", 
-                    value=fields.get(field_key, {}).get('landmark', ''), 
-                    key=f"landmark_{field_key}_{node_name}"
-                )
-            }
+            render_path_editor(field_key, node_name, existing_fields.get(field_key, {}))
     
     if st.button("💾 Save Node"):
         if node_name:
+            fields = dict(existing_fields)
+            for i in range(1, int(num_fields)+1):
+                field_key = f"path_{i}"
+                fields[field_key] = collect_path_fields(field_key, node_name, existing_fields.get(field_key, {}))
+            
             # Update node data
             if selected_node and selected_node != node_name and selected_node in st.session_state.nav_data['nodes']:
                 del st.session_state.nav_data['nodes'][selected_node]
             
             st.session_state.nav_data['nodes'][node_name] = fields
+            node_meta = st.session_state.nav_data.setdefault(zones.META_SECTION, {})
+            meta = dict(node_meta.pop(selected_node, {}) if selected_node else node_meta.get(node_name, {}))
+            if zone:
+                meta['zone'] = zone
+            else:
+                meta.pop('zone', None)
+            if pos_x is not None and pos_y is not None:
+                meta.update({"x": pos_x, "y": pos_y, "floor": int(floor or 0)})
+            else:
+                for field in ("x", "y", "floor"):
+                    meta.pop(field, None)
+            if meta:
+                node_meta[node_name] = meta
+            else:
+                node_meta.pop(node_name, None)
             
             # Generate QR code
             with st.spinner("Generating QR code..."):
@@ -403,10 +979,12 @@ def handle_node_creation():
                     st.warning("⚠️ QR code generation failed")
             
             # Save to GitHub
+            changed = [("nodes", node_name), (zones.META_SECTION, node_name)]
+            if selected_node and selected_node != node_name:
+                changed += [("nodes", selected_node), (zones.META_SECTION, selected_node)]
             with st.spinner("Saving to GitHub..."):
-                if save_navigation_data(st.session_state.nav_data):
+                if save_navigation_data(st.session_state.nav_data, changed):
                     st.success("✅ Node saved successfully!")
-                    time.sleep(1)  # Small delay to ensure save completes
                     st.rerun()
                 else:
                     st.error("❌ Failed to save node data")
@@ -415,14 +993,7 @@ def handle_node_creation():
     
     # Display QR code for existing node
     if selected_node:
-        st.subheader(f"QR Code for {selected_node}")
-        qr_img = get_qr_code_from_github(selected_node)
-        if qr_img:
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                st.image(qr_img, caption=f"QR Code for {selected_node}", width=200)
-        else:
-            st.warning("QR code not found. It will be generated when you save the node.")
+        show_node_qr(selected_node)
 
 # Delete Functions (Enhanced GitHub version)
 def delete_node():
@@ -455,6 +1026,7 @@ def delete_node():
         with st.spinner("Deleting node and associated files..."):
             # Delete QR code
             qr_path = f"{BASE_PATH}/qrcodes/{node_to_delete}.png"
+            get_write_queue().discard(("file", qr_path))
             delete_file(qr_path)
             
             # Delete associated images
@@ -466,17 +1038,19 @@ def delete_node():
             
             # Remove node from data
             del st.session_state.nav_data['nodes'][node_to_delete]
+            st.session_state.nav_data.get(zones.META_SECTION, {}).pop(node_to_delete, None)
             
             # Remove all connections involving this node
+            changed = [("nodes", node_to_delete), (zones.META_SECTION, node_to_delete)]
             connections = list(st.session_state.nav_data['connections'].items())
             for conn, details in connections:
                 if node_to_delete in conn.split("::"):
                     del st.session_state.nav_data['connections'][conn]
+                    changed.append(("connections", conn))
             
             # Save updated data
-            if save_navigation_data(st.session_state.nav_data):
+            if save_navigation_data(st.session_state.nav_data, changed):
                 st.success(f"✅ Node {node_to_delete} and all associated files deleted!")
-                time.sleep(1)
                 st.rerun()
             else:
                 st.error("❌ Failed to save updated data")
@@ -526,21 +1100,23 @@ def delete_path():
             del st.session_state.nav_data['nodes'][node][path_to_delete]
             
             # Remove connections using this path
+            changed = [("nodes", node)]
             connections = list(st.session_state.nav_data['connections'].items())
             for conn, details in connections:
                 if f"{node}::{path_to_delete}" in conn:
                     del st.session_state.nav_data['connections'][conn]
+                    changed.append(("connections", conn))
             
             # Save updated data
-            if save_navigation_data(st.session_state.nav_data):
+            if save_navigation_data(st.session_state.nav_data, changed):
                 st.success(f"✅ Path '{path_data['label']}' deleted from {node}!")
-                time.sleep(1)
                 st.rerun()
             else:
                 st.error("❌ Failed to save updated data")
 
 def delete_link():
     st.subheader("🗑️ Delete Connection Between Nodes")
+    st.caption("Closed only for a while? Use 🚧 Temporary Closure instead; it reopens by itself.")
     connections = list(st.session_state.nav_data['connections'].items())
     if not connections:
         st.warning("No connections available")
@@ -565,13 +1141,194 @@ def delete_link():
         with st.spinner("Deleting connection..."):
             del st.session_state.nav_data['connections'][conn_key]
             
-            if save_navigation_data(st.session_state.nav_data):
+            if save_navigation_data(st.session_state.nav_data, [("connections", conn_key)]):
                 st.success(f"✅ Connection '{selected_conn}' deleted successfully!")
-                time.sleep(1)
                 st.rerun()
             else:
                 st.error("❌ Failed to save updated data")
 
+def session_uploads():
+    """Images uploaded in this session's path editors, saved or not"""
+    return {img_path for key, state in st.session_state.items()
+            if key.startswith("images_") and isinstance(state, dict)
+            for img_path in state.get('images', [])}
+
+def sweep_repository():
+    """Sweep report against the latest saved data plus this process's queued edits
+
+    The session's copy can be far behind other sessions and processes, and
+    a file only it misses would be deleted as unreferenced.
+    """
+    try:
+        loaded = read_navigation_data()
+    except (json.JSONDecodeError, requests.RequestException, rate_limiter.RateLimited,
+            github_store.LogGap) as e:
+        return {"ok": False, "error": f"could not read the navigation data ({e})"}
+    if loaded is None:
+        return {"ok": False, "error": "could not read the navigation data"}
+    data = loaded[0]
+    apply_pending_writes(data)
+    return repo_sweep.sweep(GITHUB, data, keep=session_uploads())
+
+def manage_cleanup():
+    st.subheader("🧹 Clean Up Repository")
+    st.caption("Finds images and QR codes nothing refers to any more (left behind by renames, "
+               "deletions and failed saves) and connections whose node or path is gone.")
+    
+    if st.button("🔍 Scan Repository"):
+        with st.spinner("Listing repository files..."):
+            st.session_state.sweep_report = sweep_repository()
+    
+    report = st.session_state.get('sweep_report')
+    if not report:
+        return
+    if not report['ok']:
+        st.error(f"❌ Scan failed: {report['error']}")
+        return
+    st.write(f"Scanned {report['files']} files with {report['api_calls']} API calls")
+    
+    # Unreferenced files
+    if report['orphans']:
+        st.warning(f"{len(report['orphans'])} unreferenced files")
+        with st.expander("Show files"):
+            st.code("\n".join(report['orphans']))
+        st.caption("Images someone is uploading in another session right now count as "
+                   "unreferenced until their node is saved.")
+        confirm = st.checkbox(f"I confirm I want to delete these {len(report['orphans'])} files")
+        if st.button("🗑️ Delete Unreferenced Files") and confirm:
+            with st.spinner("Deleting files in one commit..."):
+                # Re-check first: spare anything referenced since the scan
+                fresh = sweep_repository()
+                orphans = sorted(set(fresh['orphans']) & set(report['orphans'])) if fresh['ok'] else []
+                commit = GITHUB.delete_many(orphans, f"Remove {len(orphans)} unreferenced files") \
+                    if orphans else None
+            if commit:
+                st.session_state.sweep_report = None
+                st.success(f"✅ Deleted {len(orphans)} files in commit {commit[:7]}")
+            elif fresh['ok'] and not orphans:
+                st.session_state.sweep_report = None
+                st.info("ℹ️ Nothing left to delete; the files are referenced again")
+            else:
+                st.error("❌ Failed to delete the files")
+    else:
+        st.success("✅ No unreferenced files")
+    
+    # Dangling connections
+    dangling = {conn_key: reason for conn_key, reason in report['dangling'].items()
+                if conn_key in st.session_state.nav_data['connections']}
+    if dangling:
+        st.warning(f"{len(dangling)} dangling connections")
+        for conn_key, reason in dangling.items():
+            st.write(f"- {conn_key.replace('::', ' ➔ ')}: {reason}")
+        if st.button("🔗 Remove Dangling Connections"):
+            with st.spinner("Removing connections..."):
+                for conn_key in dangling:
+                    del st.session_state.nav_data['connections'][conn_key]
+                if save_navigation_data(st.session_state.nav_data,
+                                        [("connections", conn_key) for conn_key in dangling]):
+                    st.session_state.sweep_report = None
+                    st.success(f"✅ Removed {len(dangling)} connections!")
+                    st.rerun()
+                else:
+                    st.error("❌ Failed to save updated data")
+    else:
+        st.success("✅ No dangling connections")
+
+# Temporary Closures
+@st.cache_resource
+def get_closure_state():
+    """Process-wide copy of the closure file, re-read every CLOSURE_REFRESH_SECONDS"""
+    return {"lock": threading.Lock(), "closures": [], "checked_at": 0.0}
+
+def load_closures(force=False):
+    state = get_closure_state()
+    with state['lock']:
+        if force or time.time() - state['checked_at'] >= CLOSURE_REFRESH_SECONDS:
+            try:
+                content, _ = GITHUB.get_strict(CLOSURES_PATH)
+                state['closures'] = closures.parse(content)
+                state['checked_at'] = time.time()
+            except (requests.RequestException, rate_limiter.RateLimited):
+                pass  # Keep the closures we had rather than reopen them all
+        return list(state['closures'])
+
+def current_closures():
+    """Connections and nodes routes must avoid right now"""
+    closed = closures.ClosureSet(load_closures())
+    metrics.REGISTRY.set_gauge("closures_active", len(closed))
+    return closed
+
+def edit_closures(change, message):
+    """Apply change(active closures) to the closure file; expired closures are dropped"""
+    for _ in range(SAVE_RETRIES):
+        content, sha = GITHUB.get(CLOSURES_PATH)
+        updated = change(closures.active(closures.parse(content)))
+        response = put_file(CLOSURES_PATH, closures.encode(updated), message, sha=sha)
+        if response.status_code in (200, 201):
+            state = get_closure_state()
+            with state['lock']:
+                state['closures'], state['checked_at'] = updated, time.time()
+            return True
+        if response.status_code not in (409, 422):
+            break
+    return False
+
+def manage_closures():
+    st.subheader("🚧 Temporary Closures")
+    st.caption("Closed connections and locations are avoided by routing until the closure ends. "
+               "The navigation data itself is not changed.")
+    nav_data = st.session_state.nav_data
+    
+    current = sorted(closures.active(load_closures(force=True)), key=lambda c: c['until'])
+    if current:
+        for closure in current:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                if closure['kind'] == "connection":
+                    source, _, target = closure['key'].split("::")
+                    what = f"🔗 {source} ➔ {target}"
+                else:
+                    what = f"📍 {closure['key']}"
+                until = time.strftime("%Y-%m-%d %H:%M", time.localtime(closure['until']))
+                st.markdown(f"**{what}** until {until}" + (f" — {closure['reason']}" if closure['reason'] else ""))
+            with col2:
+                if st.button("✅ Reopen", key=f"reopen_{closure['id']}"):
+                    if edit_closures(lambda items: [c for c in items if c['id'] != closure['id']],
+                                     f"Reopen {closure['key']}"):
+                        st.success("✅ Reopened")
+                        st.rerun()
+                    else:
+                        st.error("❌ Failed to update closures")
+    else:
+        st.info("Nothing is closed right now")
+    
+    st.markdown("---")
+    kind = st.radio("Close a", ["connection", "node"], horizontal=True, key="closure_kind",
+                    format_func=lambda k: "🔗 Connection" if k == "connection" else "📍 Location")
+    if kind == "connection":
+        keys = list(nav_data['connections'])
+        if not keys:
+            st.info("No connections available")
+            return
+        key = st.selectbox("Connection", keys, key="closure_connection",
+                           format_func=lambda k: f"{nav_data['connections'][k]['from']} ➔ {nav_data['connections'][k]['to']}")
+    else:
+        if not nav_data['nodes']:
+            st.info("No nodes available")
+            return
+        key = st.selectbox("Location", list(nav_data['nodes']), key="closure_node")
+    hours = st.number_input("Closed for (hours)", min_value=0.25, value=4.0, step=0.25, key="closure_hours")
+    reason = st.text_input("Reason (optional)", key="closure_reason", placeholder="e.g. Graduation ceremony")
+    
+    if st.button("🚧 Close"):
+        closure = closures.new_closure(kind, key, time.time() + hours * 3600, reason)
+        with st.spinner("Saving closure..."):
+            if edit_closures(lambda items: items + [closure], f"Close {key}"):
+                st.success(f"✅ Closed for {hours:g} h")
+                st.rerun()
+            else:
+                st.error("❌ Failed to save closure")
+
 # Node Linking (Enhanced GitHub version)
 def handle_node_linking():
     st.subheader("🔗 Link Nodes")
@@ -611,99 +1368,423 @@ def handle_node_linking():
                 "path_key": path_key
             }
             
-            if save_navigation_data(st.session_state.nav_data):
+            if save_navigation_data(st.session_state.nav_data, [("connections", conn_key)]):
                 st.success(f"✅ Link created from {source} ({source_paths[path_key]['label']}) to {target}")
-                time.sleep(1)
                 st.rerun()
             else:
                 st.error("❌ Failed to save link data")
 
+# Zone shards
+def write_zone_shards(data, seq):
+    """Write the zone index and the shards that changed, for data as of log seq
+
+    Runs on the write-behind worker after each snapshot, so visitors can
+    route by loading only the zones a route passes through.
+    """
+    try:
+        content, index_sha = GITHUB.get(ZONE_INDEX_PATH)
+        previous = json.loads(content)['shards'] if content else {}
+        index, files = zones.build_zone_files(data, seq)
+        for zone, info in index['shards'].items():
+            old = previous.get(zone)
+            if old and old['sha'] == info['sha']:
+                continue
+            response = put_file(f"{ZONES_PATH}/{info['file']}", files[info['file']],
+                                f"Update zone shard {zone}", sha=old['sha'] if old else None)
+            if response.status_code not in (200, 201):
+                return False
+        response = put_file(ZONE_INDEX_PATH, json.dumps(index, separators=(",", ":")),
+                            f"Update zone index ({len(index['shards'])} zones)", sha=index_sha)
+        if response.status_code not in (200, 201):
+            return False
+        for zone, info in previous.items():
+            if zone not in index['shards']:
+                GITHUB.delete(f"{ZONES_PATH}/{info['file']}", sha=info['sha'])
+    except Exception:
+        # The next snapshot writes them again
+        return False
+    reset_zoned_campus()
+    return True
+
+@st.cache_resource
+def get_zone_view():
+    """Process-wide lazily loaded view of the zone shards"""
+    return {"lock": threading.Lock(), "campus": None, "checked_at": 0.0}
+
+def load_zone_shard(zone, info):
+    """Load a shard by blob SHA, from the local snapshot when it has it"""
+    with metrics.REGISTRY.timer("zone_shard_load"):
+        content = GITHUB.blob_cache.read_blob(info['sha'])
+        if content is None:
+            content, sha = GITHUB.get(f"{ZONES_PATH}/{info['file']}")
+            if content is None or sha != info['sha']:
+                raise zones.StaleShard(zone)
+            GITHUB.blob_cache.store_blob(content, sha)
+        return json.loads(content)
+
+def reset_zoned_campus():
+    view = get_zone_view()
+    with view['lock']:
+        view['campus'] = None
+        view['checked_at'] = 0.0
+
+def update_zoned_campus(seq, ops):
+    """Apply a log record committed by this process to the zone view"""
+    view = get_zone_view()
+    with view['lock']:
+        campus = view['campus']
+        if campus is not None and not campus.apply_operations(seq, json.loads(json.dumps(ops))):
+            view['campus'] = None
+            view['checked_at'] = 0.0
+
+def zoned_campus():
+    """Zone view caught up with the operation log, or None before the first shards exist"""
+    view = get_zone_view()
+    with view['lock']:
+        if time.time() - view['checked_at'] < ZONE_REFRESH_SECONDS:
+            return view['campus']
+        view['checked_at'] = time.time()
+        try:
+            for _ in range(2):
+                if view['campus'] is None:
+                    content, _ = GITHUB.get(ZONE_INDEX_PATH)
+                    if not content:
+                        return None
+                    view['campus'] = zones.ZonedCampus(json.loads(content), load_zone_shard)
+                campus = view['campus']
+                for seq, item in list_navigation_log(campus.seq):
+                    content = get_file_content(item['path'])
+                    if content is None:
+                        break
+                    if not campus.apply_operations(seq, nav_store.parse_log_entry(content)):
+                        # Records we never saw were compacted into a newer index
+                        view['campus'] = None
+                        break
+                if view['campus'] is not None:
+                    break
+        except rate_limiter.RateLimited:
+            pass
+        return view['campus']
+
+def campus_has_node(name):
+    if 'nav_data' in st.session_state:
+        return name in st.session_state.nav_data['nodes']
+    campus = zoned_campus()
+    if campus is not None:
+        return campus.has_node(name)
+    ensure_navigation_data()
+    return name in st.session_state.nav_data['nodes']
+
+def campus_nodes():
+    """All node names, without loading the whole campus once zone shards exist"""
+    campus = None if 'nav_data' in st.session_state else zoned_campus()
+    if campus is not None:
+        return campus.node_names()
+    ensure_navigation_data()
+    return list(st.session_state.nav_data['nodes'])
+
+@st.cache_resource
+def get_route_cache():
+    """Process-wide LRU of resolved routes, shared by all sessions"""
+    return route_cache.RouteCache(ROUTE_CACHE_ENTRIES)
+
+def session_route_seq():
+    """Log sequence number of this session's nav_data, or None while it has unsaved edits"""
+    if any(key[0] in ("nav", "snapshot") for key, _ in get_write_queue().items()):
+        return None
+    return _get_sync_state()['seq']
+
+def cached_route(key, seq, nav_data_fn):
+    """(path, distance, steps, nav_data) of a cached route, or None"""
+    entry = get_route_cache().get(key, seq) if seq is not None else None
+    if entry is None:
+        return None
+    nav_data = nav_data_fn(entry['path'])
+    try:
+        return entry['path'], entry['distance'], routing.resolve_steps(nav_data, entry['steps']), nav_data
+    except KeyError:
+        # nav_data from before a full replace at the same sequence number
+        return None
+
+def campus_route(start, end, profile=routing.DEFAULT_PROFILE):
+    """Best route as (path, distance, nodes expanded, nav_data covering the route, steps)
+
+    Sessions that hold the whole campus (admins) route over it; visitors
+    route over the zone shards and only load the zones on the route. The
+    zone overlay only knows distances, so other profiles load the campus.
+    Resolved routes come from the process-wide route cache when it has
+    them; nodes expanded is then None.
+    """
+    closed = current_closures()
+    key = (start, end, profile, closed.key)
+    campus = None
+    if 'nav_data' not in st.session_state and profile == routing.DEFAULT_PROFILE:
+        campus = zoned_campus()
+    if campus is not None:
+        try:
+            seq = campus.seq
+            cached = cached_route(key, seq, campus.route_data)
+            if cached:
+                path, distance, steps, route_data = cached
+                return path, distance, None, route_data, steps
+            path, distance, expanded = campus.route(start, end)
+            # A route through a closure needs the whole campus to detour
+            if not path:
+                return None, 0, expanded, None, []
+            if not (closed and not closed.avoided_by(path)):
+                route_data = campus.route_data(path)
+                steps = routing.route_steps(route_data, path, profile, closed)
+                get_route_cache().put(key, seq, path, distance, steps)
+                return path, distance, expanded, route_data, steps
+        except zones.StaleShard:
+            reset_zoned_campus()
+    ensure_navigation_data()
+    nav_data = st.session_state.nav_data
+    seq = session_route_seq()
+    cached = cached_route(key, seq, lambda path: nav_data)
+    if cached:
+        path, distance, steps, _ = cached
+        return path, distance, None, nav_data, steps
+    path, distance, expanded = find_path_with_weight(start, end, profile)
+    if not path:
+        return None, 0, expanded, nav_data, []
+    steps = routing.route_steps(nav_data, path, profile, closed)
+    if seq is not None:
+        get_route_cache().put(key, seq, path, distance, steps)
+    return path, distance, expanded, nav_data, steps
+
+def campus_alternatives(start, end, profile=routing.DEFAULT_PROFILE):
+    """Up to ALTERNATIVE_ROUTES diverse routes as ([(path, distance)], nav_data)
+
+    Alternatives come from two searches over the whole campus, so visitors
+    on zone shards load it too.
+    """
+    ensure_navigation_data()
+    routes = routing.find_alternative_paths(st.session_state.nav_data, start, end, ALTERNATIVE_ROUTES,
+                                            profile, current_route_graph(), current_closures())
+    return routes, st.session_state.nav_data
+
+# Node Search
+@st.cache_resource
+def get_search_index():
+    """Process-wide trigram index over the nodes of the log replica
+
+    Committed log records update it in place; it is only rebuilt
+    when the replica is reloaded or replaced (a new epoch).
+    """
+    return {"lock": threading.Lock(), "index": None, "epoch": None}
+
+def node_search_index():
+    state = get_search_index()
+    writer = get_log_writer()
+    with state['lock']:
+        if state['index'] is None or state['epoch'] != writer['epoch']:
+            with metrics.REGISTRY.timer("search_index_build"):
+                if writer['data'] is not None:
+                    with writer['lock']:
+                        state['index'] = search_index.SearchIndex.build(writer['data'])
+                elif 'nav_data' in st.session_state:
+                    state['index'] = search_index.SearchIndex.build(st.session_state.nav_data)
+                else:
+                    # Names only until the replica is loaded
+                    names = {"nodes": dict.fromkeys(campus_nodes(), {})}
+                    state['index'] = search_index.SearchIndex.build(names)
+                state['epoch'] = writer['epoch']
+        return state['index']
+
+def update_search_index(ops):
+    state = get_search_index()
+    with state['lock']:
+        if state['index'] is not None:
+            state['index'].apply_operations(ops)
+
+# Graph Integrity
+@st.cache_resource
+def get_graph_integrity():
+    """Process-wide connectivity analysis of the log replica
+
+    Kept current from the same operations as the search index; it is only
+    rebuilt when the replica is reloaded or replaced (a new epoch).
+    """
+    return {"lock": threading.Lock(), "analyzer": None, "epoch": None}
+
+def graph_integrity_analyzer():
+    """The analysis of the committed data, or None if the replica cannot be loaded
+
+    Never built from a session's copy, which may hold unsaved edits.
+    """
+    state = get_graph_integrity()
+    writer = get_log_writer()
+    if writer['data'] is None and not _catch_up_log_replica(writer):
+        return None
+    with state['lock']:
+        if state['analyzer'] is None or state['epoch'] != writer['epoch']:
+            with writer['lock']:
+                state['analyzer'] = graph_integrity.GraphIntegrity.build(writer['data'])
+                state['epoch'] = writer['epoch']
+        return state['analyzer']
+
+def update_graph_integrity(ops):
+    state = get_graph_integrity()
+    with state['lock']:
+        if state['analyzer'] is not None:
+            state['analyzer'].apply_operations(ops)
+
+def node_picker(label, key, exclude=None, default=None):
+    """Search box plus a selectbox over the best matching nodes"""
+    query = st.text_input("🔎 Search locations", key=f"{key}_query",
+                          placeholder="Type a name, direction or landmark")
+    with metrics.REGISTRY.timer("node_search"):
+        matches = node_search_index().search(query, SEARCH_RESULTS + 1)
+    options = [n for n in matches if n != exclude and campus_has_node(n)][:SEARCH_RESULTS]
+    if not query and default and default != exclude and default not in options and campus_has_node(default):
+        options.insert(0, default)
+    if not options:
+        st.caption("No matching locations")
+        return None
+    index = options.index(default) if default in options else 0
+    return st.selectbox(label, options, index=index, key=key)
+
+# Step Cards
+@st.cache_resource
+def get_step_cards():
+    """Process-wide cache of rendered direction steps"""
+    return step_cards.StepCardCache(STEP_CARD_ENTRIES)
+
+def route_step_cards(steps):
+    """Step cards for a route; only steps without a cached card load their images"""
+    cache = get_step_cards()
+    keys = [step_cards.card_key(current, next_node, path_key, node_data)
+            for current, next_node, path_key, node_data in steps]
+    cards = [cache.get(key) for key in keys]
+    missing = [idx for idx, card in enumerate(cards) if card is None]
+    if missing:
+        with st.spinner("Loading images..."):
+            images = get_files_bytes([img_path for idx in missing
+                                      for img_path in steps[idx][3].get('images') or []])
+        for idx in missing:
+            current, next_node, _, node_data = steps[idx]
+            cards[idx] = step_cards.build_card(current, next_node, node_data, images)
+            if cards[idx]['complete']:
+                cache.put(keys[idx], cards[idx])
+    return cards
+
 # Navigation Display (Enhanced GitHub version)
-def display_navigation(path):
-    total_steps = len(path) - 1
-    st.info(f"Total Steps: {total_steps}")
-    
-    for i in range(len(path)-1):
-        current = path[i]
-        next_node = path[i+1]
-        connection = None
-        path_key = None
-        
-        for conn, details in st.session_state.nav_data['connections'].items():
-            source, pkey, target = conn.split("::")
-            if source == current and target == next_node:
-                connection = details
-                path_key = pkey
-                break
-        
-        if connection and path_key:
-            node_data = st.session_state.nav_data['nodes'][current][path_key]
+@metrics.REGISTRY.timed("navigation_render")
+def display_navigation(steps):
+    total_steps = len(steps)
+    walk_time = sum(routing.path_attributes(data)['walk_time'] for *_, data in steps)
+    st.info(f"Total Steps: {total_steps} · ⏱️ about {max(1, round(walk_time / 60))} min")
+    cards = route_step_cards(steps)
+    
+    for i, ((current, next_node, path_key, node_data), card) in enumerate(zip(steps, cards)):
+        with st.container():
+            st.markdown(f"### 📍 Step {i+1} of {total_steps}")
+            col1, col2 = st.columns([1, 2])
             
-            with st.container():
-                st.markdown(f"### 📍 Step {i+1} of {total_steps}")
-                col1, col2 = st.columns([1, 2])
-                
-                with col1:
-                    if node_data.get('images'):
-                        with st.spinner("Loading image..."):
-                            img = get_image_from_github(node_data['images'][0])
-                            if img:
-                                st.image(img, caption=node_data['label'], use_column_width=True)
-                            else:
-                                st.warning("Failed to load image")
-                        
-                        # Show additional images if available
-                        if len(node_data['images']) > 1:
-                            with st.expander(f"View all {len(node_data['images'])} images"):
-                                for img_path in node_data['images']:
-                                    img = get_image_from_github(img_path)
-                                    if img:
-                                        st.image(img, caption=img_path.split('/')[-1])
+            with col1:
+                if card['images']:
+                    _, img = card['images'][0]
+                    if img:
+                        st.image(img, caption=node_data['label'], use_column_width=True)
                     else:
-                        st.info("No image available for this step")
-                
-                with col2:
-                    st.markdown(f"""
-                    **From:** 📍 {current}  
-                    **To:** 📍 {next_node}  
-                    **Direction:** {node_data['label']}  
-                    **Distance:** 📏 {node_data['distance']} ft  
-                    **Instruction:** 📝 {node_data['instruction']}  
-                    **Landmark:** 🏛️ {node_data['landmark']}  
-                    """)
-                
-                st.markdown("---")
+                        st.warning("Failed to load image")
+                    
+                    # Show additional images if available
+                    if len(card['images']) > 1:
+                        with st.expander(f"View all {len(card['images'])} images"):
+                            for img_path, img in card['images']:
+                                if img:
+                                    st.image(img, caption=img_path.split('/')[-1])
+                else:
+                    st.info("No image available for this step")
+            
+            with col2:
+                st.markdown(card['text'])
+                if card['notes']:
+                    st.caption(card['notes'])
+            
+            st.markdown("---")
 
 # Path Finding Functions
-def find_path_with_weight(start, end):
-    G = nx.DiGraph()
-    for node in st.session_state.nav_data['nodes']:
-        G.add_node(node)
-    
-    for conn, details in st.session_state.nav_data['connections'].items():
-        source = details['from']
-        target = details['to']
-        path_key = details['path_key']
-        if path_key in st.session_state.nav_data['nodes'][source]:
-            distance = st.session_state.nav_data['nodes'][source][path_key]['distance']
-            G.add_edge(source, target, weight=distance, path_key=path_key)
+def find_path_with_weight(start, end, profile=routing.DEFAULT_PROFILE):
+    return routing.find_path_with_weight(st.session_state.nav_data, start, end,
+                                         current_route_hierarchy(), profile, current_route_graph(),
+                                         current_closures())
+
+@st.cache_resource
+def get_route_graph():
+    """Process-wide compiled route graph (all profiles) for one persisted version"""
+    return {"lock": threading.Lock(), "graph": None, "version": None}
+
+def current_route_graph():
+    """The compiled graph of this session's nav_data, shared by sessions on the same version"""
+    if any(key[0] in ("nav", "snapshot") for key, _ in get_write_queue().items()):
+        return None
+    sync = _get_sync_state()
+    version = (sync.get('epoch'), sync['seq'])
+    state = get_route_graph()
+    with state['lock']:
+        if state['version'] != version:
+            state['graph'], state['version'] = routing.RouteGraph(st.session_state.nav_data), version
+        return state['graph']
+
+@st.cache_resource
+def get_route_hierarchy():
+    """Process-wide contraction hierarchy for one persisted version of nav_data"""
+    return {"lock": threading.Lock(), "hierarchy": None, "version": None, "building": None}
+
+def schedule_route_hierarchy(data, version):
+    """Rebuild the hierarchy for data in the background unless it is current"""
+    state = get_route_hierarchy()
+    with state['lock']:
+        if len(data['nodes']) < ROUTE_HIERARCHY_MIN_NODES or version in (state['version'], state['building']):
+            return
+        if state['building'] is not None:
+            # One build at a time; the next query or save schedules the newest version
+            return
+        state['building'] = version
+        names, out_edges = contraction.compile_graph(data)
     
-    try:
-        path = nx.shortest_path(G, start, end, weight='weight')
-        total_distance = nx.shortest_path_length(G, start, end, weight='weight')
-        return path, total_distance, G
-    except (nx.NetworkXNoPath, nx.NodeNotFound):
-        return None, 0, G
+    def build():
+        try:
+            hierarchy = contraction.ContractionHierarchy.from_graph(names, out_edges)
+            with state['lock']:
+                state['hierarchy'], state['version'] = hierarchy, version
+        finally:
+            with state['lock']:
+                if state['building'] == version:
+                    state['building'] = None
+    threading.Thread(target=build, name="route-hierarchy", daemon=True).start()
+
+def current_route_hierarchy():
+    """The hierarchy if it was built from exactly this session's nav_data, else None"""
+    sync = _get_sync_state()
+    if any(key[0] in ("nav", "snapshot") for key, _ in get_write_queue().items()):
+        # Unsaved edits in this process may not be in the persisted version yet
+        return None
+    version = (sync.get('epoch'), sync['seq'])
+    state = get_route_hierarchy()
+    if state['version'] == version:
+        return state['hierarchy']
+    schedule_route_hierarchy(st.session_state.nav_data, version)
+    return None
 
-def find_path(start, end):
-    path, _, _ = find_path_with_weight(start, end)
-    return path
+def show_route(path, total_distance, nav_data, steps):
+    # Show path visualization
+    show_path_graph_with_weights(path, total_distance, nav_data, steps)
+    
+    # Show detailed navigation
+    st.header("📋 Step-by-Step Directions")
+    display_navigation(steps)
 
-def show_path_graph_with_weights(path, total_distance):
+def show_path_graph_with_weights(path, total_distance, nav_data, steps):
+    agraph_module = lazy_import("streamlit_agraph")
+    Node, Edge, Config = agraph_module.Node, agraph_module.Edge, agraph_module.Config
     st.subheader(f"🗺️ Navigation Path (Total Distance: {total_distance:.1f} ft)")
     
     nodes = []
-    for node_name in st.session_state.nav_data['nodes']:
+    for node_name in nav_data['nodes']:
         if node_name in path:
             if node_name == path[0]:
                 nodes.append(Node(id=node_name, label=f"{node_name}\n(🚀START)", color="#4CAF50", size=25))
@@ -715,30 +1796,14 @@ def show_path_graph_with_weights(path, total_distance):
             nodes.append(Node(id=node_name, label=node_name, color="#9E9E9E", size=15))
 
     edges = []
-    for i in range(len(path)-1):
-        current = path[i]
-        next_node = path[i+1]
-        
-        # Find the connection details
-        connection_details = None
-        for conn, details in st.session_state.nav_data['connections'].items():
-            source, path_key, target = conn.split("::")
-            if source == current and target == next_node:
-                connection_details = details
-                break
-        
-        if connection_details:
-            path_key = connection_details['path_key']
-            if path_key in st.session_state.nav_data['nodes'][current]:
-                distance = st.session_state.nav_data['nodes'][current][path_key]['distance']
-                label = st.session_state.nav_data['nodes'][current][path_key]['label']
-                edges.append(Edge(
-                    source=current,
-                    target=next_node,
-                    label=f"{label}\n{distance}ft",
-                    color="#2196F3",
-                    width=8
-                ))
+    for current, next_node, _, path_data in steps:
+        edges.append(Edge(
+            source=current,
+            target=next_node,
+            label=f"{path_data['label']}\n{path_data['distance']}ft",
+            color="#2196F3",
+            width=8
+        ))
 
     config = Config(
         width=800,
@@ -753,7 +1818,7 @@ def show_path_graph_with_weights(path, total_distance):
     )
     
     if nodes and edges:
-        agraph(nodes=nodes, edges=edges, config=config)
+        agraph_module.agraph(nodes=nodes, edges=edges, config=config)
     else:
         st.warning("No path visualization available")
 
@@ -770,150 +1835,8 @@ def show_full_graph():
         st.info("No nodes available. Create some nodes first!")
         return
     
-    # Create NetworkX graph for layout calculation
-    G = nx.Graph()
-    
-    # Add nodes
-    for node_name in st.session_state.nav_data['nodes']:
-        G.add_node(node_name)
-    
-    # Add edges with weights
-    edge_info = {}
-    for conn, details in st.session_state.nav_data['connections'].items():
-        source = details['from']
-        target = details['to']
-        path_key = details['path_key']
-        
-        if path_key in st.session_state.nav_data['nodes'][source]:
-            distance = st.session_state.nav_data['nodes'][source][path_key]['distance']
-            G.add_edge(source, target, weight=distance)
-            edge_info[(source, target)] = distance
-    
-    # Calculate layout
-    pos = nx.spring_layout(G, k=3, iterations=50)
-    
-    # Create edge traces
-    edge_x = []
-    edge_y = []
-    edge_info_text = []
-    
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-        
-        # Add distance label at midpoint
-        mid_x, mid_y = (x0 + x1) / 2, (y0 + y1) / 2
-        distance = edge_info.get(edge, edge_info.get((edge[1], edge[0]), 0))
-        edge_info_text.append((mid_x, mid_y, f"{distance}ft"))
-    
-    edge_trace = go.Scatter(
-        x=edge_x, y=edge_y,
-        line=dict(width=2, color='#4CAF50'),
-        hoverinfo='none',
-        mode='lines'
-    )
-    
-    # Create node traces
-    node_x = []
-    node_y = []
-    node_text = []
-    node_info = []
-    
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
-        
-        # Create hover info
-        adjacencies = list(G.neighbors(node))
-        node_info.append(f'Node: {node}<br>Connections: {len(adjacencies)}<br>Connected to: {", ".join(adjacencies)}')
-    
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers+text',
-        hoverinfo='text',
-        text=node_text,
-        textposition="middle center",
-        hovertext=node_info,
-        marker=dict(
-            showscale=False,
-            color='#2196F3',
-            size=30,
-            line=dict(width=2, color='#1976D2')
-        )
-    )
-    
-    # Create distance label traces
-    label_traces = []
-    for mid_x, mid_y, label in edge_info_text:
-        label_trace = go.Scatter(
-            x=[mid_x], y=[mid_y],
-            mode='text',
-            text=[label],
-            textfont=dict(size=10, color='#333333'),
-            showlegend=False,
-            hoverinfo='none'
-        )
-        label_traces.append(label_trace)
-    
-    # Create figure
-    fig_data = [edge_trace, node_trace] + label_traces
-    
-    fig = go.Figure(
-        data=fig_data,
-        layout=go.Layout(
-            title=dict(
-                text="Campus Network Graph",
-                font=dict(size=20),
-                x=0.5
-            ),
-            showlegend=False,
-            hovermode='closest',
-            margin=dict(b=20, l=5, r=5, t=60),
-            annotations=[
-                dict(
-                    text="Campus Network Graph - Interactive View",
-                    showarrow=False,
-                    xref="paper", yref="paper",
-                    x=0.5, y=-0.05,
-                    xanchor='center',
-                    font=dict(size=12, color='#666666')
-                )
-            ],
-            xaxis=dict(
-                showgrid=False, 
-                zeroline=False, 
-                showticklabels=False,
-                scaleanchor="y",
-                scaleratio=1
-            ),
-            yaxis=dict(
-                showgrid=False, 
-                zeroline=False, 
-                showticklabels=False
-            ),
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='white',
-            # Configure zoom limits
-            dragmode='pan',
-            # Set zoom range
-        )
-    )
-    
-    # Update layout with zoom constraints
-    fig.update_layout(
-        xaxis=dict(
-            range=[min(node_x) - 0.5, max(node_x) + 0.5],
-            fixedrange=False
-        ),
-        yaxis=dict(
-            range=[min(node_y) - 0.5, max(node_y) + 0.5],
-            fixedrange=False
-        )
-    )
+    G, pos, edge_info = campus_map.compute_network_layout(st.session_state.nav_data)
+    fig = campus_map.build_network_figure(G, pos, edge_info)
     
     # Configure zoom behavior
     config = {
@@ -941,13 +1864,15 @@ def show_full_graph():
     """)
     
     # Display the graph
-    st.plotly_chart(fig, use_container_width=True, config=config)
+    with metrics.REGISTRY.timer("graph_render"):
+        st.plotly_chart(fig, use_container_width=True, config=config)
     
     # Additional controls
     with st.expander("📊 Graph Statistics"):
         st.write(f"**Nodes:** {len(G.nodes())}")
         st.write(f"**Edges:** {len(G.edges())}")
-        st.write(f"**Average Distance:** {np.mean(list(edge_info.values())):.1f}ft")
+        average_distance = sum(edge_info.values()) / len(edge_info) if edge_info else 0
+        st.write(f"**Average Distance:** {average_distance:.1f}ft")
         st.write(f"**Total Network Length:** {sum(edge_info.values()):.1f}ft")
 # QR Code Scanner Integration
 def handle_qr_scanner():
@@ -957,11 +1882,11 @@ def handle_qr_scanner():
     
     with scanner_tab1:
         st.info("Use your device camera to scan QR codes")
-        qr_code = qrcode_scanner(key="qr_scanner")
+        qr_code = lazy_import("streamlit_qrcode_scanner").qrcode_scanner(key="qr_scanner")
         
         if qr_code:
             st.success(f"✅ QR Code detected: {qr_code}")
-            if qr_code in st.session_state.nav_data['nodes']:
+            if campus_has_node(qr_code):
                 st.session_state.selected_node = qr_code
                 st.info(f"📍 Node '{qr_code}' selected for navigation")
             else:
@@ -971,9 +1896,9 @@ def handle_qr_scanner():
         uploaded_qr = st.file_uploader("Upload QR Code Image", type=['png', 'jpg', 'jpeg'])
         if uploaded_qr:
             try:
-                from pyzbar import pyzbar
-                import cv2
-                import numpy as np
+                pyzbar = lazy_import("pyzbar.pyzbar")
+                cv2 = lazy_import("cv2")
+                np = lazy_import("numpy")
                 
                 # Convert uploaded file to opencv format
                 file_bytes = np.asarray(bytearray(uploaded_qr.read()), dtype=np.uint8)
@@ -986,7 +1911,7 @@ def handle_qr_scanner():
                     for qr in qr_codes:
                         qr_data = qr.data.decode('utf-8')
                         st.success(f"✅ QR Code found: {qr_data}")
-                        if qr_data in st.session_state.nav_data['nodes']:
+                        if campus_has_node(qr_data):
                             st.session_state.selected_node = qr_data
                             st.info(f"📍 Node '{qr_data}' selected for navigation")
                         else:
@@ -1002,49 +1927,207 @@ def handle_qr_scanner():
 def show_system_stats():
     st.subheader("📊 System Statistics")
     
-    nodes = st.session_state.nav_data['nodes']
-    connections = st.session_state.nav_data['connections']
+    stats = nav_store.navigation_statistics(st.session_state.nav_data)
     
     # Basic stats
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🏢 Total Nodes", len(nodes))
+        st.metric("🏢 Total Nodes", stats['total_nodes'])
     
     with col2:
-        total_paths = sum(len(node_data) for node_data in nodes.values())
-        st.metric("🛤️ Total Paths", total_paths)
+        st.metric("🛤️ Total Paths", stats['total_paths'])
     
     with col3:
-        st.metric("🔗 Total Connections", len(connections))
+        st.metric("🔗 Total Connections", stats['total_connections'])
     
     with col4:
-        total_images = sum(
-            len(path_data.get('images', [])) 
-            for node_data in nodes.values() 
-            for path_data in node_data.values()
-        )
-        st.metric("🖼️ Total Images", total_images)
+        st.metric("🖼️ Total Images", stats['total_images'])
+    
+    show_graph_integrity()
     
     # Detailed breakdown
     st.subheader("📋 Node Details")
-    if nodes:
-        node_data = []
-        for node_name, node_paths in nodes.items():
-            paths_count = len(node_paths)
-            images_count = sum(len(path_data.get('images', [])) for path_data in node_paths.values())
-            connections_count = sum(1 for conn in connections if node_name in conn.split("::"))
-            
-            node_data.append({
-                "Node": node_name,
-                "Paths": paths_count,
-                "Images": images_count,
-                "Connections": connections_count
-            })
-        
-        st.dataframe(node_data, use_container_width=True)
+    if stats['node_rows']:
+        st.dataframe(stats['node_rows'], use_container_width=True)
     else:
         st.info("No nodes available")
+    
+    # Cold start cost of the heavy, page-scoped dependencies
+    with st.expander("⏱️ Import Cost"):
+        report = import_report()
+        if report:
+            st.dataframe(report, use_container_width=True)
+            st.caption("First import of each module in this process. Modules load only on the page that needs them.")
+        else:
+            st.info("No heavy modules imported yet")
+
+@fragment(run_every=INTEGRITY_REFRESH_SECONDS)
+def show_graph_integrity():
+    """Connectivity checks, redrawn as edits from any session land"""
+    st.subheader("🧭 Graph Integrity")
+    analyzer = graph_integrity_analyzer()
+    if analyzer is None:
+        st.info("ℹ️ Connectivity checks appear once the saved navigation data can be read")
+        return
+    report = analyzer.report()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🧩 Components", report['components'],
+                  help=f"Largest: {report['largest_component']} of {report['nodes']} nodes")
+    with col2:
+        st.metric("🚫 Unreachable Pairs", report['unreachable_pairs'])
+    with col3:
+        st.metric("⛔ Dead Ends", len(report['dead_ends']))
+    with col4:
+        st.metric("➡️ One-way Links", len(report['one_way']))
+    
+    total_pairs = report['nodes'] * (report['nodes'] - 1)
+    if report['unreachable_pairs']:
+        st.warning(f"{report['unreachable_pairs']} of {total_pairs} start/destination pairs have no route")
+    else:
+        st.success("✅ Every location can be reached from every other location")
+    
+    if report['islands']:
+        with st.expander(f"🏝️ Separated from the main area ({len(report['islands'])} groups)"):
+            st.dataframe([{"Nodes": len(members), "Members": ", ".join(members[:10])}
+                          for members in report['islands'][:INTEGRITY_LIST_LIMIT]],
+                         use_container_width=True)
+    if report['dead_ends']:
+        with st.expander(f"⛔ Dead ends: no way out ({len(report['dead_ends'])})"):
+            st.write(", ".join(report['dead_ends'][:INTEGRITY_LIST_LIMIT]))
+    if report['one_way']:
+        with st.expander(f"➡️ One-way links ({len(report['one_way'])})"):
+            st.dataframe([{"From": source, "To": target}
+                          for source, target in report['one_way'][:INTEGRITY_LIST_LIMIT]],
+                         use_container_width=True)
+    if max(len(report['islands']), len(report['dead_ends']), len(report['one_way'])) > INTEGRITY_LIST_LIMIT:
+        st.caption(f"Lists show the first {INTEGRITY_LIST_LIMIT} findings")
+
+# Performance Panel
+def show_performance_panel():
+    st.subheader("⏱️ Performance")
+    registry = metrics.REGISTRY
+    
+    # GitHub rate limit from the latest response headers
+    remaining = registry.gauge("github_ratelimit_remaining", resource="core")
+    limit = registry.gauge("github_ratelimit_limit", resource="core")
+    reset = registry.gauge("github_ratelimit_reset", resource="core")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("GitHub Requests Left", "—" if remaining is None else remaining)
+    with col2:
+        st.metric("Hourly Limit", "—" if limit is None else limit)
+    with col3:
+        st.metric("Limit Resets", "—" if reset is None else time.strftime("%H:%M:%S", time.localtime(reset)))
+    
+    # Request scheduler: pacing tokens, queued callers and deferred classes
+    budget = GITHUB.scheduler.status()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Burst Tokens", budget['tokens'])
+    with col2:
+        st.metric("Waiting Requests", sum(budget['waiting'].values()))
+    with col3:
+        st.metric("Deferred", ", ".join(budget['deferring']) or "none")
+    
+    # Local repository snapshot
+    syncer = get_snapshot_syncer()
+    cache_status = GITHUB.blob_cache.status()
+    report = syncer.last_report or {}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Snapshot Files", cache_status['files'])
+    with col2:
+        st.metric("Snapshot Size", f"{cache_status['bytes'] / 1024 / 1024:.1f} MB")
+    with col3:
+        synced = report.get('synced_at')
+        st.metric("Last Sync", time.strftime("%H:%M:%S", time.localtime(synced)) if synced else "—")
+    if report.get('error'):
+        st.warning(f"⚠️ Last snapshot sync failed: {report['error']}")
+    elif report:
+        st.caption(f"Last sync: {report['mode']} mode, {report['downloaded']} blob(s) downloaded "
+                   f"with {report['api_calls']} API call(s) in {report['seconds']}s")
+    if st.button("🔄 Sync Snapshot Now"):
+        with st.spinner("Syncing repository snapshot..."):
+            report = syncer.sync_now()
+        if report and report.get('ok'):
+            st.success(f"✅ Snapshot synced ({report['downloaded']} changed blob(s))")
+        else:
+            st.error("❌ Snapshot sync failed")
+    
+    # Zone shards used for visitor routing
+    campus = zoned_campus()
+    if campus is None:
+        st.info("No zone shards yet; they are written with the next navigation snapshot")
+    else:
+        zone_status = campus.status()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Zones", zone_status['zones'])
+        with col2:
+            st.metric("Zones Loaded", len(zone_status['loaded']))
+        with col3:
+            st.metric("Zones Changed Since Build", len(zone_status['changed']))
+    graph = get_route_graph()['graph']
+    if graph is not None:
+        if graph.algorithm() == "dijkstra":
+            st.caption(f"Route search: Dijkstra, as {graph.nodes_without_position} locations have no "
+                       f"position for A*")
+        elif graph.zero_weight_edges['distance']:
+            st.caption(f"Route search: A*; {graph.zero_weight_edges['distance']} paths with a distance "
+                       f"of 0 are left out of its heuristic and may not route optimally")
+    hierarchy_state = get_route_hierarchy()
+    if hierarchy_state['hierarchy'] is not None:
+        st.caption(f"Route hierarchy: {hierarchy_state['hierarchy'].shortcut_count} shortcuts, "
+                   f"built for log record {hierarchy_state['version'][1]}"
+                   + (" (rebuilding)" if hierarchy_state['building'] else ""))
+    st.caption(f"Route cache: {len(get_route_cache())} of {ROUTE_CACHE_ENTRIES} routes · "
+               f"step cards: {len(get_step_cards())} of {STEP_CARD_ENTRIES}")
+    if st.button("🧩 Rebuild Zone Shards"):
+        with st.spinner("Writing zone shards..."):
+            loaded = read_navigation_data()
+            ok = bool(loaded) and write_zone_shards(loaded[0], loaded[2])
+        if ok:
+            st.success("✅ Zone shards written")
+        else:
+            st.error("❌ Failed to write zone shards")
+    
+    st.write("**Timings**")
+    timer_rows = registry.timer_rows()
+    if timer_rows:
+        st.dataframe(timer_rows, use_container_width=True)
+    else:
+        st.info("No timings recorded yet")
+    
+    st.write("**Caches**")
+    cache_rows = registry.cache_rows()
+    if cache_rows:
+        st.dataframe(cache_rows, use_container_width=True)
+    else:
+        st.info("No cache lookups recorded yet")
+    
+    # Export for monitoring
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button(
+            label="💾 Export JSON",
+            data=registry.to_json(),
+            file_name=f"campus_nav_metrics_{int(time.time())}.json",
+            mime="application/json"
+        )
+    with col2:
+        st.download_button(
+            label="💾 Export Prometheus",
+            data=registry.to_prometheus(),
+            file_name="campus_nav_metrics.prom",
+            mime="text/plain"
+        )
+    with col3:
+        if st.button("🔄 Reset Metrics"):
+            registry.reset()
+            st.rerun()
 
 # Data Export/Import Functions
 def export_navigation_data():
@@ -1072,6 +2155,27 @@ def export_navigation_data():
         
         st.success("✅ Export data generated successfully!")
 
+def export_static_site():
+    st.subheader("🌐 Export Static Site")
+    st.write("Precomputes every route into a serverless site (e.g. for GitHub Pages). "
+             "QR codes can link to it as `index.html?from=<node name>`.")
+    
+    max_px = st.slider("Maximum image size (px)", 320, 1600, static_export.MAX_IMAGE_PX, step=80)
+    if st.button("🏗️ Build Static Site"):
+        with st.spinner("Loading images..."):
+            images = get_files_bytes(static_export.bundle_image_paths(st.session_state.nav_data))
+        with st.spinner("Precomputing routes and optimizing images..."):
+            files = static_export.build_bundle(st.session_state.nav_data, images.get, max_px)
+            bundle = static_export.zip_bundle(files)
+        
+        st.download_button(
+            label="💾 Download Site Bundle",
+            data=bundle,
+            file_name=f"campus_nav_site_{int(time.time())}.zip",
+            mime="application/zip"
+        )
+        st.success(f"✅ Built {len(files)} files ({len(bundle) / 1024 / 1024:.1f} MB zipped)")
+
 def import_navigation_data():
     st.subheader("📥 Import Navigation Data")
     
@@ -1110,7 +2214,6 @@ def import_navigation_data():
                         
                         if save_navigation_data(st.session_state.nav_data):
                             st.success("✅ Navigation data imported successfully!")
-                            time.sleep(2)
                             st.rerun()
                         else:
                             st.error("❌ Failed to save imported data")
@@ -1120,6 +2223,43 @@ def import_navigation_data():
             st.error("❌ Invalid JSON file")
         except Exception as e:
             st.error(f"❌ Error importing data: {str(e)}")
+    
+    import_node_positions()
+
+def import_node_positions():
+    """Set node positions from a floor-plan CSV (node, x, y, floor)"""
+    st.subheader("📐 Import Node Positions")
+    st.caption("CSV exported from a floor plan with columns node, x, y and optionally floor (feet)")
+    
+    positions_file = st.file_uploader("Choose CSV file", type=['csv'], key="positions_csv")
+    if not positions_file:
+        return
+    try:
+        positions = routing.read_positions_csv(positions_file.getvalue().decode("utf-8-sig"))
+    except (ValueError, UnicodeDecodeError) as e:
+        st.error(f"❌ Invalid positions file: {str(e)}")
+        return
+    
+    nodes = st.session_state.nav_data['nodes']
+    known = {name: position for name, position in positions.items() if name in nodes}
+    unknown = len(positions) - len(known)
+    st.info(f"📍 {len(known)} positions for existing nodes"
+            + (f", {unknown} rows for unknown nodes will be skipped" if unknown else ""))
+    missing = sum(1 for name in nodes
+                  if name not in known and routing.node_position(st.session_state.nav_data, name) is None)
+    if missing:
+        st.warning(f"⚠️ {missing} nodes have no position in this file; A* is only used once every node has one")
+    
+    if known and st.button("📐 Import Positions"):
+        node_meta = st.session_state.nav_data.setdefault(zones.META_SECTION, {})
+        for name, position in known.items():
+            node_meta[name] = {**node_meta.get(name, {}), **position}
+        with st.spinner("Saving positions..."):
+            if save_navigation_data(st.session_state.nav_data,
+                                    [(zones.META_SECTION, name) for name in known]):
+                st.success(f"✅ Imported {len(known)} node positions")
+            else:
+                st.error("❌ Failed to save node positions")
 
 # QR Code Management
 def manage_qr_codes():
@@ -1132,23 +2272,22 @@ def manage_qr_codes():
     
     # Display all QR codes
     st.write("**Available QR Codes:**")
+    qr_paths = {node_name: f"{BASE_PATH}/qrcodes/{node_name}.png" for node_name in nodes}
+    with st.spinner("Loading QR codes..."):
+        qr_codes = get_files_bytes(list(qr_paths.values()))
     
     cols = st.columns(3)
     for idx, node_name in enumerate(nodes):
         with cols[idx % 3]:
             st.write(f"**{node_name}**")
-            qr_img = get_qr_code_from_github(node_name)
-            if qr_img:
-                st.image(qr_img, caption=f"QR for {node_name}", width=150)
+            qr_png = qr_codes.get(qr_paths[node_name])
+            if qr_png:
+                st.image(qr_png, caption=f"QR for {node_name}", width=150)
                 
                 # Download button for individual QR codes
-                img_bytes = io.BytesIO()
-                qr_img.save(img_bytes, format='PNG')
-                img_bytes.seek(0)
-                
                 st.download_button(
                     label="💾 Download",
-                    data=img_bytes.getvalue(),
+                    data=qr_png,
                     file_name=f"qr_{node_name}.png",
                     mime="image/png",
                     key=f"download_qr_{node_name}"
@@ -1176,13 +2315,11 @@ def manage_qr_codes():
             for idx, node_name in enumerate(nodes):
                 progress_bar.progress((idx + 1) / len(nodes))
                 with st.spinner(f"Generating QR for {node_name}..."):
-                    if generate_and_save_qr(node_name):
+                    if generate_and_save_qr(node_name, bulk=True):
                         success_count += 1
-                    time.sleep(0.5)  # Small delay to show progress
             
             progress_bar.empty()
-            st.success(f"✅ Generated {success_count}/{len(nodes)} QR codes successfully!")
-            time.sleep(1)
+            st.success(f"✅ Queued {success_count}/{len(nodes)} QR codes for upload!")
             st.rerun()
     
     with col2:
@@ -1194,11 +2331,8 @@ def manage_qr_codes():
             
             with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
                 for node_name in nodes:
-                    qr_img = get_qr_code_from_github(node_name)
-                    if qr_img:
-                        img_bytes = io.BytesIO()
-                        qr_img.save(img_bytes, format='PNG')
-                        zip_file.writestr(f"qr_{node_name}.png", img_bytes.getvalue())
+                    if qr_paths[node_name] in qr_codes:
+                        zip_file.writestr(f"qr_{node_name}.png", qr_codes[qr_paths[node_name]])
             
             zip_buffer.seek(0)
             
@@ -1242,10 +2376,12 @@ def manage_image_gallery():
                           if info['node'] == selected_node_filter}
     
     # Grid display
+    with st.spinner("Loading images..."):
+        images = get_files_bytes(list(filtered_images))
     cols = st.columns(3)
     for idx, (img_path, img_info) in enumerate(filtered_images.items()):
         with cols[idx % 3]:
-            img = get_image_from_github(img_path)
+            img = images.get(img_path)
             if img:
                 st.image(img, caption=f"{img_info['node']} - {img_info['label']}", 
                         use_column_width=True)
@@ -1264,9 +2400,8 @@ def manage_image_gallery():
                         if img_path in path_data['images']:
                             path_data['images'].remove(img_path)
                         
-                        if save_navigation_data(st.session_state.nav_data):
+                        if save_navigation_data(st.session_state.nav_data, [("nodes", img_info['node'])]):
                             st.success("✅ Image deleted!")
-                            time.sleep(1)
                             st.rerun()
                         else:
                             st.error("❌ Failed to update data")
@@ -1275,6 +2410,71 @@ def manage_image_gallery():
             else:
                 st.error(f"Failed to load: {img_path.split('/')[-1]}")
 
+# Admin Panel
+def show_admin_panel():
+    st.header("🔧 Admin Panel")
+    
+    # Authentication could be added here
+    admin_tabs = st.tabs([
+        "🏢 Manage Nodes", 
+        "🔗 Link Nodes", 
+        "🗑️ Delete Items",
+        "📊 Statistics",
+        "🏷️ QR Codes",
+        "🖼️ Images",
+        "💾 Data Management",
+        "⏱️ Performance"
+    ])
+    
+    with admin_tabs[0]:
+        handle_node_creation()
+    
+    with admin_tabs[1]:
+        handle_node_linking()
+    
+    with admin_tabs[2]:
+        delete_tab1, delete_tab2, delete_tab3, delete_tab4, delete_tab5 = st.tabs(
+            ["🏢 Delete Node", "🛤️ Delete Path", "🔗 Delete Link", "🚧 Temporary Closure", "🧹 Clean Up"])
+        
+        with delete_tab1:
+            delete_node()
+        
+        with delete_tab2:
+            delete_path()
+        
+        with delete_tab3:
+            delete_link()
+        
+        with delete_tab4:
+            manage_closures()
+        
+        with delete_tab5:
+            manage_cleanup()
+    
+    with admin_tabs[3]:
+        show_system_stats()
+    
+    with admin_tabs[4]:
+        manage_qr_codes()
+    
+    with admin_tabs[5]:
+        manage_image_gallery()
+    
+    with admin_tabs[6]:
+        data_tab1, data_tab2, data_tab3 = st.tabs(["📤 Export", "📥 Import", "🌐 Static Site"])
+        
+        with data_tab1:
+            export_navigation_data()
+        
+        with data_tab2:
+            import_navigation_data()
+        
+        with data_tab3:
+            export_static_site()
+    
+    with admin_tabs[7]:
+        show_performance_panel()
+
 # Main Application
 def main():
     st.set_page_config(
@@ -1292,14 +2492,11 @@ def main():
         st.error("❌ GitHub configuration missing. Please set GITHUB_TOKEN and GITHUB_REPO in Streamlit secrets.")
         st.stop()
     
-    # Initialize GitHub structure if needed
-    if not st.session_state.get('github_initialized', False):
-        with st.spinner("Initializing GitHub structure..."):
-            if initialize_github_structure():
-                st.session_state.github_initialized = True
-            else:
-                st.error("Failed to initialize GitHub structure")
-                st.stop()
+    # Initialize GitHub structure once per process
+    if not ensure_github_structure():
+        st.error("Failed to initialize GitHub structure")
+        st.stop()
+    get_snapshot_syncer()
     
     # Sidebar Navigation
     st.sidebar.title("🧭 Navigation")
@@ -1307,9 +2504,11 @@ def main():
         "Choose Function",
         ["🏠 Home", "📱 QR Scanner", "🗺️ Find Path", "🔧 Admin Panel"]
     )
+    render_save_status()
     
     # Main Content
     if page == "🏠 Home":
+        ensure_navigation_data()
         st.header("Welcome to Campus Navigator!")
         
         col1, col2 = st.columns([2, 1])
@@ -1359,17 +2558,15 @@ def main():
             
             # Quick navigation from current location
             st.subheader("🎯 Quick Navigation")
-            available_destinations = [n for n in st.session_state.nav_data['nodes'].keys() 
-                                    if n != st.session_state.selected_node]
-            
-            if available_destinations:
-                destination = st.selectbox("Where do you want to go?", available_destinations)
+            if len(campus_nodes()) > 1:
+                destination = node_picker("Where do you want to go?", "scan_destination",
+                                          exclude=st.session_state.selected_node)
                 
-                if st.button("🧭 Get Directions"):
-                    path = find_path(st.session_state.selected_node, destination)
+                if destination and st.button("🧭 Get Directions"):
+                    path, _, _, _, steps = campus_route(st.session_state.selected_node, destination)
                     if path:
                         st.success(f"✅ Route found! {len(path)-1} steps to {destination}")
-                        display_navigation(path)
+                        display_navigation(steps)
                     else:
                         st.error("❌ No route found to destination")
             else:
@@ -1378,8 +2575,7 @@ def main():
     elif page == "🗺️ Find Path":
         st.header("🗺️ Path Finding")
         
-        nodes = list(st.session_state.nav_data['nodes'].keys())
-        if len(nodes) < 2:
+        if len(campus_nodes()) < 2:
             st.warning("⚠️ At least 2 nodes are required for path finding")
             st.info("Please add more nodes in the Admin Panel")
             return
@@ -1387,80 +2583,60 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            start_node = st.selectbox("📍 Starting Point", nodes, 
-                                    index=nodes.index(st.session_state.selected_node) 
-                                    if st.session_state.selected_node in nodes else 0)
+            start_node = node_picker("📍 Starting Point", "path_start",
+                                     default=st.session_state.selected_node)
         
         with col2:
-            available_destinations = [n for n in nodes if n != start_node]
-            end_node = st.selectbox("🎯 Destination", available_destinations)
+            end_node = node_picker("🎯 Destination", "path_end", exclude=start_node)
+        
+        profile = st.radio("🚶 Route preference", list(routing.PROFILES), horizontal=True,
+                           format_func=lambda name: routing.PROFILES[name]['label'], key="route_profile")
         
-        if st.button("🔍 Find Best Route"):
+        alternatives = st.checkbox("🔀 Also show alternative routes", key="route_alternatives")
+        
+        if start_node and end_node and st.button("🔍 Find Best Route"):
             with st.spinner("Calculating optimal route..."):
-                path, total_distance, graph = find_path_with_weight(start_node, end_node)
+                if alternatives:
+                    routes, route_data = campus_alternatives(start_node, end_node, profile)
+                    path = routes[0][0] if routes else None
+                else:
+                    path, total_distance, expanded, route_data, steps = campus_route(start_node, end_node, profile)
                 
-                if path:
+                if path and alternatives:
+                    if len(routes) == 1:
+                        st.info("No clearly different alternative route exists")
+                    best = routes[0][1]
+                    labels = [f"🥇 Best · {best:.0f} ft"] + [
+                        f"Route {i} · +{distance - best:.0f} ft" for i, (_, distance) in enumerate(routes[1:], start=2)
+                    ]
+                    closed = current_closures()
+                    for tab, (route, distance) in zip(st.tabs(labels), routes):
+                        with tab:
+                            st.success(f"✅ Distance: {distance:.1f} ft, Steps: {len(route)-1}")
+                            show_route(route, distance, route_data,
+                                       routing.route_steps(route_data, route, profile, closed))
+                elif path:
                     st.success(f"✅ Route Found! Distance: {total_distance:.1f} ft, Steps: {len(path)-1}")
-                    
-                    # Show path visualization
-                    show_path_graph_with_weights(path, total_distance)
-                    
-                    # Show detailed navigation
-                    st.header("📋 Step-by-Step Directions")
-                    display_navigation(path)
+                    if expanded is None:
+                        st.caption("⚡ Served from the route cache")
+                    else:
+                        st.caption(f"🔎 {expanded} locations searched")
+                    show_route(path, total_distance, route_data, steps)
                 else:
                     st.error("❌ No route found between selected locations")
-                    st.info("Check if the locations are connected in the Admin Panel")
+                    closed = current_closures()
+                    if closed:
+                        st.info(f"🚧 {len(closed)} temporary closure(s) in effect")
+                    if profile != routing.DEFAULT_PROFILE:
+                        st.info(f"No route fits {routing.PROFILES[profile]['label']}; try another preference")
+                    else:
+                        st.info("Check if the locations are connected in the Admin Panel")
     
     elif page == "🔧 Admin Panel":
-        st.header("🔧 Admin Panel")
-        
-        # Authentication could be added here
-        admin_tabs = st.tabs([
-            "🏢 Manage Nodes", 
-            "🔗 Link Nodes", 
-            "🗑️ Delete Items",
-            "📊 Statistics",
-            "🏷️ QR Codes",
-            "🖼️ Images",
-            "💾 Data Management"
-        ])
-        
-        with admin_tabs[0]:
-            handle_node_creation()
-        
-        with admin_tabs[1]:
-            handle_node_linking()
-        
-        with admin_tabs[2]:
-            delete_tab1, delete_tab2, delete_tab3 = st.tabs(["🏢 Delete Node", "🛤️ Delete Path", "🔗 Delete Link"])
-            
-            with delete_tab1:
-                delete_node()
-            
-            with delete_tab2:
-                delete_path()
-            
-            with delete_tab3:
-                delete_link()
-        
-        with admin_tabs[3]:
-            show_system_stats()
-        
-        with admin_tabs[4]:
-            manage_qr_codes()
-        
-        with admin_tabs[5]:
-            manage_image_gallery()
-        
-        with admin_tabs[6]:
-            data_tab1, data_tab2 = st.tabs(["📤 Export", "📥 Import"])
-            
-            with data_tab1:
-                export_navigation_data()
-            
-            with data_tab2:
-                import_navigation_data()
+        # Admin reads and writes yield the API budget to visitors
+        with rate_limiter.priority(rate_limiter.ADMIN):
+            ensure_navigation_data()
+            show_admin_panel()
 
 if __name__ == "__main__":
     main()
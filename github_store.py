@@ -0,0 +1,453 @@
+import base64
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import metrics
+import nav_store
+import rate_limiter
+
+# Streamlit-free client for the GitHub contents API, shared by the app and
+# the headless tools. CAMPUS_NAV_GITHUB_API_URL points it at a local
+# stand-in server (see benchmarks/fake_github.py) instead of api.github.com.
+
+DEFAULT_API_URL = os.environ.get("CAMPUS_NAV_GITHUB_API_URL", "https://api.github.com")
+REQUEST_TIMEOUT = 30  # seconds
+ARCHIVE_TIMEOUT = 300  # seconds, for whole-repository downloads
+FALLBACK_CACHE_BYTES = 64 * 1024 * 1024  # Last good copies served while rate limited
+TREE_TTL = 60  # seconds a tree listing keeps answering batch reads
+BATCH_WORKERS = 8  # Concurrent blob downloads in one batch read
+COMMIT_ATTEMPTS = 3  # Tries for a batched commit racing other writers
+LOG_READ_ATTEMPTS = 3  # Tries for a snapshot plus log read that finds a gap
+LOG_RETRY_DELAY = 0.5  # seconds before reading again after a gap
+
+
+class LogGap(Exception):
+    """The operation log skips a sequence number"""
+
+
+class GitHubStore:
+    """Files of one repository, read and written through the contents API"""
+
+    def __init__(self, token, repo, base_path="campus_navigator", api_url=DEFAULT_API_URL,
+                 registry=None, scheduler=None, blob_cache=None):
+        self.repo = repo
+        self.base_path = base_path
+        self.nav_data_path = f"{base_path}/nav_data.json"
+        self.nav_log_path = f"{base_path}/{nav_store.LOG_DIR}"
+        self.api_url = api_url.rstrip("/")
+        self.headers = {"Authorization": f"token {token}"} if token else {}
+        self.registry = registry or metrics.REGISTRY
+        self.scheduler = scheduler or rate_limiter.SCHEDULER
+        self.blob_cache = blob_cache
+        self._branch = None
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._fallback = OrderedDict()
+        self._fallback_bytes = 0
+        self._tree = None  # (listed at, {path: blob SHA}) for batch reads
+        self._pool = None
+
+    def _session(self):
+        # One pooled HTTP session per thread; requests.Session is not thread-safe
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def request(self, method, path, **kwargs):
+        """Call the contents API, recording latency and rate-limit headers
+
+        Waits for the rate-limit scheduler first; reads default to visitor
+        priority and writes to admin priority unless the caller runs inside
+        rate_limiter.priority(). Raises rate_limiter.RateLimited when the
+        budget does not allow the call.
+        """
+        return self.api_request(method, f"contents/{path}", **kwargs)
+
+    def api_request(self, method, endpoint, **kwargs):
+        """Call any /repos/{repo}/ endpoint through the scheduler"""
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        default = rate_limiter.VISITOR if method == "GET" else rate_limiter.ADMIN
+        self.scheduler.acquire(rate_limiter.current_priority(default))
+        with self._lock:
+            self.request_count += 1
+        with self.registry.timer("github_request", method=method):
+            response = self._session().request(
+                method,
+                f"{self.api_url}/repos/{self.repo}/{endpoint}".rstrip("/"),
+                headers=self.headers,
+                **kwargs
+            )
+        self.scheduler.update(response.headers, response.status_code)
+        self.registry.record_rate_limit(response.headers)
+        self.registry.incr("github_responses", method=method, status=response.status_code)
+        return response
+
+    # Files
+    def list_dir(self, path):
+        """Directory listing entries, or [] if the folder does not exist"""
+        response = self.request("GET", path)
+        return response.json() if response.status_code == 200 else []
+
+    def get(self, path):
+        """(content bytes, blob SHA) of a file, or (None, None) if missing
+
+        While the API budget is exhausted the last copy read in this process
+        is returned instead, if there is one; without one RateLimited is
+        raised, as it is not a missing file.
+        """
+        try:
+            return self.get_strict(path)
+        except requests.HTTPError:
+            return None, None
+
+    def get_strict(self, path):
+        """Like get(), but (None, None) only means the file does not exist
+
+        Raises requests.HTTPError when the read failed for another reason
+        (and no earlier copy could stand in).
+        """
+        try:
+            response = self.request("GET", path)
+        except rate_limiter.RateLimited:
+            cached = self._cached(path)
+            if cached is None:
+                raise
+            return cached
+        if response.status_code in (403, 429):
+            cached = self._cached(path)
+            if cached is not None:
+                return cached
+        if response.status_code == 404:
+            return None, None
+        if response.status_code != 200:
+            raise requests.HTTPError(f"reading {path} failed with status {response.status_code}",
+                                     response=response)
+        body = response.json()
+        content = base64.b64decode(body['content'])
+        self._remember(path, content, body['sha'])
+        return content, body['sha']
+
+    def get_cached(self, path):
+        """Like get(), but served from the local blob cache when it has the file"""
+        if self.blob_cache is not None:
+            content, sha = self.blob_cache.read(path)
+            self.registry.cache_lookup("blob_snapshot", hit=content is not None)
+            if content is not None:
+                return content, sha
+        content, sha = self.get(path)
+        if content is not None and self.blob_cache is not None:
+            self.blob_cache.store(path, content, sha)
+        return content, sha
+
+    def get_files_many(self, paths):
+        """{path: content bytes} of many files, leaving out the ones that do not exist
+
+        Files in the local blob cache cost no call. The rest are resolved to
+        blob SHAs with one tree listing (reused for TREE_TTL seconds, and
+        kept up to date with this store's own writes), so missing files cost
+        no call either, and every distinct blob is downloaded once,
+        BATCH_WORKERS at a time.
+        """
+        files = {}
+        wanted = []
+        for path in dict.fromkeys(paths):
+            content = None
+            if self.blob_cache is not None:
+                content, _ = self.blob_cache.read(path)
+                self.registry.cache_lookup("blob_snapshot", hit=content is not None)
+            if content is not None:
+                files[path] = content
+            else:
+                wanted.append(path)
+        if not wanted:
+            return files
+
+        self.registry.incr("github_batch_files", len(wanted))
+        tree = self._batch_tree()
+        if tree is None:
+            # No usable listing; fall back to one contents call per file
+            fetched = self._map(self._get_quietly, wanted)
+            files.update((path, content) for path, content in zip(wanted, fetched) if content is not None)
+            return files
+
+        by_sha = {}
+        for path in wanted:
+            if path in tree:
+                by_sha.setdefault(tree[path], []).append(path)
+        shas = list(by_sha)
+        for sha, content in zip(shas, self._map(lambda sha: self._batch_blob(sha, by_sha[sha]), shas)):
+            if content is None:
+                continue
+            for path in by_sha[sha]:
+                files[path] = content
+                self._remember(path, content, sha)
+                if self.blob_cache is not None:
+                    self.blob_cache.store(path, content, sha)
+        return files
+
+    def _batch_tree(self):
+        """{path: SHA} listing at most TREE_TTL seconds old, or None"""
+        with self._lock:
+            listed = self._tree
+        if listed is None or time.time() - listed[0] >= TREE_TTL:
+            try:
+                tree = self.get_tree()
+            except (requests.RequestException, rate_limiter.RateLimited):
+                tree = None
+            if tree is None:
+                # Rate limited or truncated: an old listing beats one call per file
+                return listed[1] if listed is not None else None
+            with self._lock:
+                self._tree = listed = (time.time(), tree)
+        return listed[1]
+
+    def _get_quietly(self, path):
+        try:
+            return self.get(path)[0]
+        except (requests.RequestException, rate_limiter.RateLimited):
+            return None
+
+    def _batch_blob(self, sha, paths):
+        if self.blob_cache is not None and self.blob_cache.has_blob(sha):
+            return self.blob_cache.read_blob(sha)
+        try:
+            content = self.get_blob(sha)
+        except (requests.RequestException, rate_limiter.RateLimited):
+            content = None
+        if content is None:
+            cached = self._cached(paths[0])
+            content = cached[0] if cached is not None else None
+        return content
+
+    def _map(self, func, items):
+        """func over items on the batch pool, at the caller's request priority"""
+        level = rate_limiter.current_priority(rate_limiter.VISITOR)
+
+        def call(item):
+            with rate_limiter.priority(level):
+                return func(item)
+
+        if len(items) <= 1:
+            return [call(item) for item in items]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(BATCH_WORKERS, thread_name_prefix="github-batch")
+        return list(self._pool.map(call, items))
+
+    def _note_tree(self, path, sha):
+        with self._lock:
+            if self._tree is not None:
+                if sha:
+                    self._tree[1][path] = sha
+                else:
+                    self._tree[1].pop(path, None)
+
+    # Last good copies, for degrading gracefully when rate limited
+    def _remember(self, path, content, sha):
+        with self._lock:
+            previous = self._fallback.pop(path, None)
+            if previous:
+                self._fallback_bytes -= len(previous[0])
+            if len(content) > FALLBACK_CACHE_BYTES // 4:
+                return
+            self._fallback[path] = (content, sha)
+            self._fallback_bytes += len(content)
+            while self._fallback_bytes > FALLBACK_CACHE_BYTES:
+                _, (old, _) = self._fallback.popitem(last=False)
+                self._fallback_bytes -= len(old)
+
+    def _cached(self, path):
+        with self._lock:
+            cached = self._fallback.get(path)
+            if cached is not None:
+                self._fallback.move_to_end(path)
+        self.registry.cache_lookup("rate_limit_fallback", hit=cached is not None)
+        return cached
+
+    def put(self, path, content, message, sha=None):
+        """Create (no sha) or update a file, returning the API response"""
+        if isinstance(content, str):
+            content = content.encode()
+        data = {"message": message, "content": base64.b64encode(content).decode()}
+        if sha:
+            data["sha"] = sha
+        response = self.request("PUT", path, json=data)
+        if response.status_code in (200, 201):
+            sha = response.json()['content']['sha']
+            self._note_tree(path, sha)
+            if self.blob_cache is not None:
+                self.blob_cache.store(path, content, sha)
+        return response
+
+    def delete(self, path, sha=None):
+        """Delete a file; a file that does not exist counts as deleted"""
+        if not sha:
+            _, sha = self.get(path)
+            if not sha:
+                return True
+        response = self.request("DELETE", path, json={"message": f"Delete {path}", "sha": sha})
+        if response.status_code == 200:
+            self._note_tree(path, None)
+            if self.blob_cache is not None:
+                self.blob_cache.forget(path)
+        return response.status_code == 200
+
+    # Whole-tree reads through the git data API
+    def default_branch(self):
+        if self._branch is None:
+            response = self.api_request("GET", "")
+            self._branch = response.json().get('default_branch', "main") if response.status_code == 200 else "main"
+        return self._branch
+
+    def get_tree(self, ref=None):
+        """{path: blob SHA} of every file under base_path in one call
+
+        Returns None if the listing failed or GitHub truncated it.
+        """
+        response = self.api_request("GET", f"git/trees/{ref or self.default_branch()}",
+                                    params={"recursive": "1"})
+        if response.status_code != 200:
+            return None
+        body = response.json()
+        if body.get('truncated'):
+            return None
+        prefix = f"{self.base_path}/"
+        return {
+            entry['path']: entry['sha'] for entry in body['tree']
+            if entry['type'] == 'blob' and entry['path'].startswith(prefix)
+        }
+
+    def get_blob(self, sha):
+        """Content of a blob by SHA, or None"""
+        response = self.api_request("GET", f"git/blobs/{sha}")
+        if response.status_code != 200:
+            return None
+        return base64.b64decode(response.json()['content'])
+
+    def delete_many(self, paths, message):
+        """Delete many files in a single commit through the git data API
+
+        Every path must exist on the default branch. Returns the new commit
+        SHA, or None if the commit could not be made. Costs five calls
+        however many files go, plus four per retry when another commit
+        lands in between.
+        """
+        paths = sorted(set(paths))
+        if not paths:
+            return None
+        branch = self.default_branch()
+        entries = [{"path": path, "mode": "100644", "type": "blob", "sha": None} for path in paths]
+        for _ in range(COMMIT_ATTEMPTS):
+            response = self.api_request("GET", f"git/ref/heads/{branch}")
+            if response.status_code != 200:
+                return None
+            head = response.json()['object']['sha']
+            response = self.api_request("GET", f"git/commits/{head}")
+            if response.status_code != 200:
+                return None
+            base_tree = response.json()['tree']['sha']
+            response = self.api_request("POST", "git/trees", json={"base_tree": base_tree, "tree": entries})
+            if response.status_code != 201:
+                return None
+            response = self.api_request("POST", "git/commits", json={
+                "message": message, "tree": response.json()['sha'], "parents": [head]})
+            if response.status_code != 201:
+                return None
+            commit = response.json()['sha']
+            # Not a fast-forward (422) means someone else committed meanwhile
+            response = self.api_request("PATCH", f"git/refs/heads/{branch}", json={"sha": commit})
+            if response.status_code == 200:
+                for path in paths:
+                    self._note_tree(path, None)
+                    if self.blob_cache is not None:
+                        self.blob_cache.forget(path)
+                return commit
+            if response.status_code != 422:
+                return None
+        return None
+
+    def download_archive(self, ref=None):
+        """Every file under base_path from a single zipball download
+
+        Returns {path: content}, or None if the download failed.
+        """
+        response = self.api_request("GET", f"zipball/{ref or self.default_branch()}",
+                                    timeout=ARCHIVE_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        prefix = f"{self.base_path}/"
+        files = {}
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                # Entries sit in an "<owner>-<repo>-<commit>/" top-level folder
+                _, _, path = info.filename.partition("/")
+                if path.startswith(prefix):
+                    files[path] = archive.read(info)
+        return files
+
+    # Navigation data (snapshot plus operation log)
+    def list_navigation_log(self, after_seq):
+        """List operation log records newer than after_seq, oldest first"""
+        records = []
+        for item in self.list_dir(self.nav_log_path):
+            seq = nav_store.parse_log_seq(item['name']) if item['type'] == 'file' else None
+            if seq is not None and seq > after_seq:
+                records.append((seq, item))
+        return sorted(records, key=lambda record: record[0])
+
+    def fetch_navigation_log(self, after_seq):
+        """Fetch operations logged after after_seq as a list of (seq, ops)
+
+        Raises LogGap when the listing skips a sequence number, so no later
+        record is applied without the ones before it.
+        """
+        entries = []
+        for seq, item in self.list_navigation_log(after_seq):
+            expected = after_seq + len(entries) + 1
+            if seq != expected:
+                raise LogGap(f"navigation log record {expected} is missing")
+            try:
+                content, _ = self.get(item['path'])
+            except (requests.RequestException, rate_limiter.RateLimited):
+                content = None
+            if content is None:
+                # Stop at the gap; a later save will run into it and catch up
+                break
+            entries.append((seq, nav_store.parse_log_entry(content.decode())))
+        return entries
+
+    def read_navigation_data(self):
+        """Read nav_data.json and replay its operation log
+
+        Returns (data, snapshot_seq, seq, snapshot_sha), or None if the
+        snapshot is missing. A gap in the log (a compaction between the two
+        reads, or a listing that lags behind) is read again from the
+        snapshot; LogGap is raised if it persists.
+        """
+        for attempt in range(LOG_READ_ATTEMPTS):
+            content, sha = self.get(self.nav_data_path)
+            if not content:
+                return None
+            data, snapshot_seq = nav_store.parse_snapshot(content.decode())
+            try:
+                entries = self.fetch_navigation_log(snapshot_seq)
+            except LogGap:
+                if attempt == LOG_READ_ATTEMPTS - 1:
+                    raise
+                time.sleep(LOG_RETRY_DELAY)
+                continue
+            seq = snapshot_seq
+            for seq, ops in entries:
+                nav_store.apply_operations(data, ops)
+            return data, snapshot_seq, seq, sha
@@ -0,0 +1,297 @@
+import threading
+
+import metrics
+
+# Connectivity checks for the admin panel: strongly connected components,
+# how many (start, end) pairs have no route, dead ends (nodes with no way
+# out) and one-way links (a → b without any b → a). Like the search index
+# it is built once and then kept up to date from the operations saved to
+# the log. A new link can only merge components, found by one search
+# forwards from its target and one backwards from its source; a removed
+# link can only split its own component, which is the only part searched
+# again. The unreachable pair count is derived from the (usually tiny)
+# graph of components when it is asked for after a change.
+#
+# A connection counts as a link while both of its nodes and its path
+# exist, as in routing; accessibility profiles and closures are ignored.
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+class GraphIntegrity:
+    """Incrementally maintained connectivity of the campus graph"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths = {}  # node -> set of path keys
+        self._connections = {}  # conn key -> (from, path_key, to)
+        self._touching = {}  # node -> conn keys starting or ending there
+        self._links = {}  # conn key -> (from, to), for connections that count
+        self._out = {}  # node -> {target: number of links}
+        self._in = {}  # node -> {source: number of links}
+        self._dead_ends = set()
+        self._one_way = set()
+        self._component = {}  # node -> component id
+        self._members = {}  # component id -> set of nodes
+        self._next_component = 0
+        self._bit = {}  # node -> bit position for reachability sets
+        self._next_bit = 0
+        self._unreachable = None  # Cached pair count, None after a change
+
+    @classmethod
+    def build(cls, nav_data):
+        with metrics.REGISTRY.timer("integrity_build"):
+            analyzer = cls()
+            for name, paths in nav_data['nodes'].items():
+                analyzer._paths[name] = set(paths or ())
+                analyzer._add_node(name)
+            for conn_key, details in nav_data['connections'].items():
+                analyzer._set_connection(conn_key, details)
+                link = analyzer._link_of(conn_key)
+                if link:
+                    analyzer._links[conn_key] = link
+                    analyzer._count_link(*link)
+            analyzer._members.clear()
+            analyzer._find_components(list(analyzer._paths))
+        return analyzer
+
+    # Raw tables
+    def _set_connection(self, conn_key, details):
+        self._connections[conn_key] = (details['from'], details['path_key'], details['to'])
+        for node in (details['from'], details['to']):
+            self._touching.setdefault(node, set()).add(conn_key)
+
+    def _drop_connection(self, conn_key):
+        connection = self._connections.pop(conn_key, None)
+        if connection is None:
+            return
+        for node in (connection[0], connection[2]):
+            touching = self._touching.get(node)
+            if touching is not None:
+                touching.discard(conn_key)
+                if not touching:
+                    del self._touching[node]
+
+    def _link_of(self, conn_key):
+        """(from, to) if the connection is usable, else None"""
+        connection = self._connections.get(conn_key)
+        if connection is None:
+            return None
+        source, path_key, target = connection
+        if source == target or target not in self._paths or path_key not in self._paths.get(source, ()):
+            return None
+        return source, target
+
+    # Nodes and links
+    def _add_node(self, node):
+        self._bit[node] = self._next_bit
+        self._next_bit += 1
+        self._out[node], self._in[node] = {}, {}
+        self._dead_ends.add(node)
+        self._component[node] = self._next_component
+        self._members[self._next_component] = {node}
+        self._next_component += 1
+        self._unreachable = None
+
+    def _drop_node(self, node):
+        # Its links are gone by now, so it is a component of its own
+        self._members.pop(self._component.pop(node), None)
+        del self._bit[node], self._out[node], self._in[node]
+        self._dead_ends.discard(node)
+        self._unreachable = None
+
+    def _count_link(self, source, target):
+        """Count a link; True if it is the first one from source to target"""
+        count = self._out[source].get(target, 0)
+        self._out[source][target] = count + 1
+        self._in[target][source] = count + 1
+        if count:
+            return False
+        self._dead_ends.discard(source)
+        if source in self._out[target]:
+            self._one_way.discard((target, source))
+        else:
+            self._one_way.add((source, target))
+        return True
+
+    def _add_link(self, source, target):
+        if self._count_link(source, target):
+            self._merge_components(source, target)
+            self._unreachable = None
+
+    def _remove_link(self, source, target):
+        count = self._out[source][target] - 1
+        if count:
+            self._out[source][target] = self._in[target][source] = count
+            return
+        del self._out[source][target], self._in[target][source]
+        if not self._out[source]:
+            self._dead_ends.add(source)
+        self._one_way.discard((source, target))
+        if source in self._out[target]:
+            self._one_way.add((target, source))
+        if self._component[source] == self._component[target]:
+            self._find_components(list(self._members.pop(self._component[source])))
+        self._unreachable = None
+
+    def _relink(self, conn_keys):
+        """Bring the links of conn_keys in line with the raw tables"""
+        for conn_key in conn_keys:
+            old, new = self._links.get(conn_key), self._link_of(conn_key)
+            if old == new:
+                continue
+            if old:
+                del self._links[conn_key]
+                self._remove_link(*old)
+            if new:
+                self._links[conn_key] = new
+                self._add_link(*new)
+
+    # Strongly connected components
+    def _merge_components(self, source, target):
+        """Merge the components a new source → target link puts on a cycle"""
+        if self._component[source] == self._component[target]:
+            return
+        forward = self._reach(target, self._out)
+        if source not in forward:
+            return
+        cycle = self._reach(source, self._in, within=forward)
+        merged = self._component[source]
+        for component in {self._component[node] for node in cycle} - {merged}:
+            for node in self._members.pop(component):
+                self._component[node] = merged
+                self._members[merged].add(node)
+
+    def _reach(self, start, edges, within=None):
+        seen = {start}
+        stack = [start]
+        while stack:
+            for neighbour in edges[stack.pop()]:
+                if neighbour not in seen and (within is None or neighbour in within):
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return seen
+
+    def _find_components(self, nodes):
+        """Tarjan's algorithm over the subgraph induced by nodes (iteratively)"""
+        inside = set(nodes)
+        index, low = {}, {}
+        stack, on_stack = [], set()
+        counter = 0
+        for root in nodes:
+            if root in index:
+                continue
+            work = [(root, iter(self._out[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, neighbours = work[-1]
+                advanced = False
+                for neighbour in neighbours:
+                    if neighbour not in inside:
+                        continue
+                    if neighbour not in index:
+                        index[neighbour] = low[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack.add(neighbour)
+                        work.append((neighbour, iter(self._out[neighbour])))
+                        advanced = True
+                        break
+                    if neighbour in on_stack:
+                        low[node] = min(low[node], index[neighbour])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = self._next_component
+                    self._next_component += 1
+                    members = self._members[component] = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.add(member)
+                        self._component[member] = component
+                        if member == node:
+                            break
+
+    # Updates
+    def apply_operations(self, ops):
+        """Update the analysis for nav_store operations"""
+        with self._lock:
+            for op in ops:
+                section, key = op['section'], op['key']
+                if section == "nodes":
+                    added = key not in self._paths
+                    if op['op'] == "set":
+                        self._paths[key] = set(op['value'] or ())
+                        if added:
+                            self._add_node(key)
+                    elif added:
+                        continue
+                    else:
+                        del self._paths[key]
+                    self._relink(list(self._touching.get(key, ())))
+                    if op['op'] == "delete":
+                        self._drop_node(key)
+                elif section == "connections":
+                    self._drop_connection(key)
+                    if op['op'] == "set":
+                        self._set_connection(key, op['value'])
+                    self._relink([key])
+
+    # Results
+    def _unreachable_pairs(self):
+        """Ordered (start, end) pairs with no route, over the condensed graph"""
+        successors = {component: set() for component in self._members}
+        indegree = dict.fromkeys(self._members, 0)
+        for source, targets in self._out.items():
+            component = self._component[source]
+            for target in targets:
+                other = self._component[target]
+                if other != component and other not in successors[component]:
+                    successors[component].add(other)
+                    indegree[other] += 1
+        # Reachable node sets as bitsets, sinks first
+        order = [component for component, count in indegree.items() if not count]
+        for component in order:
+            for other in successors[component]:
+                indegree[other] -= 1
+                if not indegree[other]:
+                    order.append(other)
+        reach = {}
+        reachable = 0
+        for component in reversed(order):
+            bits = 0
+            for node in self._members[component]:
+                bits |= 1 << self._bit[node]
+            for other in successors[component]:
+                bits |= reach[other]
+            reach[component] = bits
+            reachable += len(self._members[component]) * (_popcount(bits) - 1)
+        nodes = len(self._paths)
+        return nodes * (nodes - 1) - reachable
+
+    def report(self):
+        """Summary for the Statistics tab"""
+        with self._lock, metrics.REGISTRY.timer("integrity_report"):
+            if self._unreachable is None:
+                self._unreachable = self._unreachable_pairs()
+            components = sorted(self._members.values(), key=len, reverse=True)
+            return {
+                "nodes": len(self._paths),
+                "links": len(self._links),
+                "components": len(components),
+                "largest_component": len(components[0]) if components else 0,
+                "islands": [sorted(members) for members in components[1:]],
+                "unreachable_pairs": self._unreachable,
+                "dead_ends": sorted(self._dead_ends),
+                "one_way": sorted(self._one_way),
+            }
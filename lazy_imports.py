@@ -0,0 +1,34 @@
+import importlib
+import sys
+import threading
+import time
+
+# Heavy dependencies are imported by the page that needs them. The first
+# import of each module in this process is timed so the cost can be shown
+# in the Admin Panel.
+IMPORT_TIMINGS = {}
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """Import a module on first use and record how long the import took"""
+    if name in IMPORT_TIMINGS:
+        return sys.modules[name]
+    with _lock:
+        # A module found in sys.modules may still be initializing on another
+        # thread; import_module waits for it to finish
+        preloaded = name in sys.modules
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        # Already pulled in by an earlier import; record it as free
+        IMPORT_TIMINGS.setdefault(name, 0.0 if preloaded else time.perf_counter() - started)
+    return module
+
+
+def import_report():
+    """Per-module first import cost, most expensive first"""
+    rows = [
+        {"Module": name, "Import time (ms)": round(seconds * 1000, 1)}
+        for name, seconds in IMPORT_TIMINGS.items()
+    ]
+    return sorted(rows, key=lambda row: row["Import time (ms)"], reverse=True)
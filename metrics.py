@@ -0,0 +1,234 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lightweight in-process metrics: latency histograms, counters and gauges.
+# The registry lives at module level so it survives Streamlit reruns and is
+# shared by every session of the process.
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+           2.5, 5.0, 10.0)  # seconds
+SAMPLE_SIZE = 1000  # Recent samples kept per histogram for percentiles
+PROMETHEUS_PREFIX = "campus_nav"
+RATE_LIMIT_HEADERS = {
+    "X-RateLimit-Limit": "github_ratelimit_limit",
+    "X-RateLimit-Remaining": "github_ratelimit_remaining",
+    "X-RateLimit-Used": "github_ratelimit_used",
+    "X-RateLimit-Reset": "github_ratelimit_reset",
+}
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        for idx, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[idx] += 1
+                break
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe collection of histograms, counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self._gauges = {}
+            self.started_at = time.time()
+
+    # Recording
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into the `name` histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def incr(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def cache_lookup(self, cache, hit=True):
+        """Count a cache lookup for hit-rate reporting
+
+        Caches that only learn about misses later (e.g. inside the cached
+        function) count the lookup as a hit and call cache_miss() on a miss.
+        """
+        self.incr("cache_lookups", cache=cache)
+        if not hit:
+            self.cache_miss(cache)
+
+    def cache_miss(self, cache):
+        self.incr("cache_misses", cache=cache)
+
+    def record_rate_limit(self, headers):
+        """Keep the latest GitHub X-RateLimit-* header values"""
+        resource = headers.get("X-RateLimit-Resource", "core")
+        for header, gauge in RATE_LIMIT_HEADERS.items():
+            value = headers.get(header)
+            if value is not None:
+                try:
+                    self.set_gauge(gauge, int(value), resource=resource)
+                except ValueError:
+                    pass
+
+    # Reporting
+    def gauge(self, name, default=None, **labels):
+        with self._lock:
+            return self._gauges.get(_key(name, labels), default)
+
+    def timer_rows(self):
+        with self._lock:
+            items = [(key, hist.summary()) for key, hist in self._histograms.items()]
+        rows = []
+        for (name, labels), summary in sorted(items):
+            row = {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels)}
+            row.update(summary)
+            rows.append(row)
+        return rows
+
+    def cache_rows(self):
+        with self._lock:
+            counters = dict(self._counters)
+        rows = []
+        for (name, labels), lookups in sorted(counters.items()):
+            if name != "cache_lookups":
+                continue
+            hits = lookups - counters.get(("cache_misses", labels), 0)
+            rows.append({
+                "cache": dict(labels).get("cache", ""),
+                "lookups": lookups,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            })
+        return rows
+
+    def snapshot(self):
+        """All metrics as plain data"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "started_at": self.started_at,
+            "exported_at": time.time(),
+            "timers": self.timer_rows(),
+            "caches": self.cache_rows(),
+            "counters": [{"metric": n, "labels": dict(l), "value": v}
+                         for (n, l), v in sorted(counters.items())],
+            "gauges": [{"metric": n, "labels": dict(l), "value": v}
+                       for (n, l), v in sorted(gauges.items())],
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: (list(h.bucket_counts), h.count, h.total)
+                          for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        lines = []
+        declared = set()
+        for (name, labels), (buckets, count, total) in sorted(histograms.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} gauge")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
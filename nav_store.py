@@ -0,0 +1,244 @@
+import json
+
+# Navigation data is persisted as a snapshot (nav_data.json) plus a log of
+# small change records (nav_log/00000001.json, ...). Each change record holds
+# a list of operations at node/connection granularity, so a single edit only
+# uploads the entries it touched. The log is folded back into the snapshot
+# every COMPACT_EVERY records.
+
+LOG_DIR = "nav_log"
+COMPACT_EVERY = 25    # Fold the log into the snapshot after this many records
+MAX_LOG_OPS = 200     # Larger change sets are written as a new snapshot instead
+SNAPSHOT_SEQ_KEY = "log_seq"
+
+
+def empty_navigation_data():
+    """Return an empty navigation data structure"""
+    return {"nodes": {}, "connections": {}}
+
+
+def encode_value(value):
+    """Canonical JSON encoding used to compare entries"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def data_sections(data):
+    """Names of the keyed sections (nodes, connections, ...) in data"""
+    return [name for name, value in data.items() if isinstance(value, dict)]
+
+
+def entry_fingerprints(data):
+    """Encode every entry of every section, used as the base for diffs"""
+    return {
+        section: {key: encode_value(value) for key, value in data[section].items()}
+        for section in data_sections(data)
+    }
+
+
+def diff_navigation_data(base, data, changed=None):
+    """Build set/delete operations turning base into data
+
+    `changed` is an optional list of (section, key) pairs that were touched;
+    without it every entry is compared.
+    """
+    if changed is None:
+        changed = []
+        for section in set(data_sections(data)) | set(base):
+            keys = list(data.get(section, {}))
+            keys += [k for k in base.get(section, {}) if k not in data.get(section, {})]
+            changed.extend((section, key) for key in keys)
+
+    ops = []
+    seen = set()
+    for section, key in changed:
+        if (section, key) in seen:
+            continue
+        seen.add((section, key))
+
+        current = data.get(section, {})
+        old = base.get(section, {}).get(key)
+        # Each op carries the entry it was derived from, for three-way merges
+        base_value = json.loads(old) if old is not None else None
+        if key in current:
+            if encode_value(current[key]) != old:
+                # Store a detached copy so later in-place edits don't leak in
+                ops.append({"op": "set", "section": section, "key": key,
+                            "value": json.loads(json.dumps(current[key])),
+                            "base": base_value})
+        elif old is not None:
+            ops.append({"op": "delete", "section": section, "key": key,
+                        "base": base_value})
+    return ops
+
+
+def apply_operations(data, ops):
+    """Apply set/delete operations to data in place"""
+    for op in ops:
+        section = data.setdefault(op["section"], {})
+        if op["op"] == "set":
+            section[op["key"]] = op["value"]
+        elif op["op"] == "delete":
+            section.pop(op["key"], None)
+    return data
+
+
+def update_fingerprints(base, ops):
+    """Record operations in the diff base after they were persisted"""
+    for op in ops:
+        section = base.setdefault(op["section"], {})
+        if op["op"] == "set":
+            section[op["key"]] = encode_value(op["value"])
+        else:
+            section.pop(op["key"], None)
+
+
+def op_targets(ops):
+    """Set of (section, key) pairs touched by ops"""
+    return {(op["section"], op["key"]) for op in ops}
+
+
+def navigation_statistics(data):
+    """Totals and per-node breakdown shown on the Statistics tab"""
+    nodes = data['nodes']
+    connections = data['connections']
+
+    # One pass over the connection keys instead of one per node
+    connection_counts = {}
+    for conn in connections:
+        for part in set(conn.split("::")):
+            connection_counts[part] = connection_counts.get(part, 0) + 1
+
+    node_rows = []
+    total_paths = 0
+    total_images = 0
+    for node_name, node_paths in nodes.items():
+        images_count = sum(len(path_data.get('images', [])) for path_data in node_paths.values())
+        total_paths += len(node_paths)
+        total_images += images_count
+        node_rows.append({
+            "Node": node_name,
+            "Paths": len(node_paths),
+            "Images": images_count,
+            "Connections": connection_counts.get(node_name, 0)
+        })
+
+    return {
+        "total_nodes": len(nodes),
+        "total_paths": total_paths,
+        "total_connections": len(connections),
+        "total_images": total_images,
+        "node_rows": node_rows
+    }
+
+
+# Three-way merging of concurrent edits
+_MISSING = object()
+
+
+def merge_values(base, ours, theirs):
+    """Three-way merge of two edits of the same value
+
+    Dicts (nodes, paths, connections) are merged key by key and lists of
+    plain values (image paths) as ordered sets, so edits to different
+    paths or fields of one node both survive. When both sides changed the
+    same field differently, ours wins. Returns (merged, conflict count).
+    """
+    if ours == theirs or theirs == base:
+        return ours, 0
+    if ours == base:
+        return theirs, 0
+
+    base_dict = {} if base is _MISSING or base is None else base
+    if isinstance(ours, dict) and isinstance(theirs, dict) and isinstance(base_dict, dict):
+        merged = {}
+        conflicts = 0
+        for key in list(ours) + [k for k in theirs if k not in ours]:
+            value, count = merge_values(base_dict.get(key, _MISSING),
+                                        ours.get(key, _MISSING),
+                                        theirs.get(key, _MISSING))
+            conflicts += count
+            if value is not _MISSING:
+                merged[key] = value
+        return merged, conflicts
+
+    base_list = [] if base is _MISSING or base is None else base
+    if isinstance(ours, list) and isinstance(theirs, list) and isinstance(base_list, list):
+        removed = [item for item in base_list if item not in ours or item not in theirs]
+        merged = [item for item in ours if item not in removed]
+        merged += [item for item in theirs if item not in merged and item not in removed]
+        return merged, 0
+
+    return ours, 1
+
+
+def _op_value(op):
+    return op.get("value") if op["op"] == "set" else None
+
+
+def _make_op(section, key, value, base):
+    if value is None or value is _MISSING:
+        return {"op": "delete", "section": section, "key": key, "base": base}
+    return {"op": "set", "section": section, "key": key, "value": value, "base": base}
+
+
+def rebase_operation(op, current):
+    """Rebase op onto the current persisted value of its entry
+
+    Returns (op to write or None if nothing is left to change, conflicts).
+    """
+    base = op.get("base")
+    if encode_value(current) == encode_value(base):
+        return op, 0
+    merged, conflicts = merge_values(base, _op_value(op), current)
+    if encode_value(merged) == encode_value(current):
+        return None, conflicts
+    return _make_op(op["section"], op["key"], merged, current), conflicts
+
+
+def coalesce_operations(pending, new):
+    """Combine a queued op with a newer op for the same entry"""
+    merged, _ = merge_values(new.get("base"), _op_value(new), _op_value(pending))
+    return _make_op(new["section"], new["key"], merged, pending.get("base"))
+
+
+# Snapshot and log file formats
+def parse_snapshot(content):
+    """Parse nav_data.json, returning (data, last folded log seq)"""
+    data = json.loads(content)
+    log_seq = int(data.pop(SNAPSHOT_SEQ_KEY, 0) or 0)
+    data.setdefault("nodes", {})
+    data.setdefault("connections", {})
+    return data, log_seq
+
+
+def encode_snapshot(data, log_seq):
+    """Serialize a snapshot that includes everything up to log_seq"""
+    snapshot = dict(data)
+    snapshot[SNAPSHOT_SEQ_KEY] = log_seq
+    return json.dumps(snapshot, indent=2)
+
+
+def log_file_name(seq):
+    """File name of a log record"""
+    return f"{seq:08d}.json"
+
+
+def parse_log_seq(file_name):
+    """Sequence number of a log record file name, or None"""
+    stem, _, ext = file_name.partition(".")
+    if ext != "json" or not stem.isdigit():
+        return None
+    return int(stem)
+
+
+def encode_log_entry(seq, ops, timestamp):
+    """Serialize a log record (merge bases are not persisted)"""
+    ops = [{name: op[name] for name in ("op", "section", "key", "value") if name in op}
+           for op in ops]
+    return json.dumps({"seq": seq, "timestamp": timestamp, "ops": ops},
+                      separators=(",", ":"))
+
+
+def parse_log_entry(content):
+    """Operations stored in a log record"""
+    return json.loads(content).get("ops", [])
@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# Process-wide scheduler for GitHub API calls. The hourly budget is shared
+# by every session and follows the X-RateLimit-* headers of the latest
+# response. Visitor reads go out as long as any budget is left. Admin work
+# and bulk jobs are paced by a token bucket that spreads the remaining
+# budget over the rest of the window and is drained by visitor reads too;
+# bulk jobs wait behind admin work, and each class leaves a share of the
+# budget untouched for the classes above it.
+
+VISITOR, ADMIN, BULK = 0, 1, 2
+PRIORITY_NAMES = {VISITOR: "visitor", ADMIN: "admin", BULK: "bulk"}
+RESERVE = {VISITOR: 0.0, ADMIN: 0.05, BULK: 0.20}  # Share of the limit each class leaves unused
+WAIT_TIMEOUT = {ADMIN: 30.0, BULK: 60.0}  # seconds; visitors never wait
+DEFAULT_LIMIT = 5000
+DEFAULT_WINDOW = 3600  # seconds
+BURST = 100  # Paced calls that may go out back to back
+
+_context = threading.local()
+
+
+class RateLimited(Exception):
+    """The request budget does not allow this call right now"""
+
+    def __init__(self, priority, retry_at):
+        self.priority = priority
+        self.retry_at = retry_at
+        super().__init__(
+            f"GitHub API budget exhausted for {PRIORITY_NAMES[priority]} requests "
+            f"until {time.strftime('%H:%M:%S', time.localtime(retry_at))}"
+        )
+
+
+@contextmanager
+def priority(level):
+    """Run the enclosed GitHub calls at the given priority"""
+    stack = getattr(_context, "stack", None)
+    if stack is None:
+        stack = _context.stack = []
+    stack.append(level)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def current_priority(default):
+    stack = getattr(_context, "stack", None)
+    return stack[-1] if stack else default
+
+
+class RateLimitScheduler:
+    """Token bucket over the GitHub request budget"""
+
+    def __init__(self, limit=DEFAULT_LIMIT, window=DEFAULT_WINDOW, burst=BURST, registry=None):
+        self.limit = limit
+        self.window = window
+        self.burst = burst
+        self.registry = registry or metrics.REGISTRY
+        self._cond = threading.Condition()
+        self._remaining = limit
+        self._reset_at = time.time() + window
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._waiting = {level: 0 for level in PRIORITY_NAMES}
+
+    def _roll_window(self):
+        if time.time() >= self._reset_at:
+            self._remaining = self.limit
+            self._reset_at = time.time() + self.window
+
+    def _refill(self):
+        # Spread what is left of the budget evenly over the rest of the window
+        now = time.monotonic()
+        rate = self._remaining / max(1.0, self._reset_at - time.time())
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        return rate
+
+    def _reserved_for(self, level):
+        return int(self.limit * RESERVE[level])
+
+    def budget_low(self, level):
+        """True if calls of this priority would eat into a higher class's reserve"""
+        with self._cond:
+            self._roll_window()
+            return self._remaining <= self._reserved_for(level)
+
+    def acquire(self, level, timeout=None):
+        """Wait for a token; raises RateLimited if none is available in time
+
+        Visitor reads only need budget left and never wait.
+        """
+        timeout = WAIT_TIMEOUT.get(level, 0.0) if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiting[level] += 1
+            try:
+                while True:
+                    self._roll_window()
+                    rate = self._refill()
+                    if self._remaining <= self._reserved_for(level):
+                        # Nothing to wait for short of the window reset
+                        self.registry.incr("github_throttled", priority=PRIORITY_NAMES[level])
+                        raise RateLimited(level, self._reset_at)
+                    if level == VISITOR:
+                        self._tokens = max(0.0, self._tokens - 1)
+                        self._remaining -= 1
+                        return
+                    ahead = any(self._waiting[other] for other in PRIORITY_NAMES if other < level)
+                    if self._tokens >= 1 and not ahead:
+                        self._tokens -= 1
+                        self._remaining -= 1
+                        return
+                    remaining_wait = deadline - time.monotonic()
+                    if remaining_wait <= 0:
+                        self.registry.incr("github_throttled", priority=PRIORITY_NAMES[level])
+                        raise RateLimited(level, time.time() + (1 - self._tokens) / max(rate, 1e-6))
+                    next_token = (1 - self._tokens) / rate if rate > 0 else remaining_wait
+                    self._cond.wait(min(remaining_wait, max(next_token, 0.01)))
+            finally:
+                self._waiting[level] -= 1
+                self._cond.notify_all()
+
+    def update(self, headers, status_code=None):
+        """Adopt the budget GitHub reports in a response's X-RateLimit-* headers"""
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+        except (KeyError, ValueError):
+            return
+        with self._cond:
+            try:
+                self.limit = int(headers.get("X-RateLimit-Limit", self.limit))
+                self._reset_at = float(headers.get("X-RateLimit-Reset", self._reset_at))
+            except ValueError:
+                pass
+            # Other processes share the token, so the server count wins
+            self._remaining = remaining
+            if status_code in (403, 429) and remaining == 0:
+                self._tokens = 0.0
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            self._roll_window()
+            self._refill()
+            return {
+                "limit": self.limit,
+                "remaining": self._remaining,
+                "reset_at": self._reset_at,
+                "tokens": round(self._tokens, 1),
+                "waiting": {PRIORITY_NAMES[level]: count for level, count in self._waiting.items()},
+                "deferring": [PRIORITY_NAMES[level] for level in PRIORITY_NAMES
+                              if self._remaining <= self._reserved_for(level)],
+            }
+
+
+SCHEDULER = RateLimitScheduler()
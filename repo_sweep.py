@@ -0,0 +1,111 @@
+"""Find (and delete) repository files that nothing refers to any more
+
+Renamed and deleted nodes can leave their QR code and photos behind, and
+a save that fails after its images were uploaded leaves those images
+unreferenced. A sweep lists the whole campus_navigator/ tree with one git
+trees API call, compares the images/ and qrcodes/ folders with what
+nav_data refers to, and deletes the leftovers in a single commit.
+Connections whose node or path no longer exists are reported as well;
+they live in nav_data, so the admin panel is where they get removed.
+
+    GITHUB_TOKEN=... GITHUB_REPO=owner/repo python -m repo_sweep           # report only
+    GITHUB_TOKEN=... GITHUB_REPO=owner/repo python -m repo_sweep --delete
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import rate_limiter
+from github_store import GitHubStore
+
+SWEPT_FOLDERS = ("images", "qrcodes")
+
+
+def referenced_files(nav_data, base_path):
+    """Every image and QR code path nav_data needs"""
+    files = {f"{base_path}/qrcodes/{node}.png" for node in nav_data['nodes']}
+    for paths in nav_data['nodes'].values():
+        for path_data in paths.values():
+            files.update(path_data.get('images') or ())
+    return files
+
+
+def dangling_connections(nav_data):
+    """{connection key: reason} for connections whose node or path is gone"""
+    nodes = nav_data['nodes']
+    dangling = {}
+    for conn_key, details in nav_data['connections'].items():
+        if details['from'] not in nodes:
+            dangling[conn_key] = f"node {details['from']} no longer exists"
+        elif details['to'] not in nodes:
+            dangling[conn_key] = f"node {details['to']} no longer exists"
+        elif details['path_key'] not in nodes[details['from']]:
+            dangling[conn_key] = f"path {details['path_key']} of {details['from']} no longer exists"
+    return dangling
+
+
+def sweep(store, nav_data, delete=False, keep=()):
+    """Report unreferenced files (deleting them unless delete is False); returns a report dict
+
+    keep lists extra paths to spare, e.g. uploads for an edit not saved yet.
+    """
+    started = time.perf_counter()
+    calls_before = store.request_count
+    report = {"ok": False, "files": 0, "orphans": [], "deleted": 0, "commit": None,
+              "dangling": dangling_connections(nav_data)}
+
+    with rate_limiter.priority(rate_limiter.ADMIN):
+        tree = store.get_tree()
+        if tree is None:
+            report["error"] = "could not list the repository tree"
+            return _finish(report, store, calls_before, started)
+        needed = referenced_files(nav_data, store.base_path) | set(keep)
+        folders = tuple(f"{store.base_path}/{folder}/" for folder in SWEPT_FOLDERS)
+        report["files"] = len(tree)
+        report["orphans"] = sorted(
+            path for path in tree
+            if path.startswith(folders) and path not in needed and not path.rsplit("/", 1)[-1].startswith(".")
+        )
+        if delete and report["orphans"]:
+            commit = store.delete_many(report["orphans"],
+                                       f"Remove {len(report['orphans'])} unreferenced files")
+            if commit is None:
+                report["error"] = "the delete commit failed"
+                return _finish(report, store, calls_before, started)
+            report["commit"] = commit
+            report["deleted"] = len(report["orphans"])
+
+    report["ok"] = True
+    return _finish(report, store, calls_before, started)
+
+
+def _finish(report, store, calls_before, started):
+    report["api_calls"] = store.request_count - calls_before
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find and delete unreferenced campus_navigator/ files")
+    parser.add_argument("--repo", default=os.environ.get("GITHUB_REPO", ""))
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN", ""))
+    parser.add_argument("--base-path", default="campus_navigator")
+    parser.add_argument("--delete", action="store_true", help="delete the files found (default: report only)")
+    args = parser.parse_args(argv)
+    if not args.repo:
+        parser.error("--repo or GITHUB_REPO is required")
+
+    store = GitHubStore(args.token, args.repo, args.base_path)
+    loaded = store.read_navigation_data()
+    if loaded is None:
+        print(f"{store.nav_data_path} not found", file=sys.stderr)
+        return 1
+    report = sweep(store, loaded[0], delete=args.delete)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+import metrics
+import routing
+
+# Process-wide LRU of resolved routes: node sequence, the path_key of every
+# step and the total distance, keyed by (start, end, profile, closures) and
+# valid for one log sequence number. When a log record is applied, entries
+# that use none of the paths it changed move on to the new sequence number,
+# so an edit only evicts the routes passing through it. Label, instruction
+# and image edits evict nothing, as entries hold path keys, not path data.
+# Edits that could make some other route better (a new link, a new path or
+# node that brings an existing connection back, a shorter distance, a
+# changed accessibility flag) cannot be narrowed down that way; then no
+# entry moves on.
+
+
+def changed_paths(ops, old_data):
+    """(node, path_key) pairs whose routing cost an operation raised or removed
+
+    Returns (pairs, improved); improved is True when some route may have
+    become cheaper.
+    """
+    stale = set()
+    improved = False
+    for op in ops:
+        if op['section'] == "connections":
+            source, path_key = op['key'].split("::")[:2]
+            if op['op'] == "delete":
+                stale.add((source, path_key))
+            elif op['key'] not in old_data['connections']:
+                improved = True
+        elif op['section'] == "nodes":
+            old_paths = old_data['nodes'].get(op['key']) or {}
+            new_paths = (op.get('value') or {}) if op['op'] == "set" else {}
+            if any(path_key not in old_paths for path_key in new_paths):
+                improved = True  # A connection may have been waiting for this path
+            elif op['op'] == "set" and op['key'] not in old_data['nodes'] and any(
+                    op['key'] in (details['from'], details['to'])
+                    for details in old_data['connections'].values()):
+                improved = True  # A new node revives the connections ending at it
+            for path_key, old_path in old_paths.items():
+                if path_key not in new_paths:
+                    stale.add((op['key'], path_key))
+                    continue
+                before = routing.path_attributes(old_path)
+                after = routing.path_attributes(new_paths[path_key])
+                if before == after:
+                    continue
+                stale.add((op['key'], path_key))
+                if any(after[name] < before[name] for name in routing.WEIGHTS) or \
+                        any(after[name] != before[name] for name in routing.FLAGS):
+                    improved = True
+    return stale, improved
+
+
+class RouteCache:
+    """LRU of resolved routes, evicted by the paths they use"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {"seq", "path", "distance", "steps"}
+        self._users = {}  # (node, path_key) -> keys of the routes using it
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, seq):
+        """The cached route for key at seq, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry['seq'] == seq
+            if hit:
+                self._entries.move_to_end(key)
+        metrics.REGISTRY.cache_lookup("route", hit=hit)
+        return entry if hit else None
+
+    def put(self, key, seq, path, distance, steps):
+        """Store a route found at seq; steps are (current, next, path_key, ...) tuples"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['seq'] > seq:
+                return
+            self._drop(key)
+            self._entries[key] = {
+                "seq": seq,
+                "path": path,
+                "distance": distance,
+                "steps": [(current, next_node, path_key) for current, next_node, path_key, *_ in steps],
+            }
+            for current, _, path_key, *_ in steps:
+                self._users.setdefault((current, path_key), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            metrics.REGISTRY.set_gauge("route_cache_entries", len(self._entries))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for current, _, path_key in entry['steps']:
+            users = self._users.get((current, path_key))
+            if users is not None:
+                users.discard(key)
+                if not users:
+                    del self._users[(current, path_key)]
+
+    def apply_record(self, seq, ops, old_data):
+        """Move unaffected routes from seq - 1 to seq; call before ops are applied to old_data"""
+        stale, improved = changed_paths(ops, old_data)
+        with self._lock:
+            evicted = set()
+            for pair in stale:
+                evicted.update(self._users.get(pair, ()))
+            for key in evicted:
+                self._drop(key)
+            if not improved:
+                for entry in self._entries.values():
+                    if entry['seq'] == seq - 1:
+                        entry['seq'] = seq
+            metrics.REGISTRY.set_gauge("route_cache_entries", len(self._entries))
+        return len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._users.clear()
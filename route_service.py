@@ -0,0 +1,393 @@
+"""Headless routing service and batch CLI, without Streamlit
+
+Loads nav_data (snapshot plus operation log) and the closure overlay from
+the same GitHub storage as the app, or nav_data from an exported JSON file,
+and answers route requests with the full step data, image paths included.
+
+    python -m route_service serve --port 8765
+    python -m route_service route "Main Gate" "Library" --profile step_free
+    python -m route_service batch pairs.csv --workers 4 --out routes.jsonl
+
+The HTTP API speaks JSON:
+
+    GET  /health
+    GET  /nodes
+    GET  /route?from=Main%20Gate&to=Library&profile=shortest
+    POST /routes  {"pairs": [["Main Gate", "Library"], ...], "profile": "shortest"}
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import closures
+import routing
+
+DEFAULT_PORT = 8765
+REFRESH_SECONDS = 60  # How often the service re-reads nav_data and closures
+BATCH_CHUNK = 250  # Pairs per task handed to a worker process
+MAX_BATCH_PAIRS = 20000
+
+
+class RouteIndex:
+    """One version of nav_data compiled for routing"""
+
+    def __init__(self, nav_data, closure_list=(), version=None):
+        self.nav_data = nav_data
+        self.version = version
+        self.closure_list = list(closure_list)
+        self.graph = routing.RouteGraph(nav_data)
+        self._links = {}  # profile -> (closures key, step links)
+
+    def closed(self):
+        """The closures in force right now; they expire without the closure file changing"""
+        return closures.ClosureSet(self.closure_list)
+
+    def links(self, profile, closed):
+        cached = self._links.get(profile)
+        if cached is None or cached[0] != closed.key:
+            cached = self._links[profile] = (closed.key, routing.step_links(self.nav_data, profile, closed))
+        return cached[1]
+
+    def route(self, start, end, profile=routing.DEFAULT_PROFILE, found=None, closed=None):
+        """A route as a JSON-ready dict; `found` is a (path, distance) already searched for"""
+        closed = self.closed() if closed is None else closed
+        result = {"from": start, "to": end, "profile": profile, "found": False}
+        for name in (start, end):
+            if name not in self.nav_data['nodes']:
+                result['error'] = f"unknown location: {name}"
+                return result
+        if found is None:
+            path, distance, _ = routing.find_path_with_weight(self.nav_data, start, end, profile=profile,
+                                                              graph=self.graph, closed=closed)
+        else:
+            path, distance = found
+        if not path:
+            return result
+        steps = routing.route_steps(self.nav_data, path, profile, links=self.links(profile, closed))
+        result.update({
+            "found": True,
+            "distance": distance,
+            "walk_time": sum(routing.path_attributes(path_data)['walk_time'] for *_, path_data in steps),
+            "path": path,
+            "steps": [{
+                "from": current,
+                "to": next_node,
+                "path_key": path_key,
+                "label": path_data.get('label', ""),
+                "distance": path_data.get('distance', 0),
+                "instruction": path_data.get('instruction', ""),
+                "landmark": path_data.get('landmark', ""),
+                "images": path_data.get('images', []),
+            } for current, next_node, path_key, path_data in steps],
+        })
+        return result
+
+    def routes(self, pairs, profile=routing.DEFAULT_PROFILE, closed=None):
+        """Routes for many pairs; pairs sharing a start are answered by one search"""
+        closed = self.closed() if closed is None else closed
+        ends = {}
+        for start, end in pairs:
+            ends.setdefault(start, set()).add(end)
+        found = {}
+        for start, group in ends.items():
+            if len(group) > 1:
+                for end, route in self.graph.paths_from(start, group, profile, closed).items():
+                    found[(start, end)] = route
+        results = []
+        for start, end in pairs:
+            shared = len(ends[start]) > 1
+            results.append(self.route(start, end, profile,
+                                      found.get((start, end), (None, 0)) if shared else None, closed))
+        return results
+
+
+# Worker processes each compile the data once and then route chunks of pairs;
+# every task carries the closures active when the batch started
+_worker_index = None
+
+
+def _init_worker(nav_data):
+    global _worker_index
+    _worker_index = RouteIndex(nav_data)
+
+
+def _route_chunk(task):
+    pairs, profile, closure_list = task
+    return _worker_index.routes(pairs, profile, closures.ClosureSet(closure_list))
+
+
+def route_batch(index, pairs, profile=routing.DEFAULT_PROFILE, workers=1, pool=None):
+    """Route many pairs, in worker processes when workers > 1 or a pool is given"""
+    if profile not in routing.PROFILES:
+        raise ValueError(f"unknown profile: {profile}")
+    if pool is None and (workers <= 1 or len(pairs) <= BATCH_CHUNK):
+        return index.routes(pairs, profile)
+    # Chunks of pairs sorted by start, so pairs sharing one stay in one search
+    order = sorted(range(len(pairs)), key=lambda i: pairs[i][0])
+    active = closures.active(index.closure_list)
+    tasks = [([pairs[i] for i in order[n:n + BATCH_CHUNK]], profile, active)
+             for n in range(0, len(order), BATCH_CHUNK)]
+    if pool is not None:
+        chunks = pool.map(_route_chunk, tasks)
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (index.nav_data,)) as owned:
+            chunks = owned.map(_route_chunk, tasks)
+    results = [None] * len(pairs)
+    for i, result in zip(order, (result for chunk in chunks for result in chunk)):
+        results[i] = result
+    return results
+
+
+class RouteService:
+    """Keeps a RouteIndex (and a worker pool for batches) up to date with storage"""
+
+    def __init__(self, load, workers=1, refresh_seconds=REFRESH_SECONDS):
+        self._load = load
+        self.workers = workers
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._index = None
+        self._pool = None
+        self._checked_at = 0.0
+
+    def index(self):
+        """The current RouteIndex, reloaded when refresh_seconds have passed"""
+        with self._lock:
+            if self._index is None or time.time() - self._checked_at >= self.refresh_seconds:
+                self._checked_at = time.time()
+                try:
+                    nav_data, version, closure_list = self._load()
+                except Exception as e:
+                    if self._index is None:
+                        raise
+                    print(f"Reload failed, serving version {self._index.version}: {e}", file=sys.stderr)
+                    return self._index
+                current = self._index
+                if current is None or current.version != version or current.closure_list != closure_list:
+                    self._index = RouteIndex(nav_data, closure_list, version)
+                    self._close_pool()
+            return self._index
+
+    def pool(self, index):
+        with self._lock:
+            if self.workers <= 1 or index is not self._index:
+                return None
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.workers, _init_worker, (index.nav_data,))
+            return self._pool
+
+    def _close_pool(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def close(self):
+        with self._lock:
+            self._close_pool()
+
+    def routes(self, pairs, profile=routing.DEFAULT_PROFILE):
+        index = self.index()
+        pool = self.pool(index) if len(pairs) > BATCH_CHUNK else None
+        return route_batch(index, pairs, profile, pool=pool)
+
+
+class RouteRequestHandler(BaseHTTPRequestHandler):
+    server_version = "CampusRouteService/1.0"
+
+    def _send(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _error(self, status, message):
+        self._send(status, {"error": message})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        service = self.server.service
+        try:
+            index = service.index()
+        except Exception as e:
+            return self._error(503, f"navigation data unavailable: {e}")
+        if url.path == "/health":
+            return self._send(200, {"status": "ok", "version": index.version,
+                                    "nodes": len(index.nav_data['nodes']), "closures": len(index.closed())})
+        if url.path == "/nodes":
+            return self._send(200, {"nodes": sorted(index.nav_data['nodes'])})
+        if url.path == "/route":
+            profile = query.get('profile', routing.DEFAULT_PROFILE)
+            if not query.get('from') or not query.get('to'):
+                return self._error(400, "from and to are required")
+            if profile not in routing.PROFILES:
+                return self._error(400, f"unknown profile: {profile}")
+            result = index.route(query['from'], query['to'], profile)
+            return self._send(404 if result.get('error') else 200, result)
+        self._error(404, "not found")
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/routes":
+            return self._error(404, "not found")
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            pairs = [(str(start), str(end)) for start, end in request.get('pairs', [])]
+        except (ValueError, TypeError):
+            return self._error(400, "expected {\"pairs\": [[from, to], ...]}")
+        profile = request.get('profile', routing.DEFAULT_PROFILE)
+        if profile not in routing.PROFILES:
+            return self._error(400, f"unknown profile: {profile}")
+        if len(pairs) > MAX_BATCH_PAIRS:
+            return self._error(413, f"at most {MAX_BATCH_PAIRS} pairs per request")
+        try:
+            routes = self.server.service.routes(pairs, profile)
+        except Exception as e:
+            return self._error(503, f"navigation data unavailable: {e}")
+        self._send(200, {"routes": routes})
+
+
+def github_loader(repo, token, base_path, cache_dir=None):
+    """load() reading nav_data and closures the way the app stores them
+
+    A closure file that cannot be read keeps the closures of the previous
+    load; without one the load fails rather than reopen every closure.
+    """
+    import requests
+
+    import rate_limiter
+    from blob_cache import BlobCache
+    from github_store import GitHubStore
+    from snapshot_sync import default_cache_dir
+
+    store = GitHubStore(token, repo, base_path, blob_cache=BlobCache(cache_dir or default_cache_dir(repo)))
+    last = {"closures": None}
+
+    def load():
+        loaded = store.read_navigation_data()
+        if not loaded:
+            raise LookupError("navigation data not found")
+        data, _, seq, sha = loaded
+        try:
+            content, _ = store.get_strict(f"{base_path}/{closures.FILE_NAME}")
+            last['closures'] = closures.parse(content)
+        except (requests.RequestException, rate_limiter.RateLimited) as e:
+            if last['closures'] is None:
+                raise
+            print(f"Closures not re-read, keeping the previous ones: {e}", file=sys.stderr)
+        return data, (sha, seq), list(last['closures'])
+    return load
+
+
+def file_loader(path):
+    """load() reading an exported nav_data file (or a nav_data.json snapshot)"""
+    def load():
+        with open(path) as f:
+            data = json.load(f)
+        if 'nav_data' in data:
+            data = data['nav_data']
+        data.setdefault("nodes", {})
+        data.setdefault("connections", {})
+        return data, os.path.getmtime(path), []
+    return load
+
+
+def read_pairs(f):
+    """(from, to) pairs from CSV with from,to columns (a header row is optional)"""
+    pairs = []
+    for row in csv.reader(f):
+        if len(row) < 2 or not row[0].strip():
+            continue
+        if not pairs and [cell.strip().lower() for cell in row[:2]] == ["from", "to"]:
+            continue
+        pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route without the Streamlit app")
+    parser.add_argument("--repo", default=os.environ.get("GITHUB_REPO", ""))
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN", ""))
+    parser.add_argument("--base-path", default="campus_navigator")
+    parser.add_argument("--cache-dir", help="local blob cache directory")
+    parser.add_argument("--data", help="exported nav_data JSON file instead of GitHub")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for batches")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the HTTP/JSON API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--refresh", type=float, default=REFRESH_SECONDS,
+                       help="seconds between checks for new navigation data")
+
+    route = commands.add_parser("route", help="print one route as JSON")
+    route.add_argument("start")
+    route.add_argument("end")
+    route.add_argument("--profile", default=routing.DEFAULT_PROFILE, choices=list(routing.PROFILES))
+
+    batch = commands.add_parser("batch", help="route every pair of a CSV file, one JSON line each")
+    batch.add_argument("pairs", help="CSV file with from,to columns, or - for stdin")
+    batch.add_argument("--profile", default=routing.DEFAULT_PROFILE, choices=list(routing.PROFILES))
+    batch.add_argument("--out", help="output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        load = file_loader(args.data)
+    elif args.repo:
+        load = github_loader(args.repo, args.token, args.base_path, args.cache_dir)
+    else:
+        parser.error("--data, --repo or GITHUB_REPO is required")
+
+    if args.command == "serve":
+        service = RouteService(load, args.workers, args.refresh)
+        service.index()
+        server = ThreadingHTTPServer((args.host, args.port), RouteRequestHandler)
+        server.service = service
+        print(f"Serving routes on http://{args.host}:{args.port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.close()
+        return 0
+
+    nav_data, version, closure_list = load()
+    index = RouteIndex(nav_data, closure_list, version)
+    if args.command == "route":
+        result = index.route(args.start, args.end, args.profile)
+        print(json.dumps(result, indent=2))
+        return 0 if result['found'] else 1
+
+    if args.pairs == "-":
+        pairs = read_pairs(sys.stdin)
+    else:
+        with open(args.pairs, newline="") as f:
+            pairs = read_pairs(f)
+    started = time.perf_counter()
+    results = route_batch(index, pairs, args.profile, args.workers)
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.out:
+            out.close()
+    found = sum(result['found'] for result in results)
+    print(f"Routed {len(results)} pairs ({found} found) in {time.perf_counter() - started:.1f} s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,499 @@
+import csv
+import heapq
+import io
+import math
+
+import metrics
+from zones import META_SECTION
+
+# Route computation over nav_data. Kept free of Streamlit so it can be
+# benchmarked and reused outside the app.
+
+FLOOR_HEIGHT_FT = 12  # Straight-line cost of one floor change in the A* heuristic
+WALKING_SPEED_FT_S = 4.4  # Walk time of paths without an explicit walk_time
+ELEVATOR_WAIT_SECONDS = 30  # Added to the default walk time of elevator paths
+
+# Per-path attributes compiled into parallel arrays: weights a profile can
+# minimise, and flags a profile can require or avoid
+WEIGHTS = ("distance", "walk_time")
+FLAGS = ("stairs", "elevator", "outdoor", "step_free")
+PROFILES = {
+    "shortest": {"label": "📏 Shortest", "weight": "distance"},
+    "fastest": {"label": "⏱️ Fastest", "weight": "walk_time"},
+    "step_free": {"label": "♿ Step-free", "weight": "distance", "require": "step_free"},
+    "indoor": {"label": "🏢 Indoor only", "weight": "distance", "avoid": "outdoor"},
+}
+DEFAULT_PROFILE = "shortest"
+ALTERNATIVE_MAX_OVERLAP = 0.8  # Share of an alternative's cost it may have in common with a better route
+ALTERNATIVE_STRETCH = 1.25  # Alternatives cost at most this much more than the best route
+ALTERNATIVE_CANDIDATES = 5  # Plateaus tried per requested route
+
+def node_position(nav_data, node):
+    """(x, y, floor) of a node from node_meta, or None if it has no position"""
+    meta = nav_data.get(META_SECTION, {}).get(node) or {}
+    try:
+        return float(meta['x']), float(meta['y']), int(meta.get('floor') or 0)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def straight_line(a, b):
+    """Straight-line distance between two positions plus floor changes, in feet"""
+    return math.hypot(a[0] - b[0], a[1] - b[1]) + abs(a[2] - b[2]) * FLOOR_HEIGHT_FT
+
+
+def path_attributes(path_data):
+    """Routing weights and flags of one path, filling in defaults for older data"""
+    distance = float(path_data['distance'])
+    stairs = bool(path_data.get('stairs'))
+    elevator = bool(path_data.get('elevator'))
+    walk_time = path_data.get('walk_time')
+    if walk_time is None:
+        walk_time = distance / WALKING_SPEED_FT_S + (ELEVATOR_WAIT_SECONDS if elevator else 0)
+    step_free = path_data.get('step_free')
+    return {
+        "distance": distance,
+        "walk_time": float(walk_time),
+        "stairs": stairs,
+        "elevator": elevator,
+        "outdoor": bool(path_data.get('outdoor')),
+        "step_free": not stairs if step_free is None else bool(step_free),
+    }
+
+
+def path_allowed(attributes, profile):
+    rules = PROFILES[profile]
+    if rules.get('require') and not attributes[rules['require']]:
+        return False
+    return not (rules.get('avoid') and attributes[rules['avoid']])
+
+
+def read_positions_csv(text):
+    """{node: {"x", "y", "floor"}} from a floor-plan export with node,x,y[,floor] columns"""
+    positions = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        if not row.get('node'):
+            continue
+        try:
+            positions[row['node']] = {
+                "x": float(row['x']),
+                "y": float(row['y']),
+                "floor": int(float(row.get('floor') or 0)),
+            }
+        except (KeyError, ValueError):
+            raise ValueError(f"invalid position for {row['node']}")
+    return positions
+
+
+class RouteGraph:
+    """nav_data compiled into integer-indexed adjacency lists
+
+    Every connection is one edge with its weights and flags kept in parallel
+    arrays, so a routing profile only picks a weight array and a precomputed
+    mask of edges it may not use; switching profiles needs no rebuild.
+
+    When every node has a position, searches run A* with a straight-line
+    heuristic. The heuristic is scaled down so that it never exceeds any
+    edge's weight, which keeps it admissible even when admins entered
+    distances shorter than the floor plan suggests. Paths with no weight at
+    all are left out of the scale (see zero_weight_edges).
+    """
+
+    def __init__(self, nav_data):
+        with metrics.REGISTRY.timer("route_graph_build"):
+            self.names = list(nav_data['nodes'])
+            self.index = {name: idx for idx, name in enumerate(self.names)}
+            self.adjacency = [[] for _ in self.names]  # (target, edge)
+            self.targets = []  # edge -> target
+            self._sources = []  # edge -> source
+            self._reverse = None
+            self.edge_index = {}  # connection key -> edge
+            self.weights = {name: [] for name in WEIGHTS}
+            flags = {name: [] for name in FLAGS}
+            for conn_key, details in nav_data['connections'].items():
+                source, target = self.index.get(details['from']), self.index.get(details['to'])
+                path_data = nav_data['nodes'].get(details['from'], {}).get(details['path_key'])
+                if source is None or target is None or path_data is None:
+                    continue
+                attributes = path_attributes(path_data)
+                self.edge_index[conn_key] = len(self.targets)
+                self.adjacency[source].append((target, len(self.targets)))
+                self.targets.append(target)
+                self._sources.append(source)
+                for name in WEIGHTS:
+                    self.weights[name].append(attributes[name])
+                for name in FLAGS:
+                    flags[name].append(attributes[name])
+
+            self.blocked = {}
+            for profile, rules in PROFILES.items():
+                blocked = bytearray(len(self.weights['distance']))
+                if rules.get('require'):
+                    for edge, value in enumerate(flags[rules['require']]):
+                        blocked[edge] |= not value
+                if rules.get('avoid'):
+                    for edge, value in enumerate(flags[rules['avoid']]):
+                        blocked[edge] |= value
+                self.blocked[profile] = blocked
+
+            positions = [node_position(nav_data, name) for name in self.names]
+            self.nodes_without_position = positions.count(None)
+            self.positions = positions if not self.nodes_without_position else None
+            # A path saved with no distance (the editor's default) would pin
+            # the scale to 0 and turn A* off for the whole campus, so such
+            # edges are left out of the bound and only counted
+            self.zero_weight_edges = {name: sum(weight <= 0 for weight in weights)
+                                      for name, weights in self.weights.items()}
+            self.heuristic_scale = dict.fromkeys(WEIGHTS, 0.0)
+            if self.positions:
+                for name, weights in self.weights.items():
+                    ratios = [weights[edge] / straight_line(positions[source], positions[target])
+                              for source, edges in enumerate(self.adjacency)
+                              for target, edge in edges
+                              if weights[edge] > 0 and straight_line(positions[source], positions[target]) > 0]
+                    self.heuristic_scale[name] = min([1.0] + ratios)
+        metrics.REGISTRY.set_gauge("route_nodes_without_position", self.nodes_without_position)
+        metrics.REGISTRY.set_gauge("route_zero_weight_edges", self.zero_weight_edges['distance'])
+
+    @property
+    def reverse(self):
+        """Incoming (source, edge) lists, built on first use"""
+        if self._reverse is None:
+            reverse = [[] for _ in self.names]
+            for source, edges in enumerate(self.adjacency):
+                for target, edge in edges:
+                    reverse[target].append((source, edge))
+            self._reverse = reverse
+        return self._reverse
+
+    def algorithm(self, profile=DEFAULT_PROFILE):
+        return "astar" if self.heuristic_scale[PROFILES[profile]['weight']] > 0 else "dijkstra"
+
+    def _mask(self, profile, closed):
+        """Profile mask plus the edges and nodes closed right now"""
+        closed_edges, closed_nodes = set(), set()
+        if closed:
+            closed_edges = {self.edge_index[key] for key in closed.connections if key in self.edge_index}
+            closed_nodes = {self.index[name] for name in closed.nodes if name in self.index}
+        return self.blocked[profile], closed_edges, closed_nodes
+
+    def _search(self, source, target, weights, mask, estimate):
+        """A* from source to target; returns (dist, prev {node: (node, edge)}, expanded)
+
+        `estimate(node)` is a lower bound on the remaining cost, or None if
+        target cannot be reached from node at all.
+        """
+        blocked, skip_edges, skip_nodes = mask
+        dist = {source: 0.0}
+        prev = {}
+        heap = [(estimate(source), 0.0, source)]
+        expanded = 0
+        while heap:
+            _, d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            expanded += 1
+            if node == target:
+                break
+            for next_node, edge in self.adjacency[node]:
+                if blocked[edge] or edge in skip_edges or next_node in skip_nodes:
+                    continue
+                candidate = d + weights[edge]
+                if candidate < dist.get(next_node, float("inf")):
+                    remaining = estimate(next_node)
+                    if remaining is None:
+                        continue
+                    dist[next_node] = candidate
+                    prev[next_node] = (node, edge)
+                    heapq.heappush(heap, (candidate + remaining, candidate, next_node))
+        return dist, prev, expanded
+
+    def _edges_to(self, prev, source, target):
+        edges = []
+        node = target
+        while node != source:
+            node, edge = prev[node]
+            edges.append(edge)
+        return edges[::-1]
+
+    def _route(self, source, edges):
+        """(node names, distance) of an edge list starting at source"""
+        path = [source]
+        for edge in edges:
+            path.append(self.targets[edge])
+        return [self.names[idx] for idx in path], sum(self.weights['distance'][edge] for edge in edges)
+
+    def shortest_path(self, start, end, profile=DEFAULT_PROFILE, closed=None):
+        """Best route for profile as (path, distance, nodes expanded), path None if unreachable
+
+        `closed` is a closures.ClosureSet whose connections and nodes the
+        route must avoid.
+        """
+        source, target = self.index.get(start), self.index.get(end)
+        if source is None or target is None:
+            return None, 0, 0
+        mask = self._mask(profile, closed)
+        if source in mask[2] or target in mask[2]:
+            return None, 0, 0
+        positions = self.positions
+        scale = self.heuristic_scale[PROFILES[profile]['weight']]
+        goal = positions[target] if scale > 0 else None
+
+        def estimate(node):
+            return scale * straight_line(positions[node], goal) if goal else 0.0
+
+        dist, prev, expanded = self._search(source, target, self.weights[PROFILES[profile]['weight']],
+                                            mask, estimate)
+        if target not in dist:
+            return None, 0, expanded
+        path, distance = self._route(source, self._edges_to(prev, source, target))
+        return path, distance, expanded
+
+    def paths_from(self, start, ends, profile=DEFAULT_PROFILE, closed=None):
+        """Best routes from start as {end: (path, distance)}, in one search for all ends
+
+        Ends that cannot be reached are left out.
+        """
+        source = self.index.get(start)
+        mask = self._mask(profile, closed)
+        targets = {self.index[end] for end in ends if end in self.index} - mask[2]
+        if source is None or source in mask[2] or not targets:
+            return {}
+        dist, prev = {source: 0.0}, {}
+        blocked, skip_edges, skip_nodes = mask
+        weights = self.weights[PROFILES[profile]['weight']]
+        heap = [(0.0, source)]
+        settled = set()
+        remaining = set(targets)
+        while heap and remaining:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            remaining.discard(node)
+            for next_node, edge in self.adjacency[node]:
+                if blocked[edge] or edge in skip_edges or next_node in skip_nodes:
+                    continue
+                candidate = d + weights[edge]
+                if candidate < dist.get(next_node, float("inf")):
+                    dist[next_node] = candidate
+                    prev[next_node] = (node, edge)
+                    heapq.heappush(heap, (candidate, next_node))
+        return {self.names[target]: self._route(source, self._edges_to(prev, source, target))
+                for target in targets if target in settled}
+
+    def _tree(self, root, goal, weights, mask, forward=True, estimate=None):
+        """Shortest-path tree from root (towards root if not forward)
+
+        Grows until goal is settled and then on to ALTERNATIVE_STRETCH times
+        its cost; with an A* `estimate` of the cost still to go, only nodes
+        that could lie on such a route are settled. Returns ({node: cost},
+        {node: tree edge}, radius): nodes that were not settled cost at
+        least radius.
+        """
+        blocked, skip_edges, skip_nodes = mask
+        edges = self.adjacency if forward else self.reverse
+        estimate = estimate or (lambda node: 0.0)
+        dist = {root: 0.0}
+        settled = {}
+        parent = {}
+        heap = [(estimate(root), 0.0, root)]
+        limit = float("inf")
+        while heap:
+            f, d, node = heapq.heappop(heap)
+            if d > dist[node] or node in settled:
+                continue
+            if f > limit:
+                return settled, parent, f
+            settled[node] = d
+            if node == goal:
+                limit = d * ALTERNATIVE_STRETCH
+            for next_node, edge in edges[node]:
+                if blocked[edge] or edge in skip_edges or next_node in skip_nodes:
+                    continue
+                candidate = d + weights[edge]
+                if candidate < dist.get(next_node, float("inf")):
+                    dist[next_node] = candidate
+                    parent[next_node] = edge
+                    heapq.heappush(heap, (candidate + estimate(next_node), candidate, next_node))
+        return settled, parent, float("inf")
+
+    def alternative_paths(self, start, end, k, profile=DEFAULT_PROFILE, closed=None,
+                          max_overlap=ALTERNATIVE_MAX_OVERLAP):
+        """Up to k loopless routes, best first, as ([(path, distance)], nodes expanded)
+
+        Plateau method ("choice routing"): one search backward from end,
+        grown a little past the best route's cost, and one forward from
+        start that uses it as an exact A* heuristic, so it only settles nodes
+        some route within ALTERNATIVE_STRETCH can pass. Stretches of edges
+        that lie on both trees (plateaus) are shortest in both directions;
+        each gives the route start -> plateau -> end through the two trees,
+        and long plateaus make natural alternatives. The best route is the
+        longest plateau of all. The two searches are all the searching there
+        is, whatever k is.
+        """
+        source, target = self.index.get(start), self.index.get(end)
+        if source is None or target is None:
+            return [], 0
+        weights = self.weights[PROFILES[profile]['weight']]
+        mask = self._mask(profile, closed)
+        if source in mask[2] or target in mask[2]:
+            return [], 0
+        if source == target:
+            return [([start], 0.0)], 0
+        behind, behind_parent, radius = self._tree(target, source, weights, mask, forward=False)
+        if source not in behind:
+            return [], len(behind)
+        ahead, ahead_parent, _ = self._tree(source, target, weights, mask,
+                                            estimate=lambda node: behind.get(node, radius))
+        expanded = len(behind) + len(ahead)
+
+        def on_plateau(edge):
+            head, tail = self.targets[edge], self._sources[edge]
+            return (head in ahead and ahead_parent.get(head) == edge
+                    and tail in behind and behind_parent.get(tail) == edge)
+
+        # Plateaus as (length, route cost, first node), walked from their first node
+        limit = ahead[target] * ALTERNATIVE_STRETCH
+        plateaus = []
+        for node, edge in behind_parent.items():
+            if node not in ahead or node not in behind or ahead[node] + behind[node] > limit \
+                    or not on_plateau(edge):
+                continue
+            if node in ahead_parent and on_plateau(ahead_parent[node]):
+                continue
+            length = 0.0
+            while on_plateau(edge):
+                length += weights[edge]
+                edge = behind_parent.get(self.targets[edge])
+                if edge is None:
+                    break
+            plateaus.append((-length, ahead[node] + behind[node], node))
+        plateaus.sort()
+
+        def route_via(via):
+            edges = []
+            node = via
+            while node != source:
+                edge = ahead_parent[node]
+                edges.append(edge)
+                node = self._sources[edge]
+            edges.reverse()
+            node = via
+            while node != target:
+                edge = behind_parent[node]
+                edges.append(edge)
+                node = self.targets[edge]
+            return edges
+
+        def cost(edges):
+            return sum(weights[edge] for edge in edges)
+
+        routes = []
+        for _, _, via in plateaus[:k * ALTERNATIVE_CANDIDATES]:
+            edges = route_via(via)
+            nodes = [source] + [self.targets[edge] for edge in edges]
+            if len(set(nodes)) < len(nodes):
+                continue
+            overlap = max((cost(set(edges) & set(other)) for other in routes), default=0.0)
+            if overlap <= max_overlap * cost(edges):
+                routes.append(edges)
+                if len(routes) == k:
+                    break
+        routes.sort(key=cost)
+        return [self._route(source, edges) for edges in routes], expanded
+
+
+def find_path_with_weight(nav_data, start, end, hierarchy=None, profile=DEFAULT_PROFILE, graph=None,
+                          closed=None):
+    """Best route from start to end as (path, total distance, nodes expanded)
+
+    Shortest routes are answered from a contraction hierarchy built from
+    the same nav_data when there is one and its route avoids every closure
+    in `closed`. Otherwise the search runs over `graph` (compiled from
+    nav_data when not given) with the closures masked out: A* when every
+    node has a position, Dijkstra when some do not.
+    """
+    algorithm = None
+    if hierarchy is not None and profile == DEFAULT_PROFILE:
+        path, total_distance, expanded = hierarchy.route(start, end)
+        if not (path and closed and not closed.avoided_by(path)):
+            algorithm = "hierarchy"
+    if algorithm is None:
+        graph = graph or RouteGraph(nav_data)
+        algorithm = graph.algorithm(profile)
+        with metrics.REGISTRY.timer("route_search", algorithm=algorithm, profile=profile):
+            path, total_distance, expanded = graph.shortest_path(start, end, profile, closed)
+    metrics.REGISTRY.set_gauge("route_nodes_expanded", expanded, algorithm=algorithm)
+    return path, total_distance, expanded
+
+
+def find_alternative_paths(nav_data, start, end, k, profile=DEFAULT_PROFILE, graph=None, closed=None):
+    """Up to k diverse routes from start to end as [(path, total distance)], best first"""
+    graph = graph or RouteGraph(nav_data)
+    with metrics.REGISTRY.timer("route_alternatives", profile=profile):
+        routes, expanded = graph.alternative_paths(start, end, k, profile, closed)
+    metrics.REGISTRY.set_gauge("route_nodes_expanded", expanded, algorithm="alternatives")
+    return routes
+
+
+def step_links(nav_data, profile=DEFAULT_PROFILE, closed=None):
+    """{(from, to): (weight, path_key, path_data)} of the connection a route takes between two nodes"""
+    weight = PROFILES[profile]['weight']
+    links = {}
+    for conn_key, details in nav_data['connections'].items():
+        source, path_key = details['from'], details['path_key']
+        path_data = nav_data['nodes'].get(source, {}).get(path_key)
+        if path_data is None or (closed and closed.closes(conn_key, details)):
+            continue
+        attributes = path_attributes(path_data)
+        if not path_allowed(attributes, profile):
+            continue
+        # Parallel connections: the best for the profile is the one routes use
+        best = links.get((source, details['to']))
+        if best is None or attributes[weight] < best[0]:
+            links[(source, details['to'])] = (attributes[weight], path_key, path_data)
+    return links
+
+
+def hop_link(nav_data, current, next_node, profile=DEFAULT_PROFILE, closed=None):
+    """(weight, path_key, path_data) of the connection a route takes from current to next_node, or None
+
+    Connection keys are "from::path_key::to", so only current's own paths
+    are looked at rather than every connection of the campus.
+    """
+    weight = PROFILES[profile]['weight']
+    best = None
+    for path_key, path_data in (nav_data['nodes'].get(current) or {}).items():
+        conn_key = f"{current}::{path_key}::{next_node}"
+        details = nav_data['connections'].get(conn_key)
+        if details is None or (closed and closed.closes(conn_key, details)):
+            continue
+        attributes = path_attributes(path_data)
+        if path_allowed(attributes, profile) and (best is None or attributes[weight] < best[0]):
+            best = (attributes[weight], path_key, path_data)
+    return best
+
+
+def route_steps(nav_data, path, profile=DEFAULT_PROFILE, closed=None, links=None):
+    """Resolve a node path into (current, next, path_key, path_data) steps
+
+    Each hop is looked up on its own (see hop_link); pass `links` from
+    step_links() instead when resolving many routes over the same data.
+    """
+    steps = []
+    for current, next_node in zip(path, path[1:]):
+        if links is not None:
+            link = links.get((current, next_node))
+        else:
+            link = hop_link(nav_data, current, next_node, profile, closed)
+        if link:
+            steps.append((current, next_node, link[1], link[2]))
+    return steps
+
+
+def resolve_steps(nav_data, step_keys):
+    """(current, next, path_key, path_data) steps from cached (current, next, path_key) steps"""
+    return [(current, next_node, path_key, nav_data['nodes'][current][path_key])
+            for current, next_node, path_key in step_keys]
@@ -0,0 +1,134 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+
+# Type-ahead search over node names, path labels and landmarks. Text is
+# split into padded trigrams (as in pg_trgm) so misspellings and partial
+# words still match; names also get a prefix/substring boost. The index is
+# kept up to date from the same operations that are saved to the log.
+
+FIELD_WEIGHTS = {"name": 3.0, "label": 1.0, "landmark": 1.0}
+PREFIX_BOOST = 10.0
+SUBSTRING_BOOST = 5.0
+MIN_MATCH = 0.5  # Share of the query's trigrams a result must match (at weight 1)
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    return " ".join(_SEPARATORS.split(str(text).lower())).strip()
+
+
+def trigrams(text):
+    """Trigrams of every word, padded so word starts and ends count"""
+    grams = []
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def node_fields(name, paths):
+    """(field, text) pairs indexed for one node"""
+    fields = [("name", name)]
+    for path_data in (paths or {}).values():
+        if path_data.get('label'):
+            fields.append(("label", path_data['label']))
+        if path_data.get('landmark'):
+            fields.append(("landmark", path_data['landmark']))
+    return fields
+
+
+class SearchIndex:
+    """Trigram inverted index plus a sorted name list for prefix lookups"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}  # trigram -> {node: weight}
+        self._documents = {}  # node -> Counter(trigram -> weight)
+        self._names = []  # sorted (normalized name, name)
+        self._normalized = {}  # node -> normalized name
+
+    @classmethod
+    def build(cls, nav_data):
+        index = cls()
+        for name, paths in nav_data['nodes'].items():
+            index._add(name, paths)
+        return index
+
+    def __len__(self):
+        return len(self._documents)
+
+    # Maintenance
+    def _add(self, name, paths):
+        weights = Counter()
+        for field, text in node_fields(name, paths):
+            for gram in trigrams(text):
+                weights[gram] += FIELD_WEIGHTS[field]
+        self._documents[name] = weights
+        for gram, weight in weights.items():
+            self._postings.setdefault(gram, {})[name] = weight
+        self._normalized[name] = normalize(name)
+        bisect.insort(self._names, (self._normalized[name], name))
+
+    def _remove(self, name):
+        weights = self._documents.pop(name, None)
+        if weights is None:
+            return
+        for gram in weights:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.pop(name, None)
+                if not postings:
+                    del self._postings[gram]
+        entry = (self._normalized.pop(name), name)
+        pos = bisect.bisect_left(self._names, entry)
+        if pos < len(self._names) and self._names[pos] == entry:
+            del self._names[pos]
+
+    def update_node(self, name, paths):
+        with self._lock:
+            self._remove(name)
+            self._add(name, paths)
+
+    def remove_node(self, name):
+        with self._lock:
+            self._remove(name)
+
+    def apply_operations(self, ops):
+        """Re-index the nodes touched by nav_store operations"""
+        with self._lock:
+            for op in ops:
+                if op['section'] != "nodes":
+                    continue
+                self._remove(op['key'])
+                if op['op'] == "set":
+                    self._add(op['key'], op['value'])
+
+    # Queries
+    def search(self, query, limit=10):
+        """Best matching node names for query, best first"""
+        text = normalize(query)
+        with self._lock:
+            if not text:
+                return [name for _, name in self._names[:limit]]
+            scores = Counter()
+            grams = trigrams(text)
+            for gram in grams:
+                for name, weight in self._postings.get(gram, {}).items():
+                    scores[name] += weight
+            # Names starting with the query rank first even without trigram overlap
+            pos = bisect.bisect_left(self._names, (text,))
+            while pos < len(self._names) and self._names[pos][0].startswith(text):
+                scores[self._names[pos][1]] += PREFIX_BOOST * len(grams)
+                pos += 1
+            # Boost before ranking, so a substring match is never cut by trigram score alone
+            threshold = MIN_MATCH * len(grams)
+            ranked = []
+            for name, score in scores.items():
+                if text in self._normalized[name]:
+                    score += SUBSTRING_BOOST * len(grams)
+                if score >= threshold:
+                    ranked.append((-score, name))
+        return [name for _, name in heapq.nsmallest(limit, ranked)]
@@ -0,0 +1,130 @@
+"""Warm the local blob cache from a repository snapshot
+
+A sync lists the whole campus_navigator/ tree with one git trees API call
+and downloads only the blobs the cache has never seen. A cold cache (or a
+sync with many changes) downloads one zipball instead of thousands of
+per-file contents calls.
+
+    GITHUB_TOKEN=... GITHUB_REPO=owner/repo python -m snapshot_sync --cache-dir /var/cache/campus
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import rate_limiter
+from blob_cache import BlobCache, blob_sha
+from github_store import GitHubStore
+
+ARCHIVE_THRESHOLD = 50  # Missing blobs above which one archive download is cheaper
+
+
+def default_cache_dir(repo):
+    return os.path.join(tempfile.gettempdir(), "campus_navigator_blobs",
+                        blob_sha(repo.encode())[:12])
+
+
+def sync_snapshot(store, cache, archive_threshold=ARCHIVE_THRESHOLD):
+    """Bring cache up to date with the repository; returns a report dict"""
+    started = time.perf_counter()
+    calls_before = store.request_count
+    report = {"ok": False, "mode": None, "files": 0, "downloaded": 0}
+
+    with rate_limiter.priority(rate_limiter.ADMIN):
+        tree = store.get_tree()
+        missing = {} if tree is None else {
+            path: sha for path, sha in tree.items() if not cache.has_blob(sha)
+        }
+        if tree is None or len(missing) > archive_threshold:
+            report["mode"] = "archive"
+            files = store.download_archive()
+            if files is None:
+                report["error"] = "archive download failed"
+                return _finish(report, store, calls_before, started)
+            index = {path: cache.store_blob(content) for path, content in files.items()}
+            report["downloaded"] = len(files)
+            if tree is not None:
+                # The archive may be a commit newer than the tree; trust its content
+                tree = {path: index.get(path, sha) for path, sha in tree.items()}
+            tree = tree if tree is not None else index
+        else:
+            report["mode"] = "blobs"
+            for path, sha in missing.items():
+                content = store.get_blob(sha)
+                if content is None:
+                    report["error"] = f"could not download {path}"
+                    return _finish(report, store, calls_before, started)
+                cache.store_blob(content, sha)
+                report["downloaded"] += 1
+
+    cache.set_index(tree)
+    report["pruned"] = cache.prune()
+    report["files"] = len(tree)
+    report["ok"] = True
+    return _finish(report, store, calls_before, started)
+
+
+def _finish(report, store, calls_before, started):
+    report["api_calls"] = store.request_count - calls_before
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["synced_at"] = time.time()
+    return report
+
+
+class SnapshotSyncer:
+    """Background thread that re-syncs the cache every `interval` seconds"""
+
+    def __init__(self, store, cache, interval=300):
+        self.store = store
+        self.cache = cache
+        self.interval = interval
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-sync", daemon=True)
+        self._thread.start()
+
+    def sync_now(self):
+        """Run a sync on the calling thread (skipped if one is already running)"""
+        if not self._lock.acquire(blocking=False):
+            return self.last_report
+        try:
+            try:
+                self.last_report = sync_snapshot(self.store, self.cache)
+            except Exception as e:
+                self.last_report = {"ok": False, "error": str(e), "synced_at": time.time()}
+            return self.last_report
+        finally:
+            self._lock.release()
+
+    def _run(self):
+        while True:
+            self.sync_now()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync campus_navigator/ into a local blob cache")
+    parser.add_argument("--repo", default=os.environ.get("GITHUB_REPO", ""))
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN", ""))
+    parser.add_argument("--base-path", default="campus_navigator")
+    parser.add_argument("--cache-dir", help="defaults to the app's cache directory for the repo")
+    parser.add_argument("--archive-threshold", type=int, default=ARCHIVE_THRESHOLD)
+    args = parser.parse_args(argv)
+    if not args.repo:
+        parser.error("--repo or GITHUB_REPO is required")
+
+    cache = BlobCache(args.cache_dir or default_cache_dir(args.repo))
+    store = GitHubStore(args.token, args.repo, args.base_path, blob_cache=cache)
+    report = sync_snapshot(store, cache, args.archive_threshold)
+    report["cache_dir"] = cache.directory
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Export nav_data as a static, serverless navigation site
+
+Routes are precomputed as one shortest-path tree per destination: for every
+location the tree stores the index of the edge to take next.
+A visitor's browser loads the tree of the chosen destination and follows it
+from the start, so routing needs no server at all.
+
+    GITHUB_TOKEN=... GITHUB_REPO=owner/repo python -m static_export --out site/
+"""
+import argparse
+import hashlib
+import heapq
+import io
+import json
+import os
+import sys
+import zipfile
+
+from lazy_imports import lazy_import
+
+MAX_IMAGE_PX = 800
+JPEG_QUALITY = 70
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Campus Navigator</title>
+<style>
+body { font-family: system-ui, sans-serif; max-width: 720px; margin: 0 auto; padding: 1rem; }
+select, button { font-size: 1rem; padding: .4rem; margin: .2rem 0; width: 100%; }
+.step { border-bottom: 1px solid #ddd; padding: .8rem 0; }
+.step img { max-width: 100%; border-radius: 6px; }
+.muted { color: #666; }
+</style>
+</head>
+<body>
+<h1>🗺️ Campus Navigator</h1>
+<label>📍 Starting Point <select id="start"></select></label>
+<label>🎯 Destination <select id="end"></select></label>
+<button id="go">🔍 Find Best Route</button>
+<p id="summary" class="muted"></p>
+<div id="steps"></div>
+<script>
+let graph;
+const $ = id => document.getElementById(id);
+
+function option(name, idx) {
+  const o = document.createElement("option");
+  o.value = idx; o.textContent = name; return o;
+}
+
+function line(label, value) {
+  const p = document.createElement("div");
+  const b = document.createElement("b");
+  b.textContent = label + " ";
+  p.appendChild(b);
+  p.appendChild(document.createTextNode(value));
+  return p;
+}
+
+async function route() {
+  const start = +$("start").value, end = +$("end").value;
+  $("steps").replaceChildren();
+  if (start === end) { $("summary").textContent = "You are already there."; return; }
+  const next = await (await fetch(`data/routes/${end}.json`)).json();
+  if (next[start] < 0) { $("summary").textContent = "❌ No route found to destination"; return; }
+  let node = start, n = 0, total = 0;
+  while (node !== end) {
+    const [from, to, step] = graph.edges[next[node]];
+    const s = graph.steps[step];
+    const div = document.createElement("div");
+    div.className = "step";
+    const h = document.createElement("h3");
+    h.textContent = `📍 Step ${++n}`;
+    div.appendChild(h);
+    if (s.images.length) {
+      const img = document.createElement("img");
+      img.src = `images/${s.images[0]}`; img.alt = s.label; img.loading = "lazy";
+      div.appendChild(img);
+    }
+    div.appendChild(line("From:", graph.nodes[from]));
+    div.appendChild(line("To:", graph.nodes[to]));
+    div.appendChild(line("Direction:", s.label));
+    div.appendChild(line("Distance:", `${s.distance} ft`));
+    div.appendChild(line("Instruction:", s.instruction));
+    if (s.landmark) div.appendChild(line("Landmark:", s.landmark));
+    $("steps").appendChild(div);
+    total += s.distance;
+    node = to;
+  }
+  $("summary").textContent = `✅ Route Found! Distance: ${total.toFixed(1)} ft, Steps: ${n}`;
+}
+
+(async () => {
+  graph = await (await fetch("data/graph.json")).json();
+  const order = graph.nodes.map((name, idx) => [name, idx]).sort();
+  for (const [name, idx] of order) {
+    $("start").appendChild(option(name, idx));
+    $("end").appendChild(option(name, idx));
+  }
+  // QR codes link here as ?from=<node name>
+  const from = new URLSearchParams(location.search).get("from");
+  if (from && graph.nodes.includes(from)) $("start").value = graph.nodes.indexOf(from);
+  $("go").onclick = route;
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def compile_edges(nav_data):
+    """Node names, and edges as (from index, to index, path_key, distance)"""
+    names = sorted(nav_data['nodes'])
+    index = {name: idx for idx, name in enumerate(names)}
+    edges = []
+    for details in nav_data['connections'].values():
+        source, target, path_key = details['from'], details['to'], details['path_key']
+        path_data = nav_data['nodes'].get(source, {}).get(path_key)
+        if path_data is None or target not in index:
+            continue
+        edges.append((index[source], index[target], path_key, float(path_data['distance'])))
+    return names, edges
+
+
+def destination_tree(node_count, reverse_adjacency, destination):
+    """Shortest-path tree towards destination as (next edge, distance) per node"""
+    dist = [None] * node_count
+    next_edge = [-1] * node_count
+    dist[destination] = 0.0
+    heap = [(0.0, destination)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        for source, weight, edge in reverse_adjacency[node]:
+            candidate = d + weight
+            if dist[source] is None or candidate < dist[source]:
+                dist[source] = candidate
+                next_edge[source] = edge
+                heapq.heappush(heap, (candidate, source))
+    return next_edge, dist
+
+
+def optimize_image(content, max_px=MAX_IMAGE_PX, quality=JPEG_QUALITY):
+    """Downscale to max_px and re-encode as JPEG; unchanged without Pillow"""
+    try:
+        Image = lazy_import("PIL.Image")
+    except ImportError:
+        return content, None
+    try:
+        img = Image.open(io.BytesIO(content))
+        # JPEGs can be decoded straight at a fraction of their size
+        img.draft("RGB", (max_px, max_px))
+        img.thumbnail((max_px, max_px))
+        buffer = io.BytesIO()
+        img.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    except (OSError, ValueError):
+        return content, None
+    return buffer.getvalue(), "jpg"
+
+
+def bundle_image_paths(nav_data):
+    """Every image path the bundle may include, for reading them in one batch"""
+    return list(dict.fromkeys(image_path for paths in nav_data['nodes'].values()
+                              for path_data in paths.values()
+                              for image_path in path_data.get('images', [])))
+
+
+def build_bundle(nav_data, load_image=None, max_image_px=MAX_IMAGE_PX):
+    """All files of the static site as {relative path: bytes}
+
+    `load_image(path)` returns an image's bytes (or None); without it the
+    bundle references no images. Prefetch bundle_image_paths() and pass
+    a dict's get to avoid one read per image.
+    """
+    names, edges = compile_edges(nav_data)
+    files = {"index.html": INDEX_HTML.encode()}
+
+    # Step cards, one per edge, with images stored once by content hash
+    images = {}
+    optimized = {}
+    steps = []
+    for source, _, path_key, _ in edges:
+        path_data = nav_data['nodes'][names[source]][path_key]
+        step_images = []
+        for image_path in path_data.get('images', []) if load_image else []:
+            if image_path not in images:
+                content = load_image(image_path)
+                if not content:
+                    images[image_path] = None
+                    continue
+                digest = hashlib.sha1(content).hexdigest()
+                if digest not in optimized:
+                    content, extension = optimize_image(content, max_image_px)
+                    extension = extension or image_path.rsplit(".", 1)[-1].lower()
+                    name = f"{digest[:16]}.{extension}"
+                    files[f"images/{name}"] = content
+                    optimized[digest] = name
+                images[image_path] = optimized[digest]
+            if images[image_path]:
+                step_images.append(images[image_path])
+        steps.append({
+            "label": path_data.get('label', ""),
+            "distance": path_data.get('distance', 0),
+            "instruction": path_data.get('instruction', ""),
+            "landmark": path_data.get('landmark', ""),
+            "images": step_images,
+        })
+
+    graph = {
+        "nodes": names,
+        "edges": [[source, target, idx] for idx, (source, target, _, _) in enumerate(edges)],
+        "steps": steps,
+    }
+    files["data/graph.json"] = json.dumps(graph, separators=(",", ":")).encode()
+
+    reverse_adjacency = [[] for _ in names]
+    for idx, (source, target, _, distance) in enumerate(edges):
+        reverse_adjacency[target].append((source, distance, idx))
+    for destination in range(len(names)):
+        next_edge, _ = destination_tree(len(names), reverse_adjacency, destination)
+        files[f"data/routes/{destination}.json"] = json.dumps(next_edge, separators=(",", ":")).encode()
+    return files
+
+
+def zip_bundle(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for path, content in sorted(files.items()):
+            archive.writestr(path, content)
+    return buffer.getvalue()
+
+
+def write_bundle(files, out_dir):
+    for path, content in files.items():
+        target = os.path.join(out_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+
+
+def main(argv=None):
+    from blob_cache import BlobCache
+    from github_store import GitHubStore
+    from snapshot_sync import default_cache_dir
+
+    parser = argparse.ArgumentParser(description="Export a static navigation site")
+    parser.add_argument("--out", required=True, help="output directory, or a .zip file")
+    parser.add_argument("--repo", default=os.environ.get("GITHUB_REPO", ""))
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN", ""))
+    parser.add_argument("--base-path", default="campus_navigator")
+    parser.add_argument("--cache-dir", help="blob cache to read images from first")
+    parser.add_argument("--max-image-px", type=int, default=MAX_IMAGE_PX)
+    args = parser.parse_args(argv)
+    if not args.repo:
+        parser.error("--repo or GITHUB_REPO is required")
+
+    cache = BlobCache(args.cache_dir or default_cache_dir(args.repo))
+    store = GitHubStore(args.token, args.repo, args.base_path, blob_cache=cache)
+    loaded = store.read_navigation_data()
+    if not loaded:
+        print("Navigation data not found", file=sys.stderr)
+        return 1
+    images = store.get_files_many(bundle_image_paths(loaded[0]))
+    files = build_bundle(loaded[0], images.get, args.max_image_px)
+    if args.out.endswith(".zip"):
+        with open(args.out, "wb") as f:
+            f.write(zip_bundle(files))
+    else:
+        write_bundle(files, args.out)
+    size = sum(len(content) for content in files.values())
+    print(f"Wrote {len(files)} files ({size / 1024 / 1024:.1f} MB) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
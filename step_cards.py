@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import metrics
+import static_export
+
+# Rendered step cards for the turn-by-turn directions: the formatted text of
+# a step plus downscaled JPEGs of its images, built once and kept in a
+# process-wide LRU. Cards are keyed by connection and a hash of the path's
+# content, so an edited path (text, flags or image list) simply stops
+# matching its old card; nothing has to be invalidated. Image files are
+# never rewritten in place (uploads get new paths), so the image list
+# stands in for the image content.
+
+THUMBNAIL_PX = 480
+FLAG_NOTES = (("stairs", "🪜 Stairs"), ("elevator", "🛗 Elevator"), ("outdoor", "🌳 Outdoors"))
+
+
+def card_key(current, next_node, path_key, path_data):
+    """(connection key, content hash) identifying a step's card"""
+    digest = hashlib.sha1(json.dumps(path_data, sort_keys=True).encode()).hexdigest()
+    return f"{current}::{path_key}::{next_node}", digest
+
+
+def step_markdown(current, next_node, path_data):
+    return "  \n".join([
+        f"**From:** 📍 {current}",
+        f"**To:** 📍 {next_node}",
+        f"**Direction:** {path_data['label']}",
+        f"**Distance:** 📏 {path_data['distance']} ft",
+        f"**Instruction:** 📝 {path_data['instruction']}",
+        f"**Landmark:** 🏛️ {path_data['landmark']}",
+    ])
+
+
+def build_card(current, next_node, path_data, images):
+    """Card for one step; images maps image paths to their bytes
+
+    Images missing from images get a None thumbnail; such a card should
+    not be cached, so the images are tried again next time.
+    """
+    thumbnails = []
+    with metrics.REGISTRY.timer("step_card_build"):
+        for image_path in path_data.get('images') or ():
+            content = images.get(image_path)
+            thumbnail = static_export.optimize_image(content, THUMBNAIL_PX)[0] if content else None
+            thumbnails.append((image_path, thumbnail))
+    return {
+        "text": step_markdown(current, next_node, path_data),
+        "notes": " · ".join(label for flag, label in FLAG_NOTES if path_data.get(flag)),
+        "images": thumbnails,
+        "complete": all(thumbnail for _, thumbnail in thumbnails),
+    }
+
+
+class StepCardCache:
+    """LRU of rendered step cards"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cards = OrderedDict()
+
+    def __len__(self):
+        return len(self._cards)
+
+    def get(self, key):
+        with self._lock:
+            card = self._cards.get(key)
+            if card is not None:
+                self._cards.move_to_end(key)
+        metrics.REGISTRY.cache_lookup("step_card", hit=card is not None)
+        return card
+
+    def put(self, key, card):
+        with self._lock:
+            self._cards[key] = card
+            self._cards.move_to_end(key)
+            while len(self._cards) > self.max_entries:
+                self._cards.popitem(last=False)
+            metrics.REGISTRY.set_gauge("step_cards_cached", len(self._cards))
@@ -0,0 +1,197 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class WriteBehindQueue:
+    """Persist queued writes from a background worker
+
+    Writes are keyed; submitting a key that is still pending replaces the
+    earlier payload (or combines both through `coalesce_fn(old, new)`), so
+    rapid successive edits of the same entry collapse into one write. The
+    worker waits `coalesce_delay` seconds after the first pending write so
+    edits made in quick succession are committed together by a single
+    `commit_fn(batch)` call.
+
+    `commit_fn` receives a list of (key, payload) pairs and returns the
+    keys that failed (or a {key: reason} dict, whose reasons end up in
+    `last_error`, as the worker has no one else to tell); those are retried with backoff unless a newer payload
+    arrived in the meantime. Pending writes are mirrored to `spool_path`
+    and drained on interpreter exit, so nothing queued is lost on shutdown.
+    """
+
+    def __init__(self, commit_fn, spool_path=None, coalesce_delay=1.5,
+                 max_backoff=60.0, drain_timeout=60.0, coalesce_fn=None):
+        self._commit_fn = commit_fn
+        self._coalesce_fn = coalesce_fn
+        self._spool_path = spool_path
+        self._coalesce_delay = coalesce_delay
+        self._max_backoff = max_backoff
+        self._drain_timeout = drain_timeout
+
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._in_flight = OrderedDict()
+        self._failures = 0
+        self._closing = False
+        self.committed_batches = 0
+        self.committed_writes = 0
+        self.last_commit_time = None
+        self.last_error = None
+
+        self._load_spool()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Producer side
+    def submit(self, key, payload):
+        """Queue a write, replacing any pending write with the same key"""
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("write queue is closed")
+            previous = self._pending.pop(key, None)
+            if previous is not None and self._coalesce_fn:
+                payload = self._coalesce_fn(previous, payload)
+            self._pending[key] = payload
+            self._save_spool()
+            self._cond.notify_all()
+
+    def discard(self, key):
+        """Drop a pending write that is no longer wanted"""
+        with self._cond:
+            if self._pending.pop(key, None) is not None:
+                self._save_spool()
+
+    def lookup(self, key):
+        """Latest payload not yet durable for key, or None"""
+        with self._cond:
+            if key in self._pending:
+                return self._pending[key]
+            return self._in_flight.get(key)
+
+    def items(self):
+        """All writes not yet durable, oldest first"""
+        with self._cond:
+            merged = OrderedDict(self._in_flight)
+            for key, payload in self._pending.items():
+                merged.pop(key, None)
+                merged[key] = payload
+            return list(merged.items())
+
+    def status(self):
+        """Snapshot of the queue state for display"""
+        with self._cond:
+            return {
+                "pending": len(self._pending) + len(self._in_flight),
+                "committed_batches": self.committed_batches,
+                "committed_writes": self.committed_writes,
+                "last_commit_time": self.last_commit_time,
+                "last_error": self.last_error,
+                "retrying": self._failures > 0,
+            }
+
+    def flush(self, timeout=None):
+        """Block until every queued write is durable; returns True on success"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self):
+        """Stop accepting writes and drain what is queued"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(self._drain_timeout)
+
+    # Worker side
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending and self._closing:
+                    return
+                if not self._closing:
+                    # Give follow-up edits a moment to join this batch
+                    self._cond.wait(self._coalesce_delay)
+                batch = list(self._pending.items())
+                self._in_flight = OrderedDict(batch)
+                self._pending.clear()
+
+            try:
+                failed = self._commit_fn(batch) or ()
+                reasons = sorted(set(failed.values())) if isinstance(failed, dict) else []
+                failed = set(failed)
+                error = None if not failed else f"{len(failed)} write(s) failed"
+                if reasons:
+                    error += ": " + "; ".join(reasons)
+            except Exception as e:
+                failed = {key for key, _ in batch}
+                error = str(e)
+
+            with self._cond:
+                for key, payload in batch:
+                    if key not in failed:
+                        continue
+                    if key in self._pending and self._coalesce_fn:
+                        payload = self._coalesce_fn(payload, self._pending[key])
+                    elif key in self._pending:
+                        continue
+                    self._pending[key] = payload
+                    self._pending.move_to_end(key, last=False)
+                self._in_flight = OrderedDict()
+                succeeded = len(batch) - len(failed)
+                if succeeded:
+                    self.committed_batches += 1
+                    self.committed_writes += succeeded
+                    self.last_commit_time = time.time()
+                self.last_error = error
+                self._failures = self._failures + 1 if failed else 0
+                self._save_spool()
+                self._cond.notify_all()
+                if failed:
+                    # Back off; on shutdown give up after a few attempts and
+                    # leave the writes in the spool for the next start
+                    if self._closing and self._failures >= 3:
+                        return
+                    self._cond.wait(min(self._max_backoff, 2 ** self._failures))
+
+    # Spool file so queued writes survive a crash or forced stop
+    def _save_spool(self):
+        if not self._spool_path:
+            return
+        items = [[list(key), payload] for key, payload in
+                 list(self._in_flight.items()) + list(self._pending.items())]
+        try:
+            if not items:
+                if os.path.exists(self._spool_path):
+                    os.remove(self._spool_path)
+                return
+            tmp_path = f"{self._spool_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(items, f)
+            os.replace(tmp_path, self._spool_path)
+        except OSError as e:
+            self.last_error = f"Could not write spool: {e}"
+
+    def _load_spool(self):
+        if not self._spool_path or not os.path.exists(self._spool_path):
+            return
+        try:
+            with open(self._spool_path) as f:
+                for key, payload in json.load(f):
+                    self._pending[tuple(key)] = payload
+        except (OSError, ValueError) as e:
+            self.last_error = f"Could not read spool: {e}"
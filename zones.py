@@ -0,0 +1,336 @@
+import hashlib
+import heapq
+import json
+import re
+import threading
+
+import metrics
+import nav_store
+from blob_cache import blob_sha
+
+# Campus data partitioned by building/zone. Every node belongs to one zone
+# (node_meta[node]['zone'], "Campus" when unset) and each zone is stored as
+# its own shard file holding the zone's nodes and outgoing connections. A
+# small index lists the zone of every node plus a gateway overlay:
+# the connections that cross zones, and for every zone the shortest
+# distance from each node where routes enter it to each node where they
+# leave it.
+#
+# Routing is hierarchical: the start and end zones are searched edge by
+# edge, every other zone only through its overlay edges, and only the
+# zones the chosen route passes through are loaded to expand it into steps.
+
+DEFAULT_ZONE = "Campus"
+META_SECTION = "node_meta"
+INDEX_FILE = "index.json"
+
+
+class StaleShard(Exception):
+    """A shard does not match the SHA the zone index expects"""
+
+
+def node_zone(nav_data, node):
+    meta = nav_data.get(META_SECTION, {}).get(node) or {}
+    return meta.get('zone') or DEFAULT_ZONE
+
+
+def shard_file_name(zone):
+    slug = re.sub(r"[^0-9a-z]+", "-", zone.lower()).strip("-") or "zone"
+    return f"{slug}-{hashlib.sha1(zone.encode()).hexdigest()[:8]}.json"
+
+
+def encode_shard(shard):
+    return json.dumps(shard, sort_keys=True, separators=(",", ":")).encode()
+
+
+def shard_adjacency(shard):
+    """{node: [(target, distance, path_key)]} for the connections of a shard"""
+    adjacency = {}
+    for details in shard['connections'].values():
+        source, path_key = details['from'], details['path_key']
+        path_data = shard['nodes'].get(source, {}).get(path_key)
+        if path_data is not None:
+            adjacency.setdefault(source, []).append(
+                (details['to'], float(path_data['distance']), path_key))
+    return adjacency
+
+
+def _dijkstra(adjacency, source, members, target=None):
+    """Distances and predecessors from source, staying within members"""
+    dist = {source: 0.0}
+    prev = {}
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        if node == target:
+            break
+        for next_node, weight, _ in adjacency.get(node, ()):
+            if next_node not in members:
+                continue
+            candidate = d + weight
+            if candidate < dist.get(next_node, float("inf")):
+                dist[next_node] = candidate
+                prev[next_node] = node
+                heapq.heappush(heap, (candidate, next_node))
+    return dist, prev
+
+
+def _unwind(prev, source, target):
+    path = [target]
+    while path[-1] != source:
+        path.append(prev[path[-1]])
+    return path[::-1]
+
+
+def partition(nav_data):
+    """Split nav_data into ({node: zone}, {zone: shard})"""
+    node_zones = {node: node_zone(nav_data, node) for node in nav_data['nodes']}
+    shards = {}
+    for node, paths in nav_data['nodes'].items():
+        shard = shards.setdefault(node_zones[node], {"nodes": {}, "connections": {}})
+        shard['nodes'][node] = paths
+    for conn_key, details in nav_data['connections'].items():
+        zone = node_zones.get(details['from'])
+        if zone is not None:
+            shards[zone]['connections'][conn_key] = details
+    return node_zones, shards
+
+
+def gateway_overlay(node_zones, shards):
+    """Crossing edges [from, to, distance] and zone edges [zone, entry, exit, distance]"""
+    crossing = []
+    entries = {zone: set() for zone in shards}
+    exits = {zone: set() for zone in shards}
+    adjacencies = {zone: shard_adjacency(shard) for zone, shard in shards.items()}
+    for zone, adjacency in adjacencies.items():
+        for source, edges in adjacency.items():
+            for target, distance, _ in edges:
+                target_zone = node_zones.get(target)
+                if target_zone is None or target_zone == zone:
+                    continue
+                crossing.append([source, target, distance])
+                exits[zone].add(source)
+                entries[target_zone].add(target)
+
+    zone_edges = []
+    for zone, adjacency in adjacencies.items():
+        members = shards[zone]['nodes']
+        for entry in sorted(entries[zone]):
+            dist, _ = _dijkstra(adjacency, entry, members)
+            for exit_node in sorted(exits[zone]):
+                if exit_node != entry and exit_node in dist:
+                    zone_edges.append([zone, entry, exit_node, dist[exit_node]])
+    return crossing, zone_edges
+
+
+def build_zone_files(nav_data, log_seq):
+    """Index and shard files for nav_data as of log_seq
+
+    Returns (index, {file name: bytes}); the index itself is not included.
+    """
+    with metrics.REGISTRY.timer("zone_shards_build"):
+        node_zones, shards = partition(nav_data)
+        crossing, zone_edges = gateway_overlay(node_zones, shards)
+        files = {}
+        shard_info = {}
+        for zone, shard in sorted(shards.items()):
+            content = encode_shard(shard)
+            name = shard_file_name(zone)
+            files[name] = content
+            shard_info[zone] = {
+                "file": name,
+                "sha": blob_sha(content),
+                "nodes": len(shard['nodes']),
+                "connections": len(shard['connections']),
+            }
+    index = {
+        "log_seq": log_seq,
+        "zones": node_zones,
+        "shards": shard_info,
+        "crossing": crossing,
+        "zone_edges": zone_edges,
+    }
+    return index, files
+
+
+class ZonedCampus:
+    """Lazily loaded, hierarchically routed view of the sharded campus
+
+    `load_shard(zone, info)` returns the shard dict described by the index
+    entry `info`. Operations committed after the index was built are
+    applied on top; zones they touch are searched edge by edge because
+    their overlay edges may be out of date.
+    """
+
+    def __init__(self, index, load_shard):
+        self.seq = index['log_seq']
+        self._info = index['shards']
+        self._load_shard = load_shard
+        self._lock = threading.RLock()
+        self._zones = dict(index['zones'])
+        self._assigned = {}  # Zone assignments changed since the index was built
+        self._shards = {}
+        self._adjacency = {}
+        self._pending = {}
+        self._dirty = set()
+        self._overlay = {}
+        self._entries = set()
+        for source, target, distance in index['crossing']:
+            self._overlay.setdefault(source, []).append((target, distance, None))
+            self._entries.add(target)
+        for zone, entry, exit_node, distance in index['zone_edges']:
+            self._overlay.setdefault(entry, []).append((exit_node, distance, zone))
+
+    # Nodes
+    def has_node(self, name):
+        return name in self._zones
+
+    def node_names(self):
+        with self._lock:
+            return list(self._zones)
+
+    def zone_of(self, name):
+        return self._zones.get(name)
+
+    # Shards
+    def _shard(self, zone):
+        shard = self._shards.get(zone)
+        if shard is None:
+            info = self._info.get(zone)
+            shard = self._load_shard(zone, info) if info else {"nodes": {}, "connections": {}}
+            nav_store.apply_operations(shard, self._pending.pop(zone, []))
+            self._shards[zone] = shard
+            metrics.REGISTRY.set_gauge("zone_shards_loaded", len(self._shards))
+        return shard
+
+    def _zone_adjacency(self, zone):
+        if zone not in self._adjacency:
+            self._adjacency[zone] = shard_adjacency(self._shard(zone))
+        return self._adjacency[zone]
+
+    def _apply(self, zone, op):
+        self._dirty.add(zone)
+        self._adjacency.pop(zone, None)
+        if zone in self._shards:
+            nav_store.apply_operations(self._shards[zone], [op])
+        else:
+            self._pending.setdefault(zone, []).append(op)
+
+    def _move(self, node, old, new):
+        old_shard = self._shard(old)
+        paths = old_shard['nodes'].get(node)
+        moved = [(key, details) for key, details in old_shard['connections'].items()
+                 if details['from'] == node]
+        for key, details in moved:
+            self._apply(old, {"op": "delete", "section": "connections", "key": key})
+            self._apply(new, {"op": "set", "section": "connections", "key": key, "value": details})
+        self._apply(old, {"op": "delete", "section": "nodes", "key": node})
+        if paths is not None:
+            self._apply(new, {"op": "set", "section": "nodes", "key": node, "value": paths})
+        self._zones[node] = new
+
+    def apply_operations(self, seq, ops):
+        """Apply a committed log record; returns False if records were skipped"""
+        with self._lock:
+            if seq <= self.seq:
+                return True
+            if seq != self.seq + 1:
+                return False
+            for op in ops:
+                section, key = op['section'], op['key']
+                if section == META_SECTION:
+                    zone = (op.get('value') or {}).get('zone') if op['op'] == "set" else None
+                    self._assigned[key] = zone or DEFAULT_ZONE
+                    old = self._zones.get(key)
+                    if old is not None and old != self._assigned[key]:
+                        self._move(key, old, self._assigned[key])
+                elif section == "nodes":
+                    zone = self._zones.get(key) or self._assigned.get(key, DEFAULT_ZONE)
+                    if op['op'] == "set":
+                        self._zones[key] = zone
+                    else:
+                        self._zones.pop(key, None)
+                    self._apply(zone, op)
+                elif section == "connections":
+                    source = key.split("::")[0]
+                    self._apply(self._zones.get(source) or self._assigned.get(source, DEFAULT_ZONE), op)
+            self.seq = seq
+            return True
+
+    # Routing
+    def route(self, start, end):
+        """Shortest route as (path, distance, nodes reached); path None if unreachable"""
+        with self._lock, metrics.REGISTRY.timer("route_zoned"):
+            if start not in self._zones or end not in self._zones:
+                return None, 0, 0
+            if start == end:
+                return [start], 0.0, 0
+            expanded = {self._zones[start], self._zones[end]} | self._dirty
+
+            dist = {start: 0.0}
+            prev = {}
+            heap = [(0.0, start)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > dist[node]:
+                    continue
+                if node == end:
+                    break
+                zone = self._zones.get(node)
+                if zone not in expanded and prev[node][1] is None and node not in self._entries:
+                    # Reached over a connection added since the index was built
+                    expanded.add(zone)
+                if zone in expanded:
+                    edges = [(target, weight, None)
+                             for target, weight, _ in self._zone_adjacency(zone).get(node, ())]
+                else:
+                    edges = self._overlay.get(node, ())
+                for target, weight, via in edges:
+                    candidate = d + weight
+                    if candidate < dist.get(target, float("inf")):
+                        dist[target] = candidate
+                        prev[target] = (node, via)
+                        heapq.heappush(heap, (candidate, target))
+            reached = len(dist)
+            if end not in dist:
+                return None, 0, reached
+
+            hops = []
+            node = end
+            while node != start:
+                source, via = prev[node]
+                hops.append((source, node, via))
+                node = source
+
+            # Expand overlay edges into the steps they stand for
+            path = [start]
+            for source, target, via in reversed(hops):
+                if via is None:
+                    path.append(target)
+                    continue
+                members = self._shard(via)['nodes']
+                _, inner = _dijkstra(self._zone_adjacency(via), source, members, target)
+                path.extend(_unwind(inner, source, target)[1:])
+            return path, dist[end], reached
+
+    def route_data(self, path):
+        """nav_data with the nodes and connections of the zones path visits"""
+        with self._lock:
+            data = {"nodes": {}, "connections": {}}
+            for zone in {self._zones[node] for node in path if node in self._zones}:
+                shard = self._shard(zone)
+                data['nodes'].update(shard['nodes'])
+                data['connections'].update(shard['connections'])
+            return data
+
+    def status(self):
+        with self._lock:
+            return {
+                "seq": self.seq,
+                "nodes": len(self._zones),
+                "zones": len(set(self._zones.values())),
+                "loaded": sorted(self._shards),
+                "changed": sorted(self._dirty),
+            }